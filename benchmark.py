@@ -0,0 +1,339 @@
+"""Benchmarks for KSP Mod Manager's core operations on a synthetic install.
+
+Generates a mod library (many small .cfg files, large .dds textures, DLLs and
+.version files), a KSP instance and profiles that overlap by a set ratio, all
+in a scratch folder, then times the operations headlessly:
+
+    python benchmark.py --mods 200 --files-per-mod 60 --compare benchmarks/old.json
+
+Each result has the wall time, the files and bytes of the data the operation
+covers (the profile for an apply, GameData for a backup or update, the unused
+mods for a cleanup, the whole library for indexing), the throughput over that
+data and the peak RSS while it ran. Results are written as JSON to the
+benchmarks folder so runs can be compared over time.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RESULTS_DIR = Path(__file__).resolve().parent / "benchmarks"
+MB = 1024 * 1024
+
+# Share of a mod's files of each kind, and the size range (bytes) drawn from for each
+FILE_KINDS = [
+    ("cfg", 0.6, (512, 8 * 1024)),
+    ("dds", 0.25, (32 * 1024, None)),  # Upper bound is --texture-kb
+    ("dll", 0.05, (16 * 1024, 512 * 1024)),
+    ("txt", 0.1, (1024, 64 * 1024)),
+]
+WORDS = ["Kerbal", "Near", "Future", "Tweak", "Scale", "Module", "Manager", "Real", "Plume", "Waterfall", "Engineer",
+         "Redux", "Scatterer", "Parallax", "Texture", "Replacer", "Station", "Parts", "Mech", "Jeb", "Orbit", "Science"]
+# Typed one character at a time in the filter benchmark
+FILTER_QUERIES = ["kerbal engineer", "nearfuture", "tweakscale", "zzz", "mod"]
+
+def reset_peak_rss():
+    """Start measuring peak RSS from now, where the OS allows it (Linux); returns whether it could"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb():
+    """Peak RSS since reset_peak_rss(), or of the whole process where it can't be reset"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / MB if sys.platform == "darwin" else peak / 1024
+
+class Library:
+    """Writes the synthetic mods; file contents are distinct so the deduplicating store can't cheat"""
+
+    def __init__(self, seed, texture_kb):
+        self.random = random.Random(seed)
+        self.block = self.random.randbytes(max(texture_kb * 1024, 512 * 1024) + 4096)
+        self.texture_kb = texture_kb
+        self.counter = 0
+
+    def content(self, kind, size):
+        self.counter += 1
+        header = f"{kind}:{self.counter}:".encode()
+        offset = self.random.randrange(len(self.block) - size) if size < len(self.block) else 0
+        return (header + self.block[offset:offset + size])[:size]
+
+    def cfg_text(self, mod_name, index, size):
+        """One PART per file, like most part configs, padded out with MODULE nodes"""
+        lines = [f"PART\n{{\n    name = {mod_name.lower()}_part{index}\n    module = Part\n    mass = 0.5\n"]
+        while sum(len(line) for line in lines) < size:
+            lines.append(f"    MODULE\n    {{\n        name = ModuleGenerator{len(lines)}\n"
+                         f"        isAlwaysActive = true\n    }}\n")
+        lines.append("}\n")
+        return "".join(lines)
+
+    def file_size(self, size_range):
+        low, high = size_range
+        high = high or max(low + 1, self.texture_kb * 1024)
+        # Log-uniform: mostly small files with a long tail of big ones
+        return int(low * (high / low) ** self.random.random())
+
+    def write_mod(self, mods_dir, mod_name, file_count):
+        """Write one mod folder; returns (files, bytes)"""
+        root = mods_dir / mod_name
+        total_bytes = 0
+        for i in range(file_count):
+            kind = self.random.choices([k[0] for k in FILE_KINDS], [k[1] for k in FILE_KINDS])[0]
+            size = self.file_size(next(k[2] for k in FILE_KINDS if k[0] == kind))
+            folder = {"cfg": "Parts", "dds": "Textures", "dll": "Plugins", "txt": "Docs"}[kind]
+            path = root / folder / f"{kind}{i}.{kind}"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if kind == "cfg":
+                data = self.cfg_text(mod_name, i, size).encode()
+            else:
+                data = self.content(kind, size)
+            path.write_bytes(data)
+            total_bytes += len(data)
+        version = json.dumps({"NAME": mod_name, "VERSION": {"MAJOR": 1, "MINOR": self.random.randrange(10),
+                                                            "PATCH": self.random.randrange(10)}})
+        (root / f"{mod_name}.version").write_text(version)
+        return file_count + 1, total_bytes + len(version)
+
+def generate_install(home, args):
+    """Create the mods, an instance with a stock GameData and the profiles under home; returns a summary"""
+    library = Library(args.seed, args.texture_kb)
+    mods_dir = home / "mods"
+    mods_dir.mkdir(parents=True)
+    rng = random.Random(args.seed)
+    names = sorted({"".join(rng.sample(WORDS, 2)) + str(i) for i in range(args.mods)})
+    sizes = {}
+    for name in names:
+        file_count = max(1, min(int(rng.expovariate(1 / args.files_per_mod)), args.files_per_mod * 10))
+        sizes[name] = library.write_mod(mods_dir, name, file_count)
+
+    gamedata = home / "ksp" / "GameData"
+    library.write_mod(gamedata, "Squad", args.files_per_mod)
+
+    # Profile k covers a window of the mods, shifted so neighbouring profiles share --overlap of their mods
+    per_profile = max(1, int(len(names) * args.profile_size))
+    step = max(1, int(per_profile * (1 - args.overlap)))
+    profiles = {f"p{k}": names[k * step:k * step + per_profile] for k in range(args.profiles)}
+    profiles_dir = home / "profiles" / "bench"
+    profiles_dir.mkdir(parents=True)
+    for name, mods in profiles.items():
+        (profiles_dir / f"{name}.json").write_text(json.dumps(mods))
+    (home / "instances.json").write_text(json.dumps({"bench": {"path": str(gamedata.parent)}}))
+    if args.setting:
+        settings = dict(setting.split("=", 1) for setting in args.setting)
+        (home / "settings.json").write_text(json.dumps({key: json.loads(value) for key, value in settings.items()}))
+
+    return {
+        "mods": len(names),
+        "files": sum(files for files, _ in sizes.values()),
+        "bytes": sum(size for _, size in sizes.values()),
+        "profiles": {name: len(mods) for name, mods in profiles.items()},
+        "unused_mods": len(set(names) - {mod for mods in profiles.values() for mod in mods}),
+    }
+
+def tree_stats(path):
+    files = total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            files += 1
+            total += os.path.getsize(os.path.join(dirpath, name))
+    return files, total
+
+def mods_stats(main, names):
+    index = main.get_mod_index()
+    mods = [index.get_mod(name, refresh=False) for name in names]
+    return sum(m["file_count"] for m in mods if m), sum(m["size"] for m in mods if m)
+
+def measure(name, func, files=0, data_bytes=0, **extra):
+    """Run func once and return its result row"""
+    reset_peak_rss()
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    func()
+    seconds = time.perf_counter() - started
+    cpu_seconds = time.process_time() - cpu_started
+    peak = peak_rss_mb()
+    row = {
+        "operation": name,
+        "seconds": round(seconds, 4),
+        "cpu_seconds": round(cpu_seconds, 4),  # All threads
+        "files": files,
+        "bytes": data_bytes,
+        "files_per_s": round(files / seconds, 1) if seconds and files else None,
+        "mb_per_s": round(data_bytes / MB / seconds, 2) if seconds and files else None,
+        "peak_rss_mb": round(peak, 1) if peak is not None else None,
+    }
+    row.update(extra)
+    return row
+
+def run_benchmarks(main, home, args, status):
+    instance = "bench"
+    gamedata = home / "ksp" / "GameData"
+    results = []
+
+    def record(row):
+        # Folders removed by the operation are deleted in the background; don't let that overlap the next one
+        main.get_trash_reaper().drain()
+        results.append(row)
+        if row["files_per_s"] is not None:
+            rate = f"{row['files_per_s']:10.0f} files/s  {row['mb_per_s']:8.1f} MB/s"
+        else:
+            each = row.get("ms_per_keystroke", row.get("ms_per_query", row.get("ms_per_plan", 0)))
+            rate = f"{each:10.3f} ms each" + " " * 12
+        status(f"{row['operation']:<16} {row['seconds']:9.3f} s  {rate}  cpu {row['cpu_seconds']:7.3f} s  "
+               f"peak {row['peak_rss_mb'] or 0:.0f} MB")
+
+    library_files, library_bytes = tree_stats(main.MODS_DIR)
+    record(measure("index", lambda: main.get_mod_index().refresh(), library_files, library_bytes))
+
+    profiles = sorted(main.list_profiles(instance), key=main.natural_sort_key)
+    switched = profiles[min(1, len(profiles) - 1)]  # What GameData holds after the applies
+    for label, profile in (("apply_cold", profiles[0]), ("apply_switch", switched), ("apply_noop", switched)):
+        mods = main.get_profile_store().load(instance, profile)
+        plan = main.plan_profile(instance, profile)
+        files, data_bytes = mods_stats(main, mods)
+        record(measure(label, lambda: main.apply_profile(instance, profile, lambda msg: None), files, data_bytes,
+                       copied_files=sum(counts["copy"] for counts in plan["files"].values()),
+                       removed_mods=len(plan["remove"])))
+
+    # The quick plan the main window works out whenever a profile is selected
+    row = measure("plan_fast", lambda: [main.plan_profile(instance, profile, exact=False) for profile in profiles],
+                  profiles=len(profiles))
+    row["ms_per_plan"] = round(row["seconds"] * 1000 / len(profiles), 3)
+    record(row)
+
+    for label in ("backup_cold", "backup_warm"):
+        files, data_bytes = tree_stats(gamedata)
+        record(measure(label, lambda: main.backup_gamedata(instance, None, lambda msg: None), files, data_bytes))
+
+    # Change a few deployed files so the update has something to sync back
+    deployed = [p for p in gamedata.iterdir() if p.is_dir() and p.name not in main.STOCK_FOLDERS]
+    for mod_path in deployed[:3]:
+        for cfg in list(mod_path.glob("Parts/*.cfg"))[:5]:
+            with open(cfg, "a") as f:
+                f.write("// edited by the benchmark\n")
+    files, data_bytes = tree_stats(gamedata)
+    record(measure("update", lambda: main.update_profile(instance, switched, lambda msg: None), files, data_bytes))
+
+    rng = random.Random(args.seed)
+    names = ["".join(rng.sample(WORDS, 3)) + str(i) for i in range(args.filter_mods)]
+    mod_filter = main.ModFilter(names)
+    keystrokes = [query[:n] for query in FILTER_QUERIES for n in range(len(query) + 1)]
+    row = measure("filter", lambda: [mod_filter.filter(query) for query in keystrokes],
+                  keystrokes=len(keystrokes), mods=len(names))
+    row["ms_per_keystroke"] = round(row["seconds"] * 1000 / len(keystrokes), 3)
+    record(row)
+
+    index = main.get_mod_index()
+    queries = [row[0] for row in index.db.execute("SELECT text FROM terms WHERE kind = 'part' LIMIT 50")]
+    queries += [query[:-1] + "x" for query in queries[:10]]  # Typos go through the fuzzy path
+    row = measure("search", lambda: [index.search(query) for query in queries], queries=len(queries))
+    row["ms_per_query"] = round(row["seconds"] * 1000 / max(1, len(queries)), 3)
+    record(row)
+
+    unused, pinned_refs = main.find_unused_mods()
+    files, data_bytes = mods_stats(main, unused)
+    record(measure("cleanup", lambda: main.cleanup_unused_mods(unused, pinned_refs), files, data_bytes,
+                   removed_mods=len(unused)))
+    return results
+
+def compare(previous_path, results, status):
+    with open(previous_path) as f:
+        previous = {row["operation"]: row for row in json.load(f)["results"]}
+    status(f"\nCompared with {previous_path} (time ratio, below 1.00 is faster):")
+    for row in results:
+        before = previous.get(row["operation"])
+        if before and before["seconds"]:
+            cpu = (f"  cpu x{row['cpu_seconds'] / before['cpu_seconds']:.2f}"
+                   if before.get("cpu_seconds") and "cpu_seconds" in row else "")
+            status(f"{row['operation']:<16} {before['seconds']:9.3f} s -> {row['seconds']:9.3f} s  "
+                   f"x{row['seconds'] / before['seconds']:.2f}{cpu}")
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark KSP Mod Manager on a synthetic install.")
+    parser.add_argument("--mods", type=int, default=60, help="mods in the library")
+    parser.add_argument("--files-per-mod", type=int, default=30, help="average files per mod (exponentially distributed)")
+    parser.add_argument("--texture-kb", type=int, default=1024, help="largest .dds texture")
+    parser.add_argument("--profiles", type=int, default=3)
+    parser.add_argument("--profile-size", type=float, default=0.6, help="share of the mods in each profile")
+    parser.add_argument("--overlap", type=float, default=0.8, help="share of mods neighbouring profiles have in common")
+    parser.add_argument("--filter-mods", type=int, default=10000, help="mod names in the filter benchmark")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--setting", action="append", metavar="KEY=JSON",
+                        help='settings.json override, e.g. --setting staged_apply=false --setting file_workers=16')
+    parser.add_argument("--workdir", help="where to build the install (default: a temp folder); choose the disk to test")
+    parser.add_argument("--keep", action="store_true", help="keep the generated install")
+    parser.add_argument("--output", help="results file (default: benchmarks/benchmark-<time>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare with")
+    args = parser.parse_args(argv)
+
+    def status(message):
+        sys.stderr.write(message + "\n")
+        sys.stderr.flush()
+
+    home = Path(tempfile.mkdtemp(prefix="kspmm-bench-", dir=args.workdir))
+    try:
+        status(f"Generating the install in {home}...")
+        started = time.perf_counter()
+        library = generate_install(home, args)
+        status(f"{library['mods']} mods, {library['files']} files, {library['bytes'] / MB:.0f} MB "
+               f"in {time.perf_counter() - started:.1f} s\n")
+
+        # main reads KSPMM_HOME when it is imported
+        os.environ["KSPMM_HOME"] = str(home)
+        import main
+        main.ensure_data_dirs()
+        try:
+            results = run_benchmarks(main, home, args, status)
+        finally:
+            main.get_trash_reaper().drain()
+            main.get_instance_registry().flush()
+            main.get_mod_index().db.close()
+
+        report = {
+            "benchmark": 1,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "keep")},
+            "settings": main.load_settings(),
+            "library": library,
+            "results": results,
+        }
+        output = Path(args.output) if args.output else RESULTS_DIR / f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json"
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+        status(f"\nResults written to {output}")
+        if args.compare:
+            compare(args.compare, results, status)
+    finally:
+        if not args.keep:
+            shutil.rmtree(home, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
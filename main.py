@@ -1,13 +1,29 @@
 import os
 import json
 import shutil
-import tkinter as tk
-from tkinter import filedialog, messagebox, simpledialog
+import copy
+import atexit
+import sqlite3
+import hashlib
+import math
+import errno
+import stat
+import threading
+import collections
+import itertools
+import struct
+import tempfile
+import zlib
+import zipfile
+import queue
+import select
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 import re
 import ctypes
-import platform
 import sys
 
 DEBUG_MODE = "-d" in sys.argv
@@ -16,20 +32,195 @@ DEBUG_MODE = "-d" in sys.argv
 UI_FONT = ("Helvetica", 10)
 UI_WIDTH = 25
 
-BASE_DIR = Path(__file__).resolve().parent
+# KSPMM_HOME moves all data (mods, profiles, backups, ...) somewhere else, e.g. for benchmarks
+BASE_DIR = Path(os.environ.get("KSPMM_HOME") or Path(__file__).resolve().parent)
 MODS_DIR = BASE_DIR / "mods"
 INSTANCES_FILE = BASE_DIR / "instances.json"
+SETTINGS_FILE = BASE_DIR / "settings.json"
 PROFILES_DIR = BASE_DIR / "profiles"
+PROFILE_INDEX_FILE = PROFILES_DIR / "index.json"
 BACKUPS_DIR = BASE_DIR / "backups"
+BACKUP_OBJECTS_DIR = BACKUPS_DIR / "objects"
+SNAPSHOTS_DIR = BACKUPS_DIR / "snapshots"
+DEPLOYMENTS_DIR = BASE_DIR / "deployments"
+MOD_INDEX_FILE = BASE_DIR / "index.db"
 
-for folder in [MODS_DIR, PROFILES_DIR, BACKUPS_DIR]:
-    folder.mkdir(exist_ok=True)
+# Restores are built here (next to GameData, on the same drive) before being swapped in
+RESTORE_STAGING_NAME = ".kspmm-restore"
+# Staged applies build the new GameData here; the replaced tree is kept for rollback
+STAGED_GAMEDATA_NAME = "GameData.staging"
+PREVIOUS_GAMEDATA_NAME = "GameData.previous"
+
+# Stock KSP folders that are never removed from GameData
+STOCK_FOLDERS = ["Squad", "SquadExpansion"]
+HASH_CHUNK_SIZE = 1024 * 1024
+# Saves to instances.json made within this many seconds are written out together
+INSTANCES_WRITE_DELAY = 0.5
+# Journals of apply/update/cleanup operations, kept only while they run; files
+# finished for a large mod are checkpointed in batches of this many
+JOURNALS_DIR = BASE_DIR / "journals"
+JOURNAL_CHECKPOINT_FILES = 256
+# Traces of operations run with tracing on (-d or the trace setting), in Chrome trace format
+TRACES_DIR = BASE_DIR / "traces"
+# Caches a game load leaves behind, kept per instance and profile so they survive switching profiles
+LOAD_CACHE_DIR = BASE_DIR / "loadcache"
+MM_CACHE_FILES = ["ModuleManager.ConfigCache", "ModuleManager.ConfigSHA", "ModuleManager.TechTree",
+                  "ModuleManager.Physics"]  # In GameData
+PART_DATABASE_FILE = "PartDatabase.cfg"  # In the instance folder
+# Folders are deleted by renaming them into a trash folder on the same drive (in the
+# manager's folder or the instance folder) that a background thread empties
+TRASH_NAME = ".kspmm-trash"
+TRASH_WORKERS = 2
+# The GUI follows changes to the mods folder and GameData with inotify where it can, otherwise by
+# polling folder mtimes every WATCH_POLL_SECONDS; changes in PluginData folders, which mods write
+# to while KSP runs, don't count as GameData having been changed by hand
+WATCH_POLL_SECONDS = 2.0
+IN_ATTRIB, IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO = 0x4, 0x8, 0x40, 0x80
+IN_CREATE, IN_DELETE, IN_DELETE_SELF, IN_MOVE_SELF = 0x100, 0x200, 0x400, 0x800
+IN_Q_OVERFLOW, IN_IGNORED, IN_ISDIR = 0x4000, 0x8000, 0x40000000
+WATCH_EVENTS = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+                | IN_DELETE_SELF | IN_MOVE_SELF)
+
+# Defaults for settings.json; file_workers is the number of parallel file operations,
+# backup_format is "incremental" (deduplicated snapshots) or "zip",
+# backup_compression is the zip speed/ratio trade-off (store, fast, default, max) and
+# staged_apply builds the new GameData beside the old one and swaps it in, and
+# batch_per_device is how many instances on the same disk a batch apply works on at once,
+# trace records where the time of each operation goes (always on with -d) and
+# load_cache keeps ModuleManager's patch cache per profile so switching back loads fast and
+# watch has the GUI follow changes made to GameData and the mods folder outside the manager
+DEFAULT_SETTINGS = {
+    "file_workers": 8,
+    "backup_format": "incremental",
+    "backup_compression": "default",
+    "staged_apply": True,
+    "batch_per_device": 1,
+    "trace": False,
+    "load_cache": True,
+    "watch": True,
+}
+
+# Zip backups: deflate level per backup_compression setting (None stores without compressing)
+ZIP_COMPRESSION_LEVELS = {"store": None, "fast": 1, "default": 6, "max": 9}
+# Formats that are already compressed and gain next to nothing from deflate
+STORED_EXTENSIONS = {".dds", ".png", ".jpg", ".jpeg", ".dll", ".zip", ".7z", ".gz", ".ogg", ".mp3"}
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP_SPOOL_SIZE = 4 * 1024 * 1024
+
+# How mods are placed into GameData, set per instance in instances.json
+DEPLOY_MODES = ["copy", "hardlink", "symlink", "reflink"]
+DEFAULT_DEPLOY_MODE = "copy"
+FICLONE = 0x40049409  # Linux ioctl for copy-on-write clones (Btrfs, XFS)
+# File copies on Linux run in the kernel, this many bytes per copy_file_range/sendfile call;
+# files from PREALLOCATE_MIN_SIZE up get their full size reserved before the data is copied
+KERNEL_COPY = sys.platform.startswith("linux") and hasattr(os, "sendfile")
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+PREALLOCATE_MIN_SIZE = 1024 * 1024
+
+# Apply duration estimates: assumed speed until an instance has measured its own
+# (per deployment mode, in instances.json), and the smallest applies worth measuring
+DEFAULT_APPLY_THROUGHPUT = {"bytes_per_s": 100 * 1024 * 1024, "files_per_s": 1000}
+THROUGHPUT_MIN_BYTES = 16 * 1024 * 1024
+THROUGHPUT_MIN_FILES = 200
+
+# Content-addressed store behind the mods folder: every file is kept once under
+# its sha256 and each mod version is a manifest of relative paths to hashes.
+# The folders in MODS_DIR are hardlinked from the objects, which are read-only so
+# nothing writing through a link (KSP, hardlink/symlink deployments) can change them.
+# Files mods rewrite while KSP runs (settings, PluginData) are private copies instead.
+STORE_DIR = MODS_DIR / ".store"
+STORE_OBJECTS_DIR = STORE_DIR / "objects"
+STORE_VERSIONS_DIR = STORE_DIR / "versions"
+STORE_CHECKOUTS_DIR = STORE_DIR / "checkouts"
+VERSION_SEPARATOR = "@"
+RUNTIME_DATA_FOLDER = "PluginData"  # Where mods keep what they write while KSP runs
+MUTABLE_FILE_EXTENSIONS = {".cfg", ".xml", ".json", ".txt", ".settings", ".dat", ".ini"}
+
+# tkinter is only imported by load_tk() when the GUI starts, so the command line doesn't pay for it
+tk = filedialog = messagebox = simpledialog = tkfont = None
+
+def load_tk():
+    """Import tkinter into the module names the GUI code uses"""
+    global tk, filedialog, messagebox, simpledialog, tkfont
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, simpledialog
+    import tkinter.font as tkfont
+
+def ensure_data_dirs():
+    """Create the mods, profiles, backups and deployments folders if they are missing"""
+    for folder in [MODS_DIR, PROFILES_DIR, BACKUPS_DIR, DEPLOYMENTS_DIR]:
+        folder.mkdir(exist_ok=True)
+
+class ModFilter:
+    """The search behind ModSelectionDialog, kept apart from Tk.
+
+    filtered holds indexes into all_mods (sorted case-insensitively) of the
+    mods matching the last query, and hints what a content search matched.
+    """
+
+    def __init__(self, mods):
+        self.all_mods = sorted(mods, key=lambda x: x.lower())
+        # Search keys are worked out once: the lowercase name, and the same without separators
+        self.search_keys = [(mod.lower(), re.sub(r"[\W_]+", "", mod.lower())) for mod in self.all_mods]
+        self.filtered = list(range(len(self.all_mods)))
+        self.hints = {}  # Index into all_mods -> what a content search matched in it
+        self.last_query = ""
+
+    def filter(self, query, contents=False):
+        """Match every word of query against the mod names, and with contents also inside the mods"""
+        query = query.lower()
+        tokens = query.split()
+        contents = contents and len(query.strip()) >= 3
+        # A longer version of the last query can only match fewer mods, so narrow the last result
+        narrow = self.last_query is not None and query.startswith(self.last_query)
+        candidates = self.filtered if narrow else range(len(self.all_mods))
+        self.hints = {}
+        if tokens:
+            keys = self.search_keys
+            self.filtered = [i for i in candidates
+                             if all(token in keys[i][0] or token in keys[i][1] for token in tokens)]
+        else:
+            self.filtered = list(range(len(self.all_mods)))
+        if contents:
+            positions = {mod: i for i, mod in enumerate(self.all_mods)}
+            name_matches = set(self.filtered)
+            for mod, match in get_mod_index().search_mods(query).items():
+                i = positions.get(mod)
+                if i is None:
+                    continue
+                if match["kind"] != "mod":
+                    self.hints[i] = f"  - {match['kind']}: {match['text']}"
+                if i not in name_matches:
+                    self.filtered.append(i)
+            self.filtered.sort()
+        # Fuzzy content matches don't shrink as the query grows, so don't narrow from them
+        self.last_query = None if contents else query
+        return self.filtered
 
 class ModSelectionDialog:
-    def __init__(self, parent, available_mods, title="Select Mods"):
+    """Pick mods from the mods folder.
+
+    The selection lives in persistent_selections, apart from the widget, and
+    the Listbox only ever holds the rows that fit on screen, so filtering and
+    scrolling cost the same with ten mods or ten thousand.
+    """
+    FILTER_DELAY_MS = 40  # Filtering waits for a pause in typing this long
+
+    def __init__(self, parent, available_mods, title="Select Mods", mod_sizes=None):
         self.result = None
         self.selected_mods = []
         self.persistent_selections = set()  # Track selected mods across filtering
+        self.mod_sizes = mod_sizes or {}  # Shown next to each mod name
+        
+        # Store original mod list for filtering
+        self.mod_filter = ModFilter(available_mods)
+        self.all_mods = self.mod_filter.all_mods
+        self.labels = self.make_labels()
+        self.filtered = self.mod_filter.filtered  # Indexes into all_mods that match the search
+        self.hints = {}
+        self.filter_job = None
+        self.offset = 0  # First filtered row shown in the Listbox
+        self.rows = 1  # How many rows fit in the Listbox
         
         # Create dialog window
         self.dialog = tk.Toplevel(parent)
@@ -61,10 +252,15 @@ class ModSelectionDialog:
         
         tk.Label(search_frame, text="Search:").pack(side="left")
         self.search_var = tk.StringVar()
-        self.search_var.trace("w", self.filter_mods)
+        self.search_var.trace("w", self.schedule_filter)
         search_entry = tk.Entry(search_frame, textvariable=self.search_var, width=30)
         search_entry.pack(side="left", padx=5)
         
+        # Also match file names, parts and .version names through the mod index
+        self.contents_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(search_frame, text="Search inside mods", variable=self.contents_var,
+                       command=self.filter_mods).pack(side="left")
+        
         # Selection buttons frame
         button_frame = tk.Frame(self.dialog)
         button_frame.pack(fill="x", padx=10, pady=5)
@@ -79,22 +275,19 @@ class ModSelectionDialog:
         list_frame = tk.Frame(self.dialog)
         list_frame.pack(fill="both", expand=True, padx=10, pady=10)
         
-        # Create listbox with scrollbar
-        scrollbar = tk.Scrollbar(list_frame)
-        scrollbar.pack(side="right", fill="y")
+        # The scrollbar moves through the filtered mods, not through the Listbox's few rows
+        self.scrollbar = tk.Scrollbar(list_frame, command=self.on_scroll)
+        self.scrollbar.pack(side="right", fill="y")
         
+        list_font = tkfont.Font(font=("Helvetica", 9))
+        self.row_height = list_font.metrics("linespace") + 1
         self.mods_listbox = tk.Listbox(
             list_frame, 
             selectmode=tk.MULTIPLE,
-            yscrollcommand=scrollbar.set,
-            font=("Helvetica", 9)
+            font=list_font,
+            activestyle="none"
         )
         self.mods_listbox.pack(side="left", fill="both", expand=True)
-        scrollbar.config(command=self.mods_listbox.yview)
-        
-        # Store original mod list for filtering
-        self.all_mods = sorted(available_mods, key=lambda x: x.lower())
-        self.populate_mods(self.all_mods)
         
         # Bottom buttons
         bottom_frame = tk.Frame(self.dialog)
@@ -110,68 +303,102 @@ class ModSelectionDialog:
         self.count_label = tk.Label(bottom_frame, text="0 mods selected", fg="blue")
         self.count_label.pack(side="left")
         
-        # Bind selection event to update count
-        self.mods_listbox.bind("<<ListboxSelect>>", self.update_selection_count)
+        # Bind selection event to update the selection model and count
+        self.mods_listbox.bind("<<ListboxSelect>>", self.on_listbox_select)
+        self.mods_listbox.bind("<Configure>", self.on_resize)
+        self.mods_listbox.bind("<MouseWheel>", lambda e: self.scroll_to(self.offset + (-3 if e.delta > 0 else 3)))
+        self.mods_listbox.bind("<Button-4>", lambda e: self.scroll_to(self.offset - 3))
+        self.mods_listbox.bind("<Button-5>", lambda e: self.scroll_to(self.offset + 3))
+        self.render()
+        
+    def make_labels(self):
+        return [f"{mod}  ({format_size(self.mod_sizes[mod])})" if mod in self.mod_sizes else mod
+                for mod in self.all_mods]
+
+    def set_sizes(self, mod_sizes):
+        """Show sizes that became known after the dialog opened"""
+        if not self.dialog.winfo_exists():
+            return
+        self.mod_sizes = mod_sizes
+        self.labels = self.make_labels()
+        self.render()
+
+    def set_selection(self, mods):
+        """Replace the selection (mods that aren't in the list are kept as selected too)"""
+        self.persistent_selections = set(mods)
+        self.render()
+        self.update_selection_count()
         
-    def populate_mods(self, mods):
+    def render(self):
+        """Show the rows at the current offset, in one Listbox call, with their selection"""
+        self.offset = max(0, min(self.offset, len(self.filtered) - self.rows))
+        window = self.filtered[self.offset:self.offset + self.rows]
         self.mods_listbox.delete(0, tk.END)
-        for mod in mods:
-            self.mods_listbox.insert(tk.END, mod)
-            
-    def filter_mods(self, *args):
-        # Update persistent selections with current state
-        selected_indices = self.mods_listbox.curselection()
-        currently_selected = [self.mods_listbox.get(i) for i in selected_indices]
+        if window:
+            self.mods_listbox.insert(tk.END, *(self.labels[i] + self.hints.get(i, "") for i in window))
+        for row, index in enumerate(window):
+            if self.all_mods[index] in self.persistent_selections:
+                self.mods_listbox.selection_set(row)
+        total = len(self.filtered) or 1
+        self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self.rows) / total))
         
-        # Update our persistent selection set
-        self.persistent_selections.update(currently_selected)
+    def visible_mods(self):
+        return [self.all_mods[i] for i in self.filtered[self.offset:self.offset + self.rows]]
         
-        # Remove any deselected items
-        all_visible = [self.mods_listbox.get(i) for i in range(self.mods_listbox.size())]
-        for mod in all_visible:
-            if mod not in currently_selected:
+    def on_listbox_select(self, event=None):
+        selected_rows = set(self.mods_listbox.curselection())
+        for row, mod in enumerate(self.visible_mods()):
+            if row in selected_rows:
+                self.persistent_selections.add(mod)
+            else:
                 self.persistent_selections.discard(mod)
+        self.update_selection_count()
         
-        # Filter mods
-        search_term = self.search_var.get().lower()
-        if not search_term:
-            filtered_mods = self.all_mods
-        else:
-            filtered_mods = [mod for mod in self.all_mods if search_term in mod.lower()]
-        
-        self.populate_mods(filtered_mods)
-        
-        # Re-select mods that should be selected
-        for i, mod in enumerate(filtered_mods):
-            if mod in self.persistent_selections:
-                self.mods_listbox.selection_set(i)
+    def on_resize(self, event):
+        rows = max(1, event.height // self.row_height)
+        if rows != self.rows:
+            self.rows = rows
+            self.render()
+            
+    def on_scroll(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self.filtered)))
+        elif args[0] == "scroll":
+            step = self.rows if args[2] == "pages" else 1
+            self.scroll_to(self.offset + int(args[1]) * step)
+            
+    def scroll_to(self, offset):
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+            
+    def schedule_filter(self, *args):
+        if self.filter_job is not None:
+            self.dialog.after_cancel(self.filter_job)
+        self.filter_job = self.dialog.after(self.FILTER_DELAY_MS, self.filter_mods)
         
-        self.update_selection_count()
+    def filter_mods(self, *args):
+        self.filter_job = None
+        self.filtered = self.mod_filter.filter(self.search_var.get(), self.contents_var.get())
+        self.hints = self.mod_filter.hints
+        self.offset = 0
+        self.render()
         
     def select_all(self):
-        self.mods_listbox.selection_set(0, tk.END)
+        self.persistent_selections.update(self.all_mods[i] for i in self.filtered)
+        self.render()
         self.update_selection_count()
         
     def select_none(self):
-        self.mods_listbox.selection_clear(0, tk.END)
+        self.persistent_selections.difference_update(self.all_mods[i] for i in self.filtered)
+        self.render()
         self.update_selection_count()
         
     def update_selection_count(self, event=None):
-        count = len(self.mods_listbox.curselection())
+        count = len(self.persistent_selections)
         self.count_label.config(text=f"{count} mods selected")
         
     def ok(self):
-        # Update persistent selections one final time
-        selected_indices = self.mods_listbox.curselection()
-        currently_selected = [self.mods_listbox.get(i) for i in selected_indices]
-        
-        # Update persistent selections
-        self.persistent_selections.update(currently_selected)
-        all_visible = [self.mods_listbox.get(i) for i in range(self.mods_listbox.size())]
-        for mod in all_visible:
-            if mod not in currently_selected:
-                self.persistent_selections.discard(mod)
-        
         self.selected_mods = list(self.persistent_selections)
         self.result = "ok"
         self.dialog.destroy()
@@ -271,17 +498,16 @@ def new_profile_enhanced(self):
         
     elif result["choice"] == "select":
         # Get available mods from mods folder
-        available_mods = []
-        if MODS_DIR.exists():
-            available_mods = [item.name for item in MODS_DIR.iterdir() 
-                            if item.is_dir() or item.is_file()]
+        available_mods = list_cached_mods()
         
         if not available_mods:
             messagebox.showinfo("No Mods", "No mods found in the mods folder. Add some mods first.")
             return
             
         # Show mod selection dialog
-        dialog = ModSelectionDialog(self.root, available_mods, f"Select Mods for '{profile_name}'")
+        dialog = ModSelectionDialog(self.root, available_mods, f"Select Mods for '{profile_name}'",
+                                    get_mod_index().mod_sizes(refresh=False, wait=False))
+        self.refresh_mod_sizes(dialog)
         result_action, selected_mods = dialog.show()
         
         if result_action == "ok":
@@ -294,17 +520,314 @@ def new_profile_enhanced(self):
                 f"Profile '{profile_name}' created with {len(selected_mods)} mod(s)."
             )
 
-if not INSTANCES_FILE.exists():
-    with open(INSTANCES_FILE, 'w') as f:
-        json.dump({}, f)
+class InstanceRegistry:
+    """instances.json held in memory.
+
+    Reads re-stat the file and only parse it again after an external edit.
+    Saves update memory at once and are written out together shortly after
+    (and at exit) through a temp file and rename, so a crash never leaves a
+    half-written file. If a delayed write fails, the changes stay pending and
+    the next load or save writes them again, raising OperationError if that
+    fails too.
+    """
+
+    def __init__(self, path=INSTANCES_FILE, write_delay=INSTANCES_WRITE_DELAY):
+        self.path = path
+        self.write_delay = write_delay
+        self.lock = threading.RLock()
+        self.data = {}
+        self.stamp = None
+        self.dirty = False
+        self.timer = None
+        self.write_error = None  # Why the last delayed write failed, until it is retried
+        self.generation = 0  # Bumped whenever data changes, so values derived from it can be cached
+
+    def file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def load(self):
+        with self.lock:
+            self.refresh()
+            return copy.deepcopy(self.data)
+
+    def refresh(self):
+        """Pick up external edits without copying the data; returns the generation"""
+        with self.lock:
+            self.retry_failed_write()
+            stamp = self.file_stamp()
+            if not self.dirty and stamp != self.stamp:
+                if stamp is None:
+                    self.data = {}
+                else:
+                    with open(self.path) as f:
+                        self.data = json.load(f)
+                self.stamp = stamp
+                self.generation += 1
+            return self.generation
+
+    def save(self, data):
+        with self.lock:
+            if data != self.data:
+                self.data = copy.deepcopy(data)
+                self.generation += 1
+                self.dirty = True
+                self.schedule_flush()
+            self.retry_failed_write()
+
+    def schedule_flush(self):
+        if self.timer is None:
+            self.timer = threading.Timer(self.write_delay, self.delayed_flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def update(self, name, **fields):
+        """Set fields of one instance in a single step, so concurrent operations don't undo each other's changes.
+
+        Nothing happens if the instance was removed in the meantime.
+        """
+        with self.lock:
+            data = self.load()
+            if name not in data:
+                return
+            data[name].update(fields)
+            self.save(data)
+
+    def flush(self):
+        """Write pending changes now"""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.dirty:
+                return
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(self.data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self.stamp = self.file_stamp()
+            self.dirty = False
+
+    def delayed_flush(self):
+        # Runs on the timer thread, where an exception would only be printed
+        try:
+            self.flush()
+        except OSError as e:
+            with self.lock:
+                self.write_error = e
+
+    def retry_failed_write(self):
+        with self.lock:
+            if self.write_error is None:
+                return
+            error, self.write_error = self.write_error, None
+            try:
+                self.flush()
+            except OSError as e:
+                self.schedule_flush()  # Try once more in the background; a failure is reported again
+                raise OperationError(f"Could not save {self.path.name}: {e} (first attempt: {error})") from e
+
+_instance_registry = None
+_instance_registry_lock = threading.Lock()
+
+def get_instance_registry():
+    """Return the shared instance registry; pending saves are flushed at exit"""
+    global _instance_registry
+    with _instance_registry_lock:
+        if _instance_registry is None:
+            _instance_registry = InstanceRegistry()
+            atexit.register(_instance_registry.flush)
+        return _instance_registry
 
 def load_instances():
-    with open(INSTANCES_FILE) as f:
-        return json.load(f)
+    return get_instance_registry().load()
 
 def save_instances(data):
-    with open(INSTANCES_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
+    get_instance_registry().save(data)
+
+def update_instance(instance, **fields):
+    get_instance_registry().update(instance, **fields)
+
+def load_settings():
+    settings = dict(DEFAULT_SETTINGS)
+    try:
+        with open(SETTINGS_FILE) as f:
+            settings.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+    return settings
+
+def save_settings(settings):
+    with open(SETTINGS_FILE, 'w') as f:
+        json.dump(settings, f, indent=2)
+
+class ProfileStore:
+    """Profiles cached in memory with a mod -> profiles reverse index, persisted to PROFILE_INDEX_FILE.
+
+    The per-profile JSON files stay the source of truth: every lookup re-stats
+    them and reloads only the ones whose mtime or size changed.
+    """
+
+    def __init__(self, index_file=PROFILE_INDEX_FILE):
+        self.index_file = index_file
+        self.lock = threading.RLock()
+        self.profiles = {}  # instance -> {profile: {"stamp": [mtime_ns, size], "mods": [...]}}
+        self.users = collections.defaultdict(set)  # mod name -> {(instance, profile)}
+        self.pins = collections.defaultdict(set)  # (mod name, version) -> {(instance, profile)}
+        self.errors = {}  # (instance, profile) -> why the file couldn't be read
+        try:
+            with open(index_file) as f:
+                saved = json.load(f)
+            for instance, profiles in saved["profiles"].items():
+                for profile, entry in profiles.items():
+                    self._set(instance, profile, entry["stamp"], entry["mods"])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            self.profiles.clear()
+            self.users.clear()
+            self.pins.clear()
+        self.dirty = False
+
+    def _set(self, instance, profile, stamp, mods):
+        self._drop(instance, profile)
+        self.profiles.setdefault(instance, {})[profile] = {"stamp": stamp, "mods": mods}
+        for entry in mods:
+            mod_name, version = parse_mod_ref(entry)
+            self.users[mod_name].add((instance, profile))
+            if version:
+                self.pins[(mod_name, version)].add((instance, profile))
+        self.dirty = True
+
+    def _drop(self, instance, profile):
+        cached = self.profiles.get(instance, {}).pop(profile, None)
+        if cached is None:
+            return
+        for entry in cached["mods"]:
+            mod_name, version = parse_mod_ref(entry)
+            for index, key in ((self.users, mod_name), (self.pins, (mod_name, version))):
+                if key in index:
+                    index[key].discard((instance, profile))
+                    if not index[key]:
+                        del index[key]
+        if not self.profiles[instance]:
+            del self.profiles[instance]
+        self.dirty = True
+
+    def _persist(self):
+        if not self.dirty:
+            return
+        data = {
+            "profiles": self.profiles,
+            "mods": {name: sorted(users) for name, users in sorted(self.users.items())},
+        }
+        tmp_path = self.index_file.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.index_file)
+        self.dirty = False
+
+    def refresh(self, instance):
+        """Reload the instance's profiles whose files changed since they were cached"""
+        with self.lock:
+            profile_path = PROFILES_DIR / instance
+            on_disk = {}
+            if profile_path.is_dir():
+                for entry in os.scandir(profile_path):
+                    if entry.name.endswith(".json") and entry.is_file():
+                        st = entry.stat()
+                        on_disk[entry.name[:-len(".json")]] = [st.st_mtime_ns, st.st_size]
+            for profile in set(self.profiles.get(instance, {})) - set(on_disk):
+                self._drop(instance, profile)
+                self.errors.pop((instance, profile), None)
+            for profile, stamp in on_disk.items():
+                cached = self.profiles.get(instance, {}).get(profile)
+                if cached and cached["stamp"] == stamp:
+                    continue
+                try:
+                    with open(profile_path / f"{profile}.json") as f:
+                        mods = json.load(f)
+                    if not isinstance(mods, list):
+                        raise ValueError("expected a list of mods")
+                except (OSError, ValueError) as e:
+                    # Not cached, so it is retried (and reported) on every refresh until fixed
+                    self._drop(instance, profile)
+                    self.errors[(instance, profile)] = str(e)
+                    continue
+                self.errors.pop((instance, profile), None)
+                self._set(instance, profile, stamp, mods)
+            self._persist()
+
+    def refresh_all(self):
+        """Refresh every known instance and forget the profiles of removed ones"""
+        with self.lock:
+            instances = set(list_instances())
+            for instance in set(self.profiles) - instances:
+                for profile in list(self.profiles[instance]):
+                    self._drop(instance, profile)
+            self.errors = {key: error for key, error in self.errors.items() if key[0] in instances}
+            for instance in instances:
+                self.refresh(instance)
+            self._persist()
+            return instances
+
+    def list_profiles(self, instance):
+        with self.lock:
+            self.refresh(instance)
+            return sorted(self.profiles.get(instance, {}))
+
+    def load(self, instance, profile):
+        """Return a profile's mod entries, or None if it doesn't exist"""
+        with self.lock:
+            self.refresh(instance)
+            cached = self.profiles.get(instance, {}).get(profile)
+            return list(cached["mods"]) if cached else None
+
+    def save(self, instance, profile, mods):
+        with self.lock:
+            profile_path = PROFILES_DIR / instance
+            profile_path.mkdir(exist_ok=True)
+            mods_sorted = sorted(mods, key=natural_sort_key)
+            profile_file = profile_path / f"{profile}.json"
+            tmp_path = profile_path / f"{profile}.json.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(mods_sorted, f, indent=2)
+            os.replace(tmp_path, profile_file)
+            st = profile_file.stat()
+            self._set(instance, profile, [st.st_mtime_ns, st.st_size], mods_sorted)
+            self._persist()
+
+    def delete(self, instance, profile):
+        with self.lock:
+            (PROFILES_DIR / instance / f"{profile}.json").unlink(missing_ok=True)
+            self._drop(instance, profile)
+            self._persist()
+
+    def profiles_using(self, mod_name):
+        """Return the sorted (instance, profile) pairs whose profiles include mod_name"""
+        with self.lock:
+            self.refresh_all()
+            return sorted(self.users.get(mod_name, ()))
+
+    def used_mods(self):
+        """Return (names of mods used by any profile, pinned (mod, version) pairs) across all instances"""
+        with self.lock:
+            self.refresh_all()
+            return set(self.users), set(self.pins)
+
+_profile_store = None
+_profile_store_lock = threading.Lock()
+
+def get_profile_store():
+    """Return the shared profile store, loading the saved profile index on first use"""
+    global _profile_store
+    with _profile_store_lock:
+        if _profile_store is None:
+            _profile_store = ProfileStore()
+        return _profile_store
 
 def list_instances():
     return list(load_instances().keys())
@@ -313,7 +836,7 @@ def list_profiles(instance):
     profile_path = PROFILES_DIR / instance
     profile_path.mkdir(exist_ok=True)
     # Only return profiles that actually exist as JSON files
-    profiles = sorted([p.stem for p in profile_path.glob("*.json")])
+    profiles = get_profile_store().list_profiles(instance)
     
     # Get the active profile and put it first if it exists
     instances = load_instances()
@@ -327,274 +850,3370 @@ def list_profiles(instance):
 def natural_sort_key(s):
     return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', s)]
 
-def confirm_and_remove_instance(instance):
-    if not instance:
-        return
-    if messagebox.askyesno("Confirm Deletion", f"Are you sure you want to remove instance '{instance}'?"):
-        data = load_instances()
-        data.pop(instance, None)
-        save_instances(data)
-        shutil.rmtree(PROFILES_DIR / instance, ignore_errors=True)
-        shutil.rmtree(Path(data.get(instance, {}).get("path", "")), ignore_errors=True)
-
-def confirm_and_remove_profile(instance, profile):
-    if not instance or not profile:
-        return
-    path = PROFILES_DIR / instance / f"{profile}.json"
-    if not path.exists():
+class OperationError(Exception):
+    """An operation could not go ahead; the message is meant for the user"""
+
+class OperationCancelled(Exception):
+    """Raised when the user cancels a running operation"""
+
+def check_cancelled(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise OperationCancelled("Operation cancelled")
+
+class Tracer:
+    """Timed spans of one operation, saved as Chrome trace events (chrome://tracing, ui.perfetto.dev).
+
+    Spans are "phase" (steps of the operation), "mod" (work on one mod) or "ui";
+    their args carry file counts, bytes and errors. Counters tally events too
+    frequent for spans of their own, such as read-only files that had to be chmod'ed.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter_ns()
+        self.created = datetime.now()
+        self.events = []
+        self.threads = {}
+        self.counters = collections.Counter()
+        self.lock = threading.Lock()
+
+    def add(self, name, category, start_ns, end_ns, args):
+        thread = threading.current_thread()
+        event = {"name": name, "cat": category, "ph": "X", "pid": os.getpid(), "tid": thread.ident,
+                 "ts": (start_ns - self.started) / 1000, "dur": (end_ns - start_ns) / 1000}
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.threads[thread.ident] = thread.name
+            self.events.append(event)
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def summary(self):
+        """One line on where the time went: the longest phases, the mods worked on and the counters"""
+        phases = collections.defaultdict(float)
+        mods = files = size = failed = 0
+        for event in self.events:
+            if event["cat"] == "phase":
+                phases[event["name"]] += event["dur"] / 1e6
+            elif event["cat"] == "mod":
+                args = event.get("args", {})
+                mods += 1
+                files += args.get("files", 0)
+                size += args.get("bytes", 0)
+                failed += "error" in args
+        parts = [", ".join(f"{name} {seconds:.2f}s" for name, seconds in
+                           sorted(phases.items(), key=lambda item: -item[1])[:4]) or "no phases"]
+        if mods:
+            parts.append(f"{mods} mod(s), {files} file(s), {format_size(size)}" + (f", {failed} failed" if failed else ""))
+        parts.extend(f"{count} {name.replace('_', ' ')}" for name, count in sorted(self.counters.items()))
+        return " | ".join(parts)
+
+    def export(self):
+        """Write the trace to TRACES_DIR and return its path"""
+        TRACES_DIR.mkdir(parents=True, exist_ok=True)
+        safe_name = re.sub(r"[^\w.-]+", "-", self.name).strip("-")
+        path = TRACES_DIR / f"{self.created:%Y%m%d-%H%M%S}-{safe_name}.json"
+        with self.lock:
+            metadata = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": ident, "args": {"name": name}}
+                        for ident, name in self.threads.items()]
+            trace = {"traceEvents": metadata + self.events, "displayTimeUnit": "ms",
+                     "otherData": {"operation": self.name, "created": self.created.isoformat(timespec="seconds"),
+                                   "counters": dict(self.counters)}}
+        with open(path, 'w') as f:
+            json.dump(trace, f)
+        return path
+
+class TraceSpan:
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = f"{exc_type.__name__}: {exc}"
+        self.tracer.add(self.name, self.category, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+    def set(self, **args):
+        self.args.update(args)
+
+class NoTraceSpan:
+    """Stands in for TraceSpan while nothing is being traced"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+NO_TRACE_SPAN = NoTraceSpan()
+_active_tracer = None  # Tracer of the operation being traced; operations run one at a time
+
+def trace_span(name, category="phase", **args):
+    """Time a with-block as a span of the traced operation; costs one global lookup when tracing is off"""
+    tracer = _active_tracer
+    if tracer is None:
+        return NO_TRACE_SPAN
+    return TraceSpan(tracer, name, category, args)
+
+def trace_count(name, amount=1):
+    tracer = _active_tracer
+    if tracer is not None:
+        tracer.count(name, amount)
+
+def run_traced(name, operation, status_callback, cancel_event=None):
+    """Run operation(status_callback, cancel_event), tracing it if -d or the trace setting asks for it.
+
+    The trace is saved to TRACES_DIR and its summary sent to status_callback
+    once the operation ends, however it ends.
+    """
+    global _active_tracer
+    if not (DEBUG_MODE or load_settings()["trace"]):
+        return operation(status_callback, cancel_event)
+    tracer = Tracer(name)
+    _active_tracer = tracer
+    try:
+        with TraceSpan(tracer, name, "operation", {}):
+            return operation(status_callback, cancel_event)
+    finally:
+        _active_tracer = None
+        try:
+            status_callback(f"{tracer.summary()} (trace: {tracer.export()})")
+        except OSError as e:
+            status_callback(f"{tracer.summary()} (trace not saved: {e})")
+
+class OperationJournal:
+    """Append-only record of a long operation (apply, update, cleanup) so it can be resumed after a crash.
+
+    The first line holds the operation, its parameters and the planned steps.
+    Each later line marks a step done or checkpoints a batch of files finished
+    for a step still in progress. The journal is deleted when the operation
+    ends in any way, so one left behind means the process died part way through.
+    """
+
+    def __init__(self, path, header):
+        self.path = path
+        self.header = header
+        self.done = {}  # step -> result
+        self.files = collections.defaultdict(set)  # step -> files checkpointed so far
+        self.pending = collections.defaultdict(list)  # step -> files not yet written out
+        self.lock = threading.Lock()
+        self.file = None
+
+    @property
+    def operation(self):
+        return self.header["operation"]
+
+    @property
+    def instance(self):
+        return self.header["instance"]
+
+    @property
+    def params(self):
+        return self.header["params"]
+
+    @staticmethod
+    def journal_path(operation, instance=None):
+        return JOURNALS_DIR / (f"{operation}-{instance}.jsonl" if instance else f"{operation}.jsonl")
+
+    @classmethod
+    def begin(cls, operation, instance, params, steps, resume=None):
+        """Start journaling an operation, or keep appending to the journal being resumed"""
+        if resume is not None:
+            resume.file = open(resume.path, 'a')
+            return resume
+        JOURNALS_DIR.mkdir(exist_ok=True)
+        header = {"operation": operation, "instance": instance, "params": params, "steps": steps,
+                  "started": datetime.now().isoformat(timespec="seconds")}
+        journal = cls(cls.journal_path(operation, instance), header)
+        journal.file = open(journal.path, 'w')
+        journal._write(header)
+        return journal
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            lines = f.read().splitlines()
+        journal = cls(path, json.loads(lines[0]))
+        for line in lines[1:]:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                break  # Torn last line from the crash
+            if "done" in event:
+                journal.done[event["done"]] = event.get("result")
+                journal.files.pop(event["done"], None)
+            elif "files" in event:
+                journal.files[event["step"]].update(event["files"])
+        return journal
+
+    def _write(self, event, sync=True):
+        self.file.write(json.dumps(event) + "\n")
+        self.file.flush()
+        if sync:
+            os.fsync(self.file.fileno())
+
+    def mark_done(self, step, result=None, sync=True):
+        """Record a finished step; sync=False skips the fsync for steps that are cheap to redo"""
+        with self.lock:
+            self.pending.pop(step, None)
+            self.files.pop(step, None)
+            self.done[step] = result
+            self._write({"done": step, "result": result}, sync)
+
+    def file_done(self, step, rel):
+        """Checkpoint one finished file of a step; files are written out in batches, so small steps only log being done"""
+        with self.lock:
+            batch = self.pending[step]
+            batch.append(rel)
+            if len(batch) >= JOURNAL_CHECKPOINT_FILES:
+                self.files[step].update(batch)
+                self._write({"step": step, "files": batch})
+                del self.pending[step]
+
+    def is_done(self, step):
+        return step in self.done
+
+    def result(self, step):
+        return self.done.get(step)
+
+    def files_done(self, step):
+        return set(self.files.get(step, ()))
+
+    def finish(self):
+        """Close and delete the journal: the operation is over"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.path.unlink(missing_ok=True)
+
+    def describe(self):
+        done = sum(1 for step in self.header["steps"] if step in self.done)
+        what = {
+            "apply": f"Applying profile '{self.params.get('profile')}' to {self.instance}",
+            "update": f"Updating profile '{self.params.get('profile')}' from {self.instance}",
+            "cleanup": "Cleaning up unused mods",
+        }.get(self.operation, self.operation)
+        return f"{what} (started {self.header['started']}, {done}/{len(self.header['steps'])} step(s) done)"
+
+def list_unfinished_journals():
+    """Return the journals of operations that were interrupted, dropping any that can't be read"""
+    journals = []
+    if JOURNALS_DIR.exists():
+        for path in sorted(JOURNALS_DIR.glob("*.jsonl")):
+            try:
+                journals.append(OperationJournal.load(path))
+            except (OSError, ValueError, IndexError, KeyError):
+                path.unlink(missing_ok=True)
+    return journals
+
+def journal_file_callback(journal, step, target):
+    """Return an on_file callback that checkpoints files deployed under target for a journal step"""
+    def on_file(dst):
+        rel = os.path.relpath(dst, target).replace(os.sep, "/")
+        journal.file_done(step, "" if rel == "." else rel)
+    return on_file
+
+def remove_file(path):
+    """Remove a single file or link, clearing the read-only flag if needed"""
+    try:
+        os.unlink(path)
+    except PermissionError:
+        trace_count("read_only_fixups")
+        unlink_read_only(path)
+
+class FileOperationEngine:
+    """Fans per-file copies and deletions out over a pool of worker threads.
+
+    Work for whole mods runs on a separate pool from the per-file work so a mod
+    waiting for its files never ties up the workers copying them.
+    """
+    def __init__(self, workers):
+        self.workers = max(1, int(workers))
+        self.file_pool = ThreadPoolExecutor(self.workers, thread_name_prefix="file-op")
+        self.mod_pool = ThreadPoolExecutor(self.workers, thread_name_prefix="mod-op")
+        self.local = threading.local()
+
+    def _file_task(self, func, args):
+        self.local.in_worker = True
+        try:
+            return func(*args)
+        finally:
+            self.local.in_worker = False
+
+    def run_files(self, func, items):
+        """Call func(*item) for every item in parallel, raising the first error once all have finished"""
+        items = list(items)
+        if self.workers == 1 or len(items) < 2 or getattr(self.local, "in_worker", False):
+            for item in items:
+                func(*item)
+            return
+        futures = [self.file_pool.submit(self._file_task, func, item) for item in items]
+        errors = [future.exception() for future in futures]
+        first_error = next((error for error in errors if error), None)
+        if first_error:
+            raise first_error
+
+    def run_per_mod(self, func, mod_names, cancel_event=None):
+        """Run func(mod_name) for each mod concurrently, yielding (mod_name, result, error) as they finish.
+
+        Once cancel_event is set, mods that haven't started yet finish with OperationCancelled.
+        """
+        def run_mod(name):
+            check_cancelled(cancel_event)
+            return func(name)
+
+        futures = {self.mod_pool.submit(run_mod, name): name for name in mod_names}
+        for future in as_completed(futures):
+            error = future.exception()
+            yield futures[future], (None if error else future.result()), error
+
+    def copy_tree(self, src, dst, copy_file=None, on_file=None):
+        """Recreate src's folders under dst and copy its files in parallel with copy_file(src, dst).
+
+        copy_file defaults to fast_copy_file, in which case the folders' times are copied too.
+        on_file(dst file) is called after each file is copied.
+        """
+        copies = copy_file is None
+        copy_file = copy_file or fast_copy_file
+        dirs = []
+        files = []
+        for dirpath, dirnames, filenames in os.walk(src):
+            target_dir = Path(dst) / os.path.relpath(dirpath, src)
+            target_dir.mkdir(parents=True, exist_ok=True)
+            dirs.append((dirpath, target_dir))
+            files.extend((os.path.join(dirpath, name), target_dir / name) for name in filenames)
+        if on_file is not None:
+            def copy_and_report(file_src, file_dst):
+                copy_file(file_src, file_dst)
+                on_file(file_dst)
+            self.run_files(copy_and_report, files)
+        else:
+            self.run_files(copy_file, files)
+        if copies:
+            for src_dir, target_dir in reversed(dirs):
+                shutil.copystat(src_dir, target_dir)
+
+    def remove_tree(self, path):
+        """Delete a folder, removing its files in parallel and then the emptied folders bottom-up"""
+        dirs = []
+        files = []
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirs.append(dirpath)
+            files.extend(os.path.join(dirpath, name) for name in filenames)
+            # Links to folders are removed as links, never walked into
+            for name in list(dirnames):
+                if is_link(Path(dirpath) / name):
+                    dirnames.remove(name)
+                    files.append(os.path.join(dirpath, name))
+        self.run_files(remove_link_or_file, ((f,) for f in files))
+        for dirpath in reversed(dirs):
+            try:
+                os.rmdir(dirpath)
+            except PermissionError:
+                trace_count("read_only_fixups")
+                os.chmod(dirpath, 0o777)
+                os.rmdir(dirpath)
+
+def remove_link_or_file(path):
+    if os.name == 'nt' and os.path.isdir(path):
+        os.rmdir(path)
+    else:
+        remove_file(path)
+
+_file_engine = None
+_file_engine_lock = threading.Lock()
+
+def get_file_engine():
+    """Return the shared file operation engine, sized by the file_workers setting when first used"""
+    global _file_engine
+    with _file_engine_lock:
+        if _file_engine is None:
+            _file_engine = FileOperationEngine(load_settings()["file_workers"])
+        return _file_engine
+
+def reload_file_engine():
+    """Resize the file engine if the file_workers setting changed; operations call this as they start.
+
+    The engine of the old size isn't shut down, as an operation still running
+    may be submitting to it; its idle threads exit once nothing refers to it.
+    """
+    global _file_engine
+    workers = max(1, int(load_settings()["file_workers"]))
+    with _file_engine_lock:
+        if _file_engine is None or _file_engine.workers != workers:
+            _file_engine = FileOperationEngine(workers)
+
+def lower_thread_priority():
+    """Make the calling thread (and the threads it starts) yield the CPU to everything else, where supported"""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except (AttributeError, OSError):
+        pass
+
+class TrashReaper:
+    """Deletes folders in the background after safe_remove_item has renamed them into a trash folder.
+
+    A rename is instant however big the folder, so removals on the apply and
+    cleanup paths don't wait for the files to go. Whatever is still in a trash
+    folder when the app exits is deleted after the next start (see resume()).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.roots = set()  # Folders whose TRASH_NAME folder has something to delete
+        self.known_roots = (None, [])  # (instance registry generation, BASE_DIR and instance folders deepest first)
+        self.status_callback = None  # Where deletes that failed are reported
+        self.wake = threading.Event()
+        self.idle = threading.Event()
+        self.idle.set()
+        self.counter = itertools.count()
+        self.thread = None
+        self.engine = None
+
+    def trash_roots(self):
+        """Return BASE_DIR and the instance folders, deepest first; only worked out again after instances change"""
+        registry = get_instance_registry()
+        generation = registry.refresh()
+        known_generation, roots = self.known_roots
+        if generation != known_generation:
+            paths = [BASE_DIR] + [Path(data["path"]) for data in registry.load().values() if data.get("path")]
+            roots = sorted({Path(os.path.abspath(path)) for path in paths}, key=lambda r: len(r.parts), reverse=True)
+            self.known_roots = (generation, roots)
+        return roots
+
+    def trash_root(self, path):
+        """Return the folder whose trash path can be renamed into (None if there is none)"""
+        path = Path(os.path.abspath(path))
+        for root in self.trash_roots():
+            if root in path.parents and root / TRASH_NAME not in (path, *path.parents):
+                return root
+        return None
+
+    def discard(self, path):
+        """Move path into its trash folder for deleting later; returns False if it has to be deleted now"""
+        root = self.trash_root(path)
+        if root is None:
+            return False
+        trash = root / TRASH_NAME
+        try:
+            trash.mkdir(exist_ok=True)
+            # Different drive (mount points inside the root), open files on Windows, ...
+            os.rename(path, trash / f"{time.time_ns()}-{next(self.counter)}-{path.name}")
+        except OSError:
+            return False
+        trace_count("folders_trashed")
+        self._wake(root)
+        return True
+
+    def resume(self, status_callback=None):
+        """Carry on emptying the trash folders a previous run left behind.
+
+        Deletes that fail are reported to status_callback (kept for later
+        passes); the entries stay in the trash for the next start.
+        """
+        if status_callback is not None:
+            self.status_callback = status_callback
+        for root in self.trash_roots():
+            if (root / TRASH_NAME).is_dir():
+                self._wake(root)
+
+    def drain(self, timeout=None):
+        """Wait until the trash is empty; returns False if the timeout ran out first"""
+        return self.idle.wait(timeout)
+
+    def _wake(self, root):
+        with self.lock:
+            self.roots.add(root)
+            self.idle.clear()
+            self.wake.set()
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="trash-reaper", daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        lower_thread_priority()
+        # Its own small pool, so deleting never holds up the workers of a running operation
+        self.engine = FileOperationEngine(TRASH_WORKERS)
+        while True:
+            self.wake.wait()
+            with self.lock:
+                self.wake.clear()
+                roots = list(self.roots)
+            for root in roots:
+                self._empty(root / TRASH_NAME)
+            with self.lock:
+                if not self.wake.is_set():
+                    self.idle.set()
+
+    def _empty(self, trash):
+        try:
+            entries = list(os.scandir(trash))
+        except OSError:
+            return
+        failed = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    self.engine.remove_tree(entry.path)
+                else:
+                    remove_file(entry.path)
+            except OSError as e:
+                # Left for the next pass or the next start
+                failed.append((entry.name, e))
+        if failed and self.status_callback is not None:
+            name, e = failed[0]
+            self.status_callback(f"Warning: Could not empty {trash}: {len(failed)} item(s) left for the next start "
+                                 f"({name}: {e})")
+        try:
+            trash.rmdir()
+        except OSError:
+            pass
+
+_trash_reaper = None
+_trash_reaper_lock = threading.Lock()
+
+def get_trash_reaper():
+    global _trash_reaper
+    with _trash_reaper_lock:
+        if _trash_reaper is None:
+            _trash_reaper = TrashReaper()
+        return _trash_reaper
+
+class FolderWatcher:
+    """Follows changes to the mods folder and the GameData folders as they happen, so checks needn't rescan.
+
+    On Linux every folder of a watched tree gets an inotify watch. Elsewhere, or
+    once the inotify watch limit is used up, folder mtimes are polled every
+    WATCH_POLL_SECONDS instead, which notices entries being added, removed or
+    renamed but not files edited in place. Every change bumps a sequence number:
+    take a checkpoint() and later ask changes_since() which top-level entries
+    (mods) of a tree changed after it. Hidden top-level entries (the object
+    store, trash) are not followed; changes in the PluginData folders mods
+    write to while KSP runs are kept apart from the others.
+
+    Trees are walked without holding the lock, which is only taken to swap in
+    what a walk found, so queries never wait for a big GameData to be read.
+    New folders and trees to start over are walked by the watcher thread.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.seq = 0
+        # root -> {"entries": top-level names, "changed"/"runtime": {name: seq} outside/inside PluginData,
+        #          "since": seq tracked from, "polled": {folder: mtime} when polling instead of inotify,
+        #          "lost": root was moved away}
+        self.roots = {}
+        self.watches = {}  # inotify watch descriptor -> (root, folder relative to it)
+        self.synced = {}  # instance -> (checkpoint of its last apply or update, mods then matching the mods folder)
+        self.pending = []  # (root, folder) of new folders to walk and watch
+        self.restarts = set()  # Roots to start over: back after being moved away, or after an overflow
+        self.started = 0
+        self.libc = None
+        self.fd = self._init_inotify()
+        self.thread = threading.Thread(target=self._run, name="folder-watcher", daemon=True)
+        self.thread.start()
+
+    def _init_inotify(self):
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            self.libc = ctypes.CDLL(None, use_errno=True)
+            fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        return fd if fd >= 0 else None
+
+    def watch(self, root):
+        """Start (or start over) following the tree at root"""
+        self._start(Path(root))
+
+    def unwatch(self, root):
+        with self.lock:
+            self._forget(Path(root))
+            self.roots.pop(Path(root), None)
+
+    def watched(self):
+        with self.lock:
+            return list(self.roots)
+
+    def checkpoint(self):
+        """Take in what has happened so far and return a mark for changes_since()"""
+        with self.lock:
+            self._drain()
+            return self.seq
+
+    def entries(self, root):
+        """Return the top-level names in a watched tree (None if it isn't watched or doesn't exist)"""
+        with self.lock:
+            self._drain()
+            state = self.roots.get(Path(root))
+            if state is None or state["lost"]:
+                return None
+            return set(state["entries"])
+
+    def changes_since(self, root, mark, content=True, runtime=True):
+        """Return the top-level names in a watched tree that changed after mark (with runtime, in PluginData too).
+
+        Returns None when that can't be known: the tree isn't watched, wasn't
+        followed all the time since mark (overflow, moved away) or, with
+        content, is polled and so can miss files edited in place.
+        """
+        with self.lock:
+            self._drain()
+            state = self.roots.get(Path(root))
+            if state is None or state["lost"] or state["since"] > mark or (content and state["polled"] is not None):
+                return None
+            changes = {name for name, seq in state["changed"].items() if seq > mark}
+            if runtime:
+                changes.update(name for name, seq in state["runtime"].items() if seq > mark)
+            return changes
+
+    def _start(self, root, restart=False):
+        """Walk the tree at root, then swap in a new state for it"""
+        stamps = self._poll_stamps(root) if root.is_dir() else None
+        entries = self._list(root)
+        with self.lock:
+            if restart and root not in self.roots:
+                return  # Unwatched in the meantime
+            self._forget(root)
+            self.seq += 1
+            state = {"entries": entries, "changed": {}, "runtime": {}, "since": self.seq, "polled": None,
+                     "lost": stamps is None}
+            self.roots[root] = state
+            if stamps is None:
+                return
+            if not self._add_watches(root, stamps):
+                # No inotify, or no watches left for a tree this big
+                self._forget(root)
+                state["polled"] = stamps
+                return
+        self._recheck(root, stamps)
+
+    def _forget(self, root):
+        for wd, (watch_root, _) in list(self.watches.items()):
+            if watch_root == root:
+                del self.watches[wd]
+                self.libc.inotify_rm_watch(self.fd, wd)
+
+    @staticmethod
+    def _list(root):
+        try:
+            return {entry.name for entry in os.scandir(root) if not entry.name.startswith(".")}
+        except OSError:
+            return set()
+
+    @staticmethod
+    def _walk(root, rel=""):
+        """Yield the folders of a tree (relative to root) that are followed"""
+        top = root / rel if rel else root
+        for dirpath, dirnames, _ in os.walk(top):
+            folder = os.path.relpath(dirpath, root).replace(os.sep, "/")
+            folder = "" if folder == "." else folder
+            if folder == "":
+                dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+            yield folder
+
+    def _add_watches(self, root, folders):
+        if self.fd is None:
+            return False
+        for folder in folders:
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(root / folder if folder else root), WATCH_EVENTS)
+            if wd < 0:
+                if ctypes.get_errno() == errno.ENOSPC:
+                    return False
+                continue  # Gone again already
+            self.watches[wd] = (root, folder)
+        return True
+
+    def _recheck(self, root, stamps):
+        """Catch up with the folders of a walk that changed before their watches were added.
+
+        Subfolders they gained since have no watch yet, so they are queued like
+        new folders; the folders themselves count as changed.
+        """
+        changed, new = [], []
+        for folder, mtime in stamps.items():
+            path = root / folder if folder else root
+            try:
+                if os.stat(path).st_mtime_ns == mtime:
+                    continue
+                names = [entry.name for entry in os.scandir(path) if entry.is_dir(follow_symlinks=False)]
+            except OSError:
+                continue
+            changed.append(folder)
+            new.extend(rel for rel in (f"{folder}/{name}" if folder else name for name in names)
+                       if rel not in stamps and not rel.startswith("."))
+        if not changed:
+            return
+        entries = self._list(root) if "" in changed else None
+        with self.lock:
+            state = self.roots.get(root)
+            if state is None or state["lost"] or state["polled"] is not None:
+                return
+            self.pending.extend((root, rel) for rel in new)
+            if entries is not None:
+                changed.remove("")
+                changed.extend(entries ^ state["entries"])
+                state["entries"] = entries
+            for folder in changed:
+                self._changed(state, folder)
+
+    def _watch_pending(self):
+        """Walk the folders that appeared since the last pass and watch them"""
+        with self.lock:
+            pending, self.pending = self.pending, []
+        for root, rel in pending:
+            stamps = self._poll_stamps(root, rel)
+            with self.lock:
+                state = self.roots.get(root)
+                if state is None or state["lost"] or state["polled"] is not None:
+                    continue
+                if not self._add_watches(root, stamps):
+                    # Out of watches: start over, polling this time
+                    self._forget(root)
+                    state["lost"] = True
+                    continue
+                # Whatever happened in it before now went unseen
+                self._changed(state, rel)
+            self._recheck(root, stamps)
+
+    def _drop_tree(self, root, rel):
+        for wd, (watch_root, folder) in list(self.watches.items()):
+            if watch_root == root and (folder == rel or folder.startswith(rel + "/")):
+                del self.watches[wd]
+                self.libc.inotify_rm_watch(self.fd, wd)
+
+    def _changed(self, state, rel):
+        parts = rel.split("/")
+        self.seq += 1
+        state["runtime" if RUNTIME_DATA_FOLDER in parts[1:] else "changed"][parts[0]] = self.seq
+
+    def _drain(self):
+        if self.fd is not None:
+            while True:
+                try:
+                    data = os.read(self.fd, 64 * 1024)
+                except (BlockingIOError, InterruptedError):
+                    break
+                offset = 0
+                while offset < len(data):
+                    wd, mask, _, length = struct.unpack_from("iIII", data, offset)
+                    name = data[offset + 16:offset + 16 + length].split(b"\0", 1)[0]
+                    offset += 16 + length
+                    self._handle(wd, mask, os.fsdecode(name))
+        for root, state in self.roots.items():
+            if state["lost"] and root.is_dir():
+                # Swapped for a new tree (staged apply, rollback) or created again
+                self.restarts.add(root)
+
+    def _handle(self, wd, mask, name):
+        if mask & IN_Q_OVERFLOW:
+            # Events were dropped: start every tree over, so earlier marks count as unknown
+            for state in self.roots.values():
+                state["lost"] = True
+            return
+        target = self.watches.get(wd)
+        if target is None:
+            return
+        root, folder = target
+        if mask & IN_IGNORED:
+            del self.watches[wd]
+            return
+        state = self.roots[root]
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            if folder == "":
+                state["lost"] = True
+                self._forget(root)
+            return
+        rel = f"{folder}/{name}" if folder else name
+        if rel.startswith("."):
+            return
+        if mask & IN_ISDIR:
+            if mask & IN_MOVED_FROM:
+                self._drop_tree(root, rel)
+            elif mask & (IN_CREATE | IN_MOVED_TO) and state["polled"] is None:
+                self.pending.append((root, rel))
+        if folder == "":
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                state["entries"].add(name)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                state["entries"].discard(name)
+        self._changed(state, rel)
+
+    def _poll_stamps(self, root, rel=""):
+        """Return {folder: mtime} for the followed folders of a tree (or of its subtree at rel)"""
+        stamps = {}
+        try:
+            for folder in self._walk(root, rel):
+                stamps[folder] = os.stat(root / folder if folder else root).st_mtime_ns
+        except OSError:
+            pass
+        return stamps
+
+    def _poll(self, root, state, old):
+        stamps = self._poll_stamps(root)
+        entries = self._list(root)
+        with self.lock:
+            if self.roots.get(root) is not state or state["polled"] is not old:
+                return  # Started over in the meantime
+            changed = old.keys() ^ stamps.keys()
+            changed.update(folder for folder, mtime in stamps.items() if old.get(folder, mtime) != mtime)
+            if "" in changed:
+                changed.discard("")
+                changed.update(entries ^ state["entries"])
+                state["entries"] = entries
+            state["polled"] = stamps
+            for folder in changed:
+                self._changed(state, folder)
+
+    def _run(self):
+        lower_thread_priority()
+        polled = time.monotonic()
+        while True:
+            if self.fd is not None:
+                select.select([self.fd], [], [], WATCH_POLL_SECONDS)
+            else:
+                time.sleep(WATCH_POLL_SECONDS)
+            to_poll = []
+            with self.lock:
+                self._drain()
+                restarts, self.restarts = self.restarts, set()
+                if time.monotonic() - polled >= WATCH_POLL_SECONDS:
+                    polled = time.monotonic()
+                    to_poll = [(root, state, state["polled"]) for root, state in self.roots.items()
+                               if state["polled"] is not None and not state["lost"]]
+            # The walks happen outside the lock
+            for root in restarts:
+                self._start(root, restart=True)
+            self._watch_pending()
+            for root, state, old in to_poll:
+                self._poll(root, state, old)
+
+_folder_watcher = None
+
+def start_folder_watcher():
+    """Start following the mods folder and the GameData of every instance (the GUI does, with the watch setting)"""
+    global _folder_watcher
+    if _folder_watcher is None:
+        _folder_watcher = FolderWatcher()
+        watch_instances()
+        _folder_watcher.started = _folder_watcher.checkpoint()
+    return _folder_watcher
+
+def get_folder_watcher():
+    """Return the running folder watcher, or None if it wasn't started"""
+    return _folder_watcher
+
+def watch_instances():
+    """Make the folder watcher follow the GameData of the current instances"""
+    watcher = _folder_watcher
+    if watcher is None:
         return
-    if messagebox.askyesno("Confirm Deletion", f"Are you sure you want to delete profile '{profile}'?"):
-        path.unlink()
+    roots = {MODS_DIR} | {Path(data["path"]) / "GameData" for data in load_instances().values() if data.get("path")}
+    watched = set(watcher.watched())
+    for root in watched - roots:
+        watcher.unwatch(root)
+    for root in roots - watched:
+        watcher.watch(root)
+
+def mark_gamedata_synced(instance, in_sync=()):
+    """Note that an instance's GameData is as the manager left it as of now; in_sync are the mods that
+    match their copy in the mods folder"""
+    watcher = _folder_watcher
+    if watcher is not None:
+        watcher.synced[instance] = (watcher.checkpoint(), set(in_sync))
+
+def gamedata_drift(instance):
+    """Return how an instance's GameData has moved away from its active profile, going by the folder watcher.
+
+    Returns None when the watcher isn't running or there's no active profile.
+    Otherwise {"profile", "added", "removed", "changed"}: folders that aren't in
+    the profile, deployed mods of the profile that are gone, and its mods
+    changed since the last apply or update (or since the watcher started).
+    """
+    watcher = _folder_watcher
+    data = load_instances().get(instance)
+    if watcher is None or not data or not data.get("path") or not data.get("active_profile"):
+        return None
+    instance_gamedata = Path(data["path"]) / "GameData"
+    entries = watcher.entries(instance_gamedata)
+    if entries is None:
+        return None
+    profile = {parse_mod_ref(entry)[0] for entry in get_profile_store().load(instance, data["active_profile"]) or []}
+    deployed = deployed_mod_names(instance)
+    entries -= set(STOCK_FOLDERS) | set(MM_CACHE_FILES)
+    mark = watcher.synced.get(instance, (watcher.started, None))[0]
+    changed = watcher.changes_since(instance_gamedata, mark, content=False, runtime=False) or set()
+    return {
+        "profile": data["active_profile"],
+        "added": sorted(entries - profile - deployed, key=natural_sort_key),
+        "removed": sorted((profile & deployed) - entries, key=natural_sort_key),
+        "changed": sorted(changed & profile & entries, key=natural_sort_key),
+    }
+
+def describe_drift(drift):
+    """Summarise gamedata_drift() for the main window ("" when GameData is as the profile left it)"""
+    if not drift or not (drift["added"] or drift["removed"] or drift["changed"]):
+        return ""
+    counts = ", ".join(f"{len(drift[key])} {key}" for key in ("added", "changed", "removed") if drift[key])
+    return (f"GameData has changed since '{drift['profile']}' was applied ({counts}). "
+            "Update Profile keeps the changes, applying a profile discards them.")
+
+def untouched_mods(instance, instance_gamedata):
+    """Return the mods of an instance's GameData that matched the mods folder at the last apply or update
+    and that the folder watcher saw unchanged since, on both sides; update_profile needn't compare those.
+
+    Empty when the watcher can't vouch for it (not running, polling, or no
+    apply or update since it started).
+    """
+    watcher = _folder_watcher
+    mark, in_sync = watcher.synced.get(instance, (None, None)) if watcher is not None else (None, None)
+    if mark is None:
+        return set()
+    in_gamedata = watcher.changes_since(instance_gamedata, mark)
+    in_mods = watcher.changes_since(MODS_DIR, mark)
+    if in_gamedata is None or in_mods is None:
+        return set()
+    return in_sync - in_gamedata - in_mods
+
+def is_link(path):
+    """Return True for symlinks and, on Windows, directory junctions"""
+    if path.is_symlink():
+        return True
+    if os.name == 'nt':
+        try:
+            return os.lstat(path).st_reparse_tag == stat.IO_REPARSE_TAG_MOUNT_POINT
+        except (OSError, AttributeError):
+            return False
+    return False
 
 def safe_remove_item(item_path):
     """Safely remove a file or directory, handling various edge cases"""
     try:
-        if item_path.is_symlink():
-            item_path.unlink()
+        if is_link(item_path):
+            # Only remove the link itself, never the mod it points to
+            if os.name == 'nt' and item_path.is_dir():
+                os.rmdir(item_path)
+            else:
+                item_path.unlink()
         elif item_path.is_dir():
-            # For directories, use shutil.rmtree with error handling
-            def handle_remove_readonly(func, path, exc):
-                if os.path.exists(path):
-                    os.chmod(path, 0o777)
-                    func(path)
-            shutil.rmtree(item_path, onerror=handle_remove_readonly)
+            # Folders go to the trash to be deleted in the background; where they can't, the
+            # files are deleted in parallel right away
+            if not get_trash_reaper().discard(item_path):
+                get_file_engine().remove_tree(item_path)
         elif item_path.is_file():
-            # Handle read-only files
-            if not os.access(item_path, os.W_OK):
-                os.chmod(item_path, 0o777)
-            item_path.unlink()
+            # Read-only files only need their flag cleared where deleting needs it (Windows)
+            remove_file(item_path)
     except Exception as e:
         raise Exception(f"Failed to remove {item_path}: {e}")
 
-def safe_copy_item(src, dst):
+def unlink_read_only(path):
+    """Delete a file that can't be deleted while it is read-only (Windows).
+
+    The flag belongs to the file rather than the name, so clearing it on a link
+    to a store object makes the object writable too; the object is made
+    read-only again once the link is gone.
+    """
+    st = os.lstat(path)
+    obj = linked_object(path, st)
+    os.chmod(path, stat.S_IMODE(st.st_mode) | stat.S_IWUSR)
+    os.unlink(path)
+    if obj is not None and os.path.exists(obj):
+        protect_object(obj)
+
+_libc = None
+
+def preallocate(fd, size):
+    """Reserve size bytes for a file being written so it is laid out in one piece, where the filesystem can"""
+    global _libc
+    try:
+        if _libc is None:
+            _libc = ctypes.CDLL(None, use_errno=True)
+            _libc.fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+        # Not os.posix_fallocate: glibc emulates it by writing to every block where it isn't supported
+        _libc.fallocate(fd, 0, 0, size)
+    except (OSError, AttributeError):
+        pass
+
+def kernel_copy(infd, outfd, size):
+    """Copy size bytes between file descriptors without them passing through Python; returns the bytes copied.
+
+    copy_file_range can share extents or copy server-side; sendfile covers
+    kernels and filesystem pairs that don't support it. Returns None if sendfile
+    fails before copying anything (like shutil, for files it can't handle), so
+    the caller can copy the data itself.
+    """
+    use_range = hasattr(os, "copy_file_range")
+    offset = 0
+    while offset < size:
+        count = min(COPY_CHUNK_SIZE, size - offset)
+        if use_range:
+            try:
+                copied = os.copy_file_range(infd, outfd, count, offset, offset)
+            except OSError as e:
+                if offset or e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.EINVAL):
+                    raise
+                use_range = False
+                continue
+        else:
+            try:
+                copied = os.sendfile(outfd, infd, offset, count)
+            except OSError as e:
+                if offset or e.errno in (errno.ENOSPC, errno.EDQUOT):
+                    raise
+                return None
+        if not copied:
+            break  # The source shrank while being copied
+        offset += copied
+    return offset
+
+def fast_copy_file(src, dst):
+    """Copy a file with its permission bits and times, like shutil.copy2 but with the data copied in the kernel.
+
+    The destination is preallocated and its mode and times are set through the
+    open descriptor instead of by path (extended attributes aren't copied).
+    Copies are always writable by their owner, even of read-only store objects.
+    Falls back to shutil.copy2 off Linux and for anything but regular files.
+    """
+    if not KERNEL_COPY or not os.path.isfile(src):
+        shutil.copy2(src, dst)
+        make_writable(dst)
+        return dst
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        infd, outfd = fsrc.fileno(), fdst.fileno()
+        st = os.fstat(infd)
+        if st.st_size >= PREALLOCATE_MIN_SIZE:
+            preallocate(outfd, st.st_size)
+        copied = kernel_copy(infd, outfd, st.st_size)
+        if copied is None:
+            shutil.copyfileobj(fsrc, fdst, COPY_CHUNK_SIZE)
+            fdst.flush()
+            copied = fdst.tell()
+        if copied < st.st_size:
+            os.ftruncate(outfd, copied)
+        os.fchmod(outfd, stat.S_IMODE(st.st_mode) | stat.S_IWUSR)
+        os.utime(outfd, ns=(st.st_atime_ns, st.st_mtime_ns))
+    return dst
+
+def make_writable(path):
+    """Give a file its owner's write permission back (copies of read-only store objects)"""
+    mode = stat.S_IMODE(os.stat(path).st_mode)
+    if not mode & stat.S_IWUSR:
+        os.chmod(path, mode | stat.S_IWUSR)
+
+def is_mutable_file(path):
+    """Return True for files mods may rewrite while KSP runs: anything in PluginData and settings-type files"""
+    path = str(path).replace(os.sep, "/")
+    return (f"/{RUNTIME_DATA_FOLDER}/" in f"/{path}"
+            or os.path.splitext(path)[1].lower() in MUTABLE_FILE_EXTENSIONS)
+
+def safe_copy_item(src, dst, on_file=None):
     """Safely copy a file or directory with comprehensive error handling"""
     try:
         # Ensure destination parent directory exists
         dst.parent.mkdir(parents=True, exist_ok=True)
         
         # Remove destination if it exists
-        if dst.exists():
+        if dst.exists() or is_link(dst):
             safe_remove_item(dst)
         
         if src.is_dir():
-            shutil.copytree(src, dst, dirs_exist_ok=True)
+            get_file_engine().copy_tree(src, dst, on_file=on_file)
         else:
-            shutil.copy2(src, dst)
+            fast_copy_file(src, dst)
             
     except Exception as e:
         raise Exception(f"Failed to copy {src} to {dst}: {e}")
 
-def apply_profile(instance, profile_name, status_callback):
-    instances = load_instances()
-    instance_path = Path(instances[instance]['path'])
-    instance_gamedata = instance_path / "GameData"
-    profile_file = PROFILES_DIR / instance / f"{profile_name}.json"
+def reflink_file(src, dst):
+    """Clone a file with copy-on-write where the filesystem supports it"""
+    if sys.platform.startswith("linux"):
+        import fcntl
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    elif sys.platform == "darwin":
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(src))
+    else:
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported on this platform", str(src))
+    shutil.copystat(src, dst)
+    make_writable(dst)
 
-    if not profile_file.exists():
-        messagebox.showerror("Error", f"Profile file not found: {profile_file}")
-        return
+def link_folder(src, dst):
+    """Symlink a mod into GameData, using a junction on Windows when symlinks aren't allowed"""
+    try:
+        os.symlink(src, dst, target_is_directory=src.is_dir())
+    except OSError:
+        if os.name != 'nt' or not src.is_dir():
+            raise
+        import _winapi
+        _winapi.CreateJunction(str(src), str(dst))
 
-    # Ensure GameData directory exists
-    if not instance_gamedata.exists():
-        messagebox.showerror("Error", f"GameData folder not found: {instance_gamedata}")
-        return
+def is_linked_to(target, src):
+    """Return True if target is a symlink or junction pointing at src"""
+    return is_link(target) and os.path.realpath(target) == os.path.realpath(src)
 
-    with open(profile_file) as f:
-        mods_to_apply = json.load(f)
+def shares_inode(path, other):
+    """Return True if path is a hardlink of other (checked only when path has more than one link)"""
+    try:
+        st = os.stat(path)
+        return st.st_nlink > 1 and os.path.samefile(path, other)
+    except OSError:
+        return False
+
+def deploy_item(src, dst, mode, on_file=None):
+    """Deploy a cached mod into GameData and return the mode that was actually used.
+
+    If a link can't be made (different drives, unsupported filesystem, missing
+    privileges) the whole mod falls back to a plain copy.
+    """
+    if mode != "copy":
+        try:
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            if dst.exists() or is_link(dst):
+                safe_remove_item(dst)
+            if mode == "symlink":
+                link_folder(src, dst)
+            else:
+                link = link_immutable if mode == "hardlink" else reflink_file
+                if src.is_dir():
+                    get_file_engine().copy_tree(src, dst, copy_file=link, on_file=on_file)
+                else:
+                    link(src, dst)
+            return mode
+        except OSError:
+            pass
+    safe_copy_item(src, dst, on_file)
+    return "copy"
+
+def deploy_file(src, dst, mode):
+    """Deploy a single file of a mod, falling back to a copy if it can't be linked"""
+    if mode in ("hardlink", "reflink"):
+        try:
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            if dst.exists() or is_link(dst):
+                safe_remove_item(dst)
+            if mode == "hardlink":
+                link_immutable(src, dst)
+            else:
+                reflink_file(src, dst)
+            return
+        except OSError:
+            pass
+    safe_copy_item(src, dst)
+
+def link_immutable(src, dst):
+    """Hardlink a mod file into GameData; files KSP may rewrite are copied so writes stay in GameData"""
+    if is_mutable_file(dst):
+        fast_copy_file(src, dst)
+    else:
+        os.link(src, dst)
+
+def link_or_copy(src, dst):
+    """Hardlink src to dst, copying instead where hardlinks aren't possible"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        fast_copy_file(src, dst)
+
+def clone_item(src, dst):
+    """Recreate a GameData entry at dst sharing its files with src; links are recreated as links"""
+    if is_link(src):
+        link_folder(Path(os.path.realpath(src)), dst)
+    elif src.is_dir():
+        get_file_engine().copy_tree(src, dst, copy_file=clone_file)
+    else:
+        clone_file(src, dst)
+
+def clone_file(src, dst):
+    """Hardlink a file into a staged GameData; files KSP may rewrite are copied, so writing to them
+    later doesn't also change the GameData kept for rollback"""
+    if is_mutable_file(src):
+        fast_copy_file(src, dst)
+    else:
+        link_or_copy(src, dst)
+
+def swap_gamedata(instance_path):
+    """Rename GameData.staging into place, keeping the replaced GameData as GameData.previous"""
+    instance_gamedata = instance_path / "GameData"
+    staging = instance_path / STAGED_GAMEDATA_NAME
+    previous = instance_path / PREVIOUS_GAMEDATA_NAME
+    stale = instance_path / f"{PREVIOUS_GAMEDATA_NAME}.old"
+    if stale.exists() or is_link(stale):
+        safe_remove_item(stale)
+    had_previous = previous.exists() or is_link(previous)
+    if had_previous:
+        os.rename(previous, stale)
+    os.rename(instance_gamedata, previous)
+    try:
+        os.rename(staging, instance_gamedata)
+    except OSError:
+        os.rename(previous, instance_gamedata)
+        if had_previous:
+            os.rename(stale, previous)
+        raise
+    # Only the rollback copy from before the last apply goes; GameData is already live
+    if had_previous:
+        safe_remove_item(stale)
+
+def file_hash(path):
+    """Return the sha256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def scan_mod_files(path):
+    """Return {relative path: [size, mtime_ns]} for a mod file or every file inside a mod folder"""
+    if not path.is_dir():
+        st = path.stat()
+        return {"": [st.st_size, st.st_mtime_ns]}
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(path):
+        rel_dir = os.path.relpath(dirpath, path).replace(os.sep, "/")
+        for name in filenames:
+            st = os.stat(os.path.join(dirpath, name))
+            rel = name if rel_dir == "." else f"{rel_dir}/{name}"
+            files[rel] = [st.st_size, st.st_mtime_ns]
+    return files
+
+def mod_file_path(root, rel):
+    """Resolve a relative path from scan_mod_files against a mod root"""
+    return root / rel if rel else root
+
+def deployment_path(instance, previous=False):
+    return DEPLOYMENTS_DIR / (f"{instance}.previous.json" if previous else f"{instance}.json")
+
+def load_deployment(instance, previous=False):
+    """Load the record of what was last deployed to an instance's GameData (or to GameData.previous)"""
+    path = deployment_path(instance, previous)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"profile": None, "mods": {}}
+
+def save_deployment(instance, deployment, previous=False):
+    path = deployment_path(instance, previous)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(deployment, f)
+    os.replace(tmp_path, path)
+    if not previous:
+        _deployed_mods[instance] = frozenset(deployment.get("mods", {}))
+
+_deployed_mods = {}  # Mod names of each instance's deployment record, kept up to date by save_deployment
+
+def deployed_mod_names(instance):
+    """Return the names of the mods last deployed to an instance, without reading the record each time"""
+    names = _deployed_mods.get(instance)
+    if names is None:
+        names = _deployed_mods[instance] = frozenset(load_deployment(instance).get("mods", {}))
+    return names
+
+def mod_set_hash(mods_to_apply):
+    """Fingerprint the mod versions a profile deploys; a load cache is only reused for the same fingerprint"""
+    index = get_mod_index()
+    index.refresh([parse_mod_ref(entry)[0] for entry in mods_to_apply])
+    refs = []
+    for entry in mods_to_apply:
+        mod_name, version = parse_mod_ref(entry)
+        if version is None:
+            mod = index.get_mod(mod_name, refresh=False)
+            # Mods not in the store yet have no version id; their file stats stand in for one
+            version = (mod["version"] or sorted([rel, size, mtime] for rel, (size, mtime, _) in
+                                                index.mod_files(mod_name, refresh=False).items())) if mod else None
+        refs.append([mod_name, version])
+    return hashlib.sha256(json.dumps(sorted(refs)).encode()).hexdigest()[:16]
+
+def load_cache_path(instance, profile_name):
+    return LOAD_CACHE_DIR / instance / profile_name
+
+def load_cache_record(instance, profile_name):
+    try:
+        with open(load_cache_path(instance, profile_name) / "cache.json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_load_cache(instance, instance_path, deployment):
+    """Keep the ModuleManager cache and PartDatabase.cfg of the profile deployed to an instance.
+
+    Called before an apply removes them. Only a cache ModuleManager finished
+    writing (ConfigSHA next to ConfigCache) is kept, along with the mod set it
+    was built from. Returns True if a new snapshot was saved.
+    """
+    profile_name, mod_set = deployment.get("profile"), deployment.get("mod_set")
+    instance_gamedata = instance_path / "GameData"
+    if not profile_name or not mod_set or not all((instance_gamedata / name).is_file() for name in MM_CACHE_FILES[:2]):
+        return False
+    files = {}
+    for path in [instance_gamedata / name for name in MM_CACHE_FILES] + [instance_path / PART_DATABASE_FILE]:
+        if path.is_file():
+            st = path.stat()
+            files[path.name] = (path, [st.st_size, st.st_mtime_ns])
+    stats = {name: stat for name, (_, stat) in files.items()}
+    known = load_cache_record(instance, profile_name)
+    if known and known["mod_set"] == mod_set and known["files"] == stats:
+        return False
+
+    cache_dir = load_cache_path(instance, profile_name)
+    tmp_dir = cache_dir.with_name(cache_dir.name + ".tmp")
+    safe_remove_item(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+    try:
+        # Copies, not links: the game rewrites these files in place
+        for name, (path, _) in files.items():
+            fast_copy_file(path, tmp_dir / name)
+        with open(tmp_dir / "cache.json", 'w') as f:
+            json.dump({"profile": profile_name, "mod_set": mod_set, "files": stats,
+                       "saved": datetime.now().isoformat(timespec="seconds")}, f)
+        safe_remove_item(cache_dir)
+        os.rename(tmp_dir, cache_dir)
+    except BaseException:
+        safe_remove_item(tmp_dir)
+        raise
+    return True
+
+def restore_load_cache(instance, instance_path, profile_name, mod_set):
+    """Put back the load cache saved for a profile if it was built from the same mod set; returns True if it was"""
+    record = load_cache_record(instance, profile_name)
+    if record is None or record["mod_set"] != mod_set:
+        return False
+    cache_dir = load_cache_path(instance, profile_name)
+    for name in record["files"]:
+        target = instance_path / name if name == PART_DATABASE_FILE else instance_path / "GameData" / name
+        fast_copy_file(cache_dir / name, target)
+    return True
+
+def diff_mod_files(src, target, recorded, src_files=None):
+    """Compare a cached mod against its copy in GameData, without changing either.
+
+    Files are compared by size and mtime first; a content hash is only computed
+    when the sizes match but the mtimes don't. Hashes are remembered in the
+    deployment record so they are not recomputed on the next apply. src_files
+    ({relative path: [size, mtime_ns, hash]}) stands in for scanning src when
+    a pinned version is planned from its manifest.
+
+    Returns (files_to_copy, files_to_delete, files_to_touch, entries) where
+    files_to_touch already hold the right content but not the cached mtime,
+    and entries is the deployment record for the mod once the copies are done.
+    """
+    if src_files is None:
+        src_files = {rel: file_stat + [None] for rel, file_stat in scan_mod_files(src).items()}
+    target_files = scan_mod_files(target)
+    recorded = recorded or {}
+    files_to_copy = []
+    files_to_touch = []
+    entries = {}
+
+    for rel, (size, mtime, digest) in src_files.items():
+        known = recorded.get(rel)
+        known_hash = digest or (known[2] if known and known[:2] == [size, mtime] else None)
+        entries[rel] = [size, mtime, known_hash]
+
+        current = target_files.get(rel)
+        if current == [size, mtime]:
+            continue
+        if current is None or current[0] != size:
+            files_to_copy.append(rel)
+            continue
+
+        # Same size, different mtime: only the content can tell
+        src_file = mod_file_path(src, rel)
+        target_file = mod_file_path(target, rel)
+        src_hash = known_hash or file_hash(src_file)
+        entries[rel][2] = src_hash
+        if file_hash(target_file) == src_hash:
+            files_to_touch.append(rel)
+        else:
+            files_to_copy.append(rel)
+
+    files_to_delete = [rel for rel in target_files if rel not in src_files]
+    return files_to_copy, files_to_delete, files_to_touch, entries
+
+def plan_apply(instance_gamedata, mods_to_apply, deployment, mode=DEFAULT_DEPLOY_MODE):
+    """Work out which GameData entries need removing, copying, updating or can be kept as-is"""
+    plan = {"mods": [], "remove": [], "copy": [], "update": [], "keep": [], "missing": [], "details": {}}
+    refs = {}
+    for entry in mods_to_apply:
+        mod_name, version = parse_mod_ref(entry)
+        refs.setdefault(mod_name, (entry, version))
+    plan["mods"] = list(refs)
 
-    status_callback("Cleaning existing GameData...")
-    
-    # Clean GameData (keep Squad folder and any other stock folders)
-    items_to_remove = []
     for item in instance_gamedata.iterdir():
-        if item.name not in ["Squad", "SquadExpansion"]:  # Keep stock KSP folders
-            items_to_remove.append(item)
-    
-    # Remove existing mod folders/files
-    for item in items_to_remove:
+        if item.name not in STOCK_FOLDERS and item.name not in refs:
+            plan["remove"].append(item.name)
+
+    recorded_mods = deployment.get("mods", {})
+    for mod_name, (entry, version) in refs.items():
+        mod_path, manifest = resolve_mod_source(mod_name, version)
+        target_path = instance_gamedata / mod_name
+        recorded = recorded_mods.get(mod_name, {})
+
+        if mod_path is None:
+            plan["missing"].append(entry)
+            continue
+
+        if mode == "symlink":
+            # A link always reflects the cached mod, so only its target matters
+            action = "keep" if is_linked_to(target_path, mod_path) else "copy"
+            plan[action].append(mod_name)
+            plan["details"][mod_name] = {"source": mod_path, "manifest": manifest, "copy_files": [],
+                                         "delete_files": [], "touch_files": [], "entries": {}}
+            continue
+
+        src_files = manifest_file_stats(manifest) if manifest else None
+        src_is_dir = manifest["kind"] != "file" if manifest else mod_path.is_dir()
+        same_kind = (recorded.get("mode", DEFAULT_DEPLOY_MODE) == mode and target_path.exists()
+                     and not is_link(target_path) and target_path.is_dir() == src_is_dir)
+        if not same_kind:
+            if src_files is None:
+                src_files = {rel: file_stat + [None] for rel, file_stat in scan_mod_files(mod_path).items()}
+            plan["copy"].append(mod_name)
+            plan["details"][mod_name] = {"source": mod_path, "manifest": manifest, "copy_files": list(src_files),
+                                         "delete_files": [], "touch_files": [], "entries": src_files}
+            continue
+
+        files_to_copy, files_to_delete, files_to_touch, entries = diff_mod_files(
+            mod_path, target_path, recorded.get("files"), src_files)
+        plan["update" if files_to_copy or files_to_delete else "keep"].append(mod_name)
+        plan["details"][mod_name] = {"source": mod_path, "manifest": manifest, "copy_files": files_to_copy,
+                                     "delete_files": files_to_delete, "touch_files": files_to_touch,
+                                     "entries": entries}
+
+    return plan
+
+def sync_mod_files(src, target, files_to_copy, files_to_delete, mode=DEFAULT_DEPLOY_MODE, on_file=None):
+    """Bring an existing GameData mod in line with its cached copy, file by file"""
+    engine = get_file_engine()
+    engine.run_files(safe_remove_item, ((mod_file_path(target, rel),) for rel in files_to_delete))
+    if src.is_dir():
+        # Recreate any empty folders the mod ships with
+        for dirpath, dirnames, filenames in os.walk(src):
+            for name in dirnames:
+                (target / os.path.relpath(os.path.join(dirpath, name), src)).mkdir(parents=True, exist_ok=True)
+    def deploy_and_report(file_src, file_dst):
+        deploy_file(file_src, file_dst, mode)
+        if on_file is not None:
+            on_file(file_dst)
+    engine.run_files(deploy_and_report, ((mod_file_path(src, rel), mod_file_path(target, rel)) for rel in files_to_copy))
+
+def list_cached_mods():
+    """Return the names of all mods in the mods folder (the object store is hidden)"""
+    if not MODS_DIR.exists():
+        return []
+    return [item.name for item in MODS_DIR.iterdir()
+            if not item.name.startswith(".") and (item.is_dir() or item.is_file())]
+
+def parse_mod_ref(entry):
+    """Split a profile entry such as 'MechJeb2@1a2b3c4d5e6f' into (mod name, pinned version or None)"""
+    name, sep, version = entry.rpartition(VERSION_SEPARATOR)
+    if sep and name and re.fullmatch(r"[0-9a-f]{12}", version):
+        return name, version
+    return entry, None
+
+def object_path(digest, objects_dir=STORE_OBJECTS_DIR):
+    return objects_dir / digest[:2] / digest
+
+def store_put_file(path, digest, link_source=False, objects_dir=STORE_OBJECTS_DIR):
+    """Add a file to an object store under its hash. Returns False if the content was already stored"""
+    obj = object_path(digest, objects_dir)
+    if obj.exists():
+        return False
+    obj.parent.mkdir(parents=True, exist_ok=True)
+    # Unique temp name: the same content may be added by several workers at once
+    tmp_path = obj.with_name(f"{digest}.{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        if not link_source:
+            raise OSError("copy requested")
+        os.link(path, tmp_path)
+    except OSError:
+        fast_copy_file(path, tmp_path)
+    protect_object(tmp_path)
+    os.replace(tmp_path, obj)
+    return True
+
+def protect_object(path):
+    """Make a store object read-only, so writes through its hardlinks fail instead of changing it"""
+    mode = stat.S_IMODE(os.stat(path).st_mode)
+    if mode & 0o222:
+        os.chmod(path, mode & ~0o222)
+
+def linked_object(path, st):
+    """Return the store object a file (with the given lstat) is a hardlink of, or None"""
+    if not stat.S_ISREG(st.st_mode) or st.st_nlink < 2:
+        return None
+    try:
+        obj = object_path(file_hash(path))
+        return obj if os.path.samestat(st, os.stat(obj)) else None
+    except OSError:
+        return None
+
+def link_object(digest, dst, private=False):
+    """Place a stored object at dst as a hardlink, or a copy where hardlinks aren't supported.
+
+    With private, dst is always a writable copy of its own.
+    """
+    obj = object_path(digest)
+    if dst.exists() or is_link(dst):
+        try:
+            if not is_link(dst) and os.path.samefile(obj, dst) and not private:
+                protect_object(obj)  # Objects of stores from before they were made read-only
+                return
+        except OSError:
+            pass
+        safe_remove_item(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if private:
+        fast_copy_file(obj, dst)
+        return
+    try:
+        protect_object(obj)
+        os.link(obj, dst)
+    except OSError:
+        fast_copy_file(obj, dst)
+
+def drop_overwritten_object(digest, path):
+    """Remove the object for digest if path is a link to it whose content has changed since.
+
+    Such an object no longer holds what it is named after; versions that use
+    it then fail to check out rather than silently getting the wrong file.
+    Returns True if it was removed.
+    """
+    obj = object_path(digest)
+    try:
+        if not os.path.samefile(obj, path):
+            return False
+        safe_remove_item(obj)
+    except OSError:
+        return False
+    trace_count("objects_overwritten")
+    return True
+
+def current_mod_version(mod_name):
+    """Return the version id currently in the mods folder for a mod, or None if it isn't stored"""
+    try:
+        return (STORE_VERSIONS_DIR / mod_name / "HEAD").read_text().strip() or None
+    except OSError:
+        return None
+
+def load_mod_version(mod_name, version):
+    try:
+        with open(STORE_VERSIONS_DIR / mod_name / f"{version}.json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def list_mod_versions(mod_name):
+    """Return the stored versions of a mod, oldest first"""
+    versions_path = STORE_VERSIONS_DIR / mod_name
+    if not versions_path.exists():
+        return []
+    versions = [load_mod_version(mod_name, p.stem) for p in versions_path.glob("*.json")]
+    return sorted([v for v in versions if v], key=lambda v: v["created"])
+
+def materialize_version(manifest, dst, keep_private=False):
+    """Build a mod folder (or single-file mod) from a stored version using hardlinks to the objects.
+
+    Files mods may rewrite are written as private copies; with keep_private,
+    private copies already at dst are trusted to hold their content (dst is
+    the folder the version was just read from).
+    """
+    def place(digest, path):
+        if not is_mutable_file(path):
+            link_object(digest, path)
+        elif not (keep_private and path.is_file() and not is_link(path) and os.stat(path).st_nlink == 1):
+            link_object(digest, path, private=True)
+
+    if manifest["kind"] == "file":
+        if dst.is_dir() and not is_link(dst):
+            safe_remove_item(dst)
+        place(manifest["files"][""][0], dst)
+        return
+
+    if (dst.exists() and not dst.is_dir()) or is_link(dst):
+        safe_remove_item(dst)
+    dst.mkdir(parents=True, exist_ok=True)
+    engine = get_file_engine()
+    engine.run_files(safe_remove_item, ((dst / rel,) for rel in scan_mod_files(dst) if rel not in manifest["files"]))
+    for rel in manifest["dirs"]:
+        (dst / rel).mkdir(parents=True, exist_ok=True)
+    engine.run_files(place, ((entry[0], dst / rel) for rel, entry in manifest["files"].items()))
+
+def store_ingest_mod(src, mod_name):
+    """Record src as a version of mod_name and make it the mod's copy in the mods folder.
+
+    Files are hashed (reusing the hashes of the previous version where size and
+    mtime are unchanged) and only content the store doesn't have yet is written.
+    Returns (version id, number of files written).
+    """
+    mod_dest = MODS_DIR / mod_name
+    head = current_mod_version(mod_name)
+    previous = load_mod_version(mod_name, head) if head else None
+    known = previous["files"] if previous else {}
+    # Files already in the mods folder can be linked into the store instead of copied
+    link_source = Path(os.path.abspath(src)) == Path(os.path.abspath(mod_dest))
+
+    files = {}
+    written = []
+
+    def add_file(rel, size, mtime):
+        file_path = mod_file_path(src, rel)
+        prev = known.get(rel)
+        digest = prev[0] if prev and prev[1:] == [size, mtime] else file_hash(file_path)
+        if prev and digest != prev[0]:
+            # Edited in place through a link to its object (deployed as a hardlink or symlink)
+            drop_overwritten_object(prev[0], file_path)
+        if store_put_file(file_path, digest, link_source and not is_mutable_file(file_path)):
+            written.append(rel)
+        files[rel] = digest
+
+    get_file_engine().run_files(add_file, ((rel, size, mtime) for rel, (size, mtime) in scan_mod_files(src).items()))
+
+    dirs = []
+    if src.is_dir():
+        for dirpath, dirnames, filenames in os.walk(src):
+            for name in dirnames:
+                dirs.append(os.path.relpath(os.path.join(dirpath, name), src).replace(os.sep, "/"))
+    version = hashlib.sha256(json.dumps([sorted(files.items()), sorted(dirs)]).encode()).hexdigest()[:12]
+
+    manifest = load_mod_version(mod_name, version) or {
+        "mod": mod_name,
+        "version": version,
+        "kind": "dir" if src.is_dir() else "file",
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "dirs": sorted(dirs),
+    }
+    manifest["files"] = {rel: [digest, 0, 0] for rel, digest in files.items()}
+    materialize_version(manifest, mod_dest, keep_private=link_source)
+
+    # Remember the stats of the linked files so unchanged mods are not re-hashed
+    for rel, entry in manifest["files"].items():
+        st = os.stat(mod_file_path(mod_dest, rel))
+        entry[1:] = [st.st_size, st.st_mtime_ns]
+
+    versions_path = STORE_VERSIONS_DIR / mod_name
+    versions_path.mkdir(parents=True, exist_ok=True)
+    tmp_path = versions_path / f"{version}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, versions_path / f"{version}.json")
+    (versions_path / "HEAD").write_text(version)
+    get_mod_index().invalidate(mod_name)
+    return version, len(written)
+
+def store_mod_is_current(mod_name):
+    """Return True if the mod folder still matches the version recorded for it in the store"""
+    head = current_mod_version(mod_name)
+    mod = get_mod_index().get_mod(mod_name)
+    return head is not None and mod is not None and mod["version"] == head
+
+def compact_mod_store(pinned_refs, status_callback=None):
+    """Move any mods not yet in the store into it, then drop versions and objects nothing uses"""
+    if status_callback:
+        status_callback("Deduplicating mod cache...")
+    def ingest_if_changed(mod_name):
+        if store_mod_is_current(mod_name):
+            return False
+        store_ingest_mod(MODS_DIR / mod_name, mod_name)
+        return True
+
+    for mod_name, ingested, error in get_file_engine().run_per_mod(ingest_if_changed, list_cached_mods()):
+        if error:
+            if status_callback:
+                status_callback(f"Warning: Could not add {mod_name} to the mod store: {error}")
+        elif ingested and status_callback:
+            status_callback(f"Added {mod_name} to the mod store")
+    versions_removed, objects_removed = store_collect_garbage(pinned_refs)
+    if status_callback:
+        status_callback(f"Mod store compacted: dropped {versions_removed} old version(s) "
+                        f"and {objects_removed} unreferenced file(s).")
+    return versions_removed, objects_removed
+
+def resolve_mod_source(mod_name, version=None):
+    """Return (path a profile entry is deployed from, manifest of its pinned version or None).
+
+    A pinned version is deployed from its checkout, which is not built here:
+    apply_profile materializes it from the manifest once it is needed.
+    Returns (None, None) if the mod or version is missing.
+    """
+    mod_path = MODS_DIR / mod_name
+    if version is None or version == current_mod_version(mod_name):
+        return (mod_path if mod_path.exists() else None), None
+    manifest = load_mod_version(mod_name, version)
+    if manifest is None:
+        return None, None
+    return STORE_CHECKOUTS_DIR / version / mod_name, manifest
+
+def manifest_file_stats(manifest):
+    """Return {relative path: [size, mtime_ns, hash]} for the files of a stored version"""
+    return {rel: [size, mtime, digest] for rel, (digest, size, mtime) in manifest["files"].items()}
+
+def store_collect_garbage(pinned_refs):
+    """Drop stored versions that are neither current nor pinned by a profile, then unreferenced objects.
+
+    Returns (versions removed, objects removed).
+    """
+    versions_removed = 0
+    referenced = set()
+    if STORE_VERSIONS_DIR.exists():
+        for versions_path in STORE_VERSIONS_DIR.iterdir():
+            mod_name = versions_path.name
+            mod_exists = (MODS_DIR / mod_name).exists()
+            head = current_mod_version(mod_name) if mod_exists else None
+            for manifest_file in versions_path.glob("*.json"):
+                version = manifest_file.stem
+                if version == head or (mod_name, version) in pinned_refs:
+                    manifest = load_mod_version(mod_name, version)
+                    if manifest:
+                        referenced.update(entry[0] for entry in manifest["files"].values())
+                        continue
+                manifest_file.unlink()
+                safe_remove_item(STORE_CHECKOUTS_DIR / version / mod_name)
+                versions_removed += 1
+            if not any(versions_path.glob("*.json")):
+                safe_remove_item(versions_path)
+
+    unreferenced = []
+    if STORE_OBJECTS_DIR.exists():
+        for bucket in STORE_OBJECTS_DIR.iterdir():
+            unreferenced.extend((obj,) for obj in bucket.iterdir() if obj.name not in referenced)
+    get_file_engine().run_files(safe_remove_item, unreferenced)
+    return versions_removed, len(unreferenced)
+
+CFG_PART_NODE = re.compile(r"^\s*([@+$%!-]?)PART\b\s*(?:\[([^\]]*)\])?", re.IGNORECASE)
+CFG_NAME_VALUE = re.compile(r"^\s*name\s*=\s*(.+?)\s*$")
+SEARCH_TERM_MAX_SIZE = 8 * 1024 * 1024  # Larger .cfg/.version files are only indexed by path
+
+def read_search_terms(path):
+    """Return [(kind, text)] for the search index: ("version", "NAME VERSION") from a
+    KSP-AVC .version file, ("part", name) for each PART defined in a .cfg and
+    ("patch", filter) for each ModuleManager patch to PART nodes
+    """
+    try:
+        if os.path.getsize(path) > SEARCH_TERM_MAX_SIZE:
+            return []
+        with open(path, encoding="utf-8-sig", errors="replace") as f:
+            text = f.read()
+    except OSError:
+        return []
+
+    if str(path).lower().endswith(".version"):
+        # Plenty of .version files aren't strict JSON, so pick the fields out by hand
+        name = re.search(r'"NAME"\s*:\s*"([^"]+)"', text, re.IGNORECASE)
+        version = re.search(r'"VERSION"\s*:\s*(\{[^}]*\}|"[^"]*")', text, re.IGNORECASE)
+        if not name:
+            return []
+        if version and version.group(1).startswith("{"):
+            parts = re.findall(r'"(MAJOR|MINOR|PATCH|BUILD)"\s*:\s*(\d+)', version.group(1), re.IGNORECASE)
+            number = ".".join(value for _, value in parts)
+        else:
+            number = version.group(1).strip('"') if version else ""
+        return [("version", f"{name.group(1)} {number}".strip())]
+
+    terms = []
+    depth = 0
+    in_part = False  # Inside a PART node that still hasn't given its name
+    for line in text.splitlines():
+        line = line.split("//", 1)[0]
+        if depth == 0:
+            node = CFG_PART_NODE.match(line)
+            if node:
+                operator, target = node.groups()
+                if operator and target:
+                    terms.append(("patch", target.strip()))
+                in_part = not operator
+        elif depth == 1 and in_part:
+            name = CFG_NAME_VALUE.match(line)
+            if name:
+                terms.append(("part", name.group(1)))
+                in_part = False
+        depth = max(0, depth + line.count("{") - line.count("}"))
+        if depth == 0 and "}" in line:
+            in_part = False
+    return terms
+
+def search_trigrams(text):
+    """Return the set of letter/digit trigrams fuzzy search compares, ignoring case and separators"""
+    compact = re.sub(r"[\W_]+", "", text.lower())
+    return {compact[i:i + 3] for i in range(len(compact) - 2)}
+
+class ModIndex:
+    """SQLite index of the mods folder: size, file count and version per mod, stats and hashes per file.
+
+    A mod is only rescanned when the mtime of its folder or one of its subfolders
+    changed, so keeping the index current costs one stat per folder. Files edited
+    in place don't touch their folder's mtime; refresh(names, full=True) picks those up.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS mods (name TEXT PRIMARY KEY, kind TEXT, size INTEGER, file_count INTEGER,
+                                         mtime_ns INTEGER, version TEXT, indexed TEXT);
+        CREATE TABLE IF NOT EXISTS files (mod TEXT, rel TEXT, size INTEGER, mtime_ns INTEGER, hash TEXT,
+                                          PRIMARY KEY (mod, rel));
+        -- mtime of the mod root (rel "") and of every subfolder when the mod was last scanned
+        CREATE TABLE IF NOT EXISTS stamps (mod TEXT, rel TEXT, mtime_ns INTEGER, PRIMARY KEY (mod, rel));
+        -- What search() looks through: the mod name, file paths, .version names and cfg PART names/patches
+        CREATE TABLE IF NOT EXISTS terms (id INTEGER PRIMARY KEY, mod TEXT, kind TEXT, text TEXT, rel TEXT);
+        CREATE INDEX IF NOT EXISTS terms_mod ON terms (mod);
+    """
+    SCHEMA_VERSION = 2  # Bumped when a new column or table needs every mod rescanned
+    # Trigram full-text index over terms, updated a whole mod at a time by set_terms() (triggers
+    # updating it row by row are several times slower); not every SQLite build has FTS5
+    SEARCH_SCHEMA = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS terms_fts USING fts5(text, content='terms', content_rowid='id',
+                                                                  tokenize='trigram');
+        CREATE VIRTUAL TABLE IF NOT EXISTS terms_vocab USING fts5vocab(terms_fts, row);
+        DROP TRIGGER IF EXISTS terms_ai;
+        DROP TRIGGER IF EXISTS terms_ad;
+    """
+    FUZZY_THRESHOLD = 0.6  # Share of the query's trigrams a fuzzy match must contain
+    FUZZY_CANDIDATES = 5000  # Most terms a fuzzy search scores
+    KIND_ORDER = {"mod": 0, "part": 1, "version": 2, "file": 3, "patch": 4}
+
+    def __init__(self, path=MOD_INDEX_FILE):
+        self.lock = threading.RLock()
+        try:
+            self.db = self.open(path)
+        except sqlite3.DatabaseError:
+            # Only a cache: start over if the file is damaged
+            Path(path).unlink(missing_ok=True)
+            self.db = self.open(path)
+
+    def open(self, path):
+        db = sqlite3.connect(str(path), check_same_thread=False)
+        db.executescript(self.SCHEMA)
+        try:
+            db.executescript(self.SEARCH_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+        if db.execute("PRAGMA user_version").fetchone()[0] < self.SCHEMA_VERSION:
+            # Written by an older version: forget the stamps so every mod is rescanned once
+            with db:
+                db.execute("DELETE FROM stamps")
+                db.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        return db
+
+    def is_stale(self, name, path):
+        stamps = self.db.execute("SELECT rel, mtime_ns FROM stamps WHERE mod = ?", (name,)).fetchall()
+        if not stamps:
+            return True
+        for rel, mtime_ns in stamps:
+            try:
+                if os.stat(mod_file_path(path, rel)).st_mtime_ns != mtime_ns:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def scan(self, name, path):
+        """Rescan one mod and replace its rows"""
+        files = scan_mod_files(path)
+        stamps = {"": path.stat().st_mtime_ns}
+        if path.is_dir():
+            for dirpath, dirnames, _ in os.walk(path):
+                for dirname in dirnames:
+                    full = os.path.join(dirpath, dirname)
+                    stamps[os.path.relpath(full, path).replace(os.sep, "/")] = os.stat(full).st_mtime_ns
+
+        # Hashes come for free from the mod store wherever the stats still match
+        version = current_mod_version(name)
+        manifest = load_mod_version(name, version) if version else None
+        known = manifest["files"] if manifest else {}
+        hashes = {rel: known[rel][0] for rel, stats in files.items() if rel in known and known[rel][1:] == stats}
+        if len(hashes) != len(files) or len(known) != len(files):
+            version = None
+
+        # Parsed cfg and .version terms are kept for files whose stats didn't change
+        old_stats = {rel: [size, mtime] for rel, size, mtime in
+                     self.db.execute("SELECT rel, size, mtime_ns FROM files WHERE mod = ?", (name,))}
+        old_terms = collections.defaultdict(list)
+        for kind, text, rel in self.db.execute(
+                "SELECT kind, text, rel FROM terms WHERE mod = ? AND kind NOT IN ('mod', 'file')", (name,)):
+            old_terms[rel].append((kind, text))
+        terms = [("mod", name, "")]
+        for rel, stats in files.items():
+            terms.append(("file", rel, rel))
+            if rel.lower().endswith((".cfg", ".version")):
+                if old_stats.get(rel) == stats:
+                    found = old_terms.get(rel, [])
+                else:
+                    found = read_search_terms(mod_file_path(path, rel))
+                terms.extend((kind, text, rel) for kind, text in found)
+
+        self.db.execute("DELETE FROM files WHERE mod = ?", (name,))
+        self.db.execute("DELETE FROM stamps WHERE mod = ?", (name,))
+        self.set_terms(name, terms)
+        self.db.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?)",
+                            ((name, rel, size, mtime, hashes.get(rel)) for rel, (size, mtime) in files.items()))
+        self.db.executemany("INSERT INTO stamps VALUES (?, ?, ?)", ((name, rel, m) for rel, m in stamps.items()))
+        self.db.execute("INSERT OR REPLACE INTO mods VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (name, "dir" if path.is_dir() else "file", sum(s for s, _ in files.values()), len(files),
+                         max((m for _, m in files.values()), default=stamps[""]), version,
+                         datetime.now().isoformat(timespec="seconds")))
+
+    def set_terms(self, name, terms):
+        """Replace a mod's search terms, [(kind, text, rel)], and their full-text entries"""
+        if self.fts:
+            self.db.execute("INSERT INTO terms_fts (terms_fts, rowid, text) "
+                            "SELECT 'delete', id, text FROM terms WHERE mod = ?", (name,))
+        self.db.execute("DELETE FROM terms WHERE mod = ?", (name,))
+        self.db.executemany("INSERT INTO terms (mod, kind, text, rel) VALUES (?, ?, ?, ?)",
+                            ((name, kind, text, rel) for kind, text, rel in terms))
+        if self.fts:
+            self.db.execute("INSERT INTO terms_fts (rowid, text) SELECT id, text FROM terms WHERE mod = ?", (name,))
+
+    def refresh(self, names=None, full=False, status_callback=None):
+        """Bring the index up to date with the mods folder (or just the named mods); returns the rescanned names"""
+        with self.lock:
+            on_disk = set(list_cached_mods())
+            indexed = {row[0] for row in self.db.execute("SELECT name FROM mods")}
+            wanted = on_disk if names is None else on_disk & set(names)
+            gone = (indexed - on_disk) if names is None else (set(names) & indexed) - on_disk
+            rescanned = []
+            with self.db:
+                for name in gone:
+                    for table, column in (("mods", "name"), ("files", "mod"), ("stamps", "mod")):
+                        self.db.execute(f"DELETE FROM {table} WHERE {column} = ?", (name,))
+                    self.set_terms(name, [])
+                for name in sorted(wanted, key=natural_sort_key):
+                    path = MODS_DIR / name
+                    if not full and not self.is_stale(name, path):
+                        continue
+                    if status_callback and len(rescanned) % 50 == 0:
+                        status_callback(f"Indexing mods folder: {name}...")
+                    try:
+                        self.scan(name, path)
+                    except OSError:
+                        # Vanished or unreadable mid-scan; it is picked up on the next refresh
+                        continue
+                    rescanned.append(name)
+            return rescanned
+
+    def invalidate(self, name):
+        """Forget a mod's stamps so the next refresh rescans it"""
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM stamps WHERE mod = ?", (name,))
+
+    def list_mods(self, refresh=True):
+        """Return a dict per indexed mod: name, kind, size, file_count, mtime_ns, version, indexed"""
+        with self.lock:
+            if refresh:
+                self.refresh()
+            cursor = self.db.execute("SELECT * FROM mods")
+            columns = [c[0] for c in cursor.description]
+            mods = [dict(zip(columns, row)) for row in cursor]
+        return sorted(mods, key=lambda m: natural_sort_key(m["name"]))
+
+    def get_mod(self, name, refresh=True):
+        """Return one mod's row as a dict, or None if it isn't in the mods folder"""
+        with self.lock:
+            if refresh:
+                self.refresh([name])
+            cursor = self.db.execute("SELECT * FROM mods WHERE name = ?", (name,))
+            row = cursor.fetchone()
+            return dict(zip([c[0] for c in cursor.description], row)) if row else None
+
+    def mod_sizes(self, names=None, refresh=True, wait=True):
+        """Return {mod name: total size in bytes}.
+
+        Without wait, nothing is returned if another thread is busy with the
+        index, rather than waiting for it (for the Tk thread).
+        """
+        if not self.lock.acquire(blocking=wait):
+            return {}
         try:
-            safe_remove_item(item)
-            status_callback(f"Removed {item.name}")
+            if refresh:
+                self.refresh(names)
+            sizes = dict(self.db.execute("SELECT name, size FROM mods"))
+        finally:
+            self.lock.release()
+        return sizes if names is None else {name: sizes[name] for name in names if name in sizes}
+
+    def mod_files(self, name, refresh=True):
+        """Return {relative path: [size, mtime_ns, hash or None]} for one mod, as scan_mod_files would see it"""
+        with self.lock:
+            if refresh:
+                self.refresh([name])
+            return {rel: [size, mtime, digest] for rel, size, mtime, digest in
+                    self.db.execute("SELECT rel, size, mtime_ns, hash FROM files WHERE mod = ?", (name,))}
+
+    def find_files(self, pattern, refresh=True):
+        """Return [(mod name, relative path)] of files whose path matches a SQL LIKE pattern"""
+        with self.lock:
+            if refresh:
+                self.refresh()
+            return self.db.execute("SELECT mod, rel FROM files WHERE rel LIKE ? ORDER BY mod, rel",
+                                   (pattern,)).fetchall()
+
+    def search(self, query, limit=100, fuzzy=True, refresh=False):
+        """Search mod names, file paths, .version names and cfg PART names without touching the mods folder.
+
+        Every word of the query has to appear in a match. With fuzzy, terms that
+        only share most of the query's trigrams (typos, missing separators) are
+        added after the exact matches. Returns dicts with mod, kind, text, rel and
+        score (1.0 for an exact match), best first.
+        """
+        words = query.lower().split()
+        if not words:
+            return []
+        with self.lock:
+            if refresh:
+                self.refresh()
+            if self.fts and all(len(word) >= 3 for word in words):
+                match = " AND ".join('"' + word.replace('"', '""') + '"' for word in words)
+                rows = self.db.execute("SELECT t.mod, t.kind, t.text, t.rel FROM terms_fts JOIN terms t "
+                                       "ON t.id = terms_fts.rowid WHERE terms_fts MATCH ? LIMIT ?",
+                                       (match, limit * 10)).fetchall()
+            else:
+                like = " AND ".join(["text LIKE ? ESCAPE '\\'"] * len(words))
+                patterns = ["%" + re.sub(r"([%_\\])", r"\\\1", word) + "%" for word in words]
+                rows = self.db.execute(f"SELECT mod, kind, text, rel FROM terms WHERE {like} LIMIT ?",
+                                       (*patterns, limit * 10)).fetchall()
+            results = {row: 1.0 for row in rows}
+
+            grams = search_trigrams(query)
+            if fuzzy and grams and len(results) < limit:
+                if self.fts:
+                    # A term with FUZZY_THRESHOLD of the query's trigrams has at least one of any
+                    # len(grams) - needed + 1 of them, so only terms with one of the rarest are scored
+                    counts = dict(self.db.execute(f"SELECT term, doc FROM terms_vocab WHERE term IN "
+                                                  f"({', '.join('?' * len(grams))})", sorted(grams)))
+                    needed = math.ceil(len(grams) * self.FUZZY_THRESHOLD)
+                    rarest = sorted(counts, key=counts.get)[:len(grams) - needed + 1]
+                    match = " OR ".join(f'"{gram}"' for gram in rarest)
+                    candidates = self.db.execute("SELECT t.mod, t.kind, t.text, t.rel FROM terms_fts JOIN terms t "
+                                                 "ON t.id = terms_fts.rowid WHERE terms_fts MATCH ? LIMIT ?",
+                                                 (match, self.FUZZY_CANDIDATES)) if rarest else []
+                else:
+                    candidates = self.db.execute("SELECT mod, kind, text, rel FROM terms")
+                for row in candidates:
+                    if row not in results:
+                        score = len(grams & search_trigrams(row[2])) / len(grams)
+                        if score >= self.FUZZY_THRESHOLD:
+                            results[row] = score
+
+        ranked = sorted(results.items(), key=lambda item: (-item[1], self.KIND_ORDER.get(item[0][1], 9),
+                                                           len(item[0][2]), natural_sort_key(item[0][0])))
+        return [{"mod": mod, "kind": kind, "text": text, "rel": rel, "score": round(score, 2)}
+                for (mod, kind, text, rel), score in ranked[:limit]]
+
+    def search_mods(self, query, limit=1000, fuzzy=True, refresh=False):
+        """Return {mod name: its best search() match} for the mods that match query"""
+        best = {}
+        for match in self.search(query, limit, fuzzy, refresh):
+            best.setdefault(match["mod"], match)
+        return best
+
+_mod_index = None
+_mod_index_lock = threading.Lock()
+
+def get_mod_index():
+    """Return the shared mods folder index, opening index.db on first use"""
+    global _mod_index
+    with _mod_index_lock:
+        if _mod_index is None:
+            _mod_index = ModIndex()
+        return _mod_index
+
+def estimate_plan(instance_gamedata, mods_to_apply, deployment, mode=DEFAULT_DEPLOY_MODE):
+    """Like plan_apply, but from cached stats only: nothing inside GameData or the mods folder is scanned.
+
+    Cached mods are described by the mod index (or their stored version) and
+    the GameData copies by the deployment record, so changes made to GameData
+    by hand are only noticed by plan_apply.
+    """
+    plan = {"mods": [], "remove": [], "copy": [], "update": [], "keep": [], "missing": [], "details": {}}
+    refs = {}
+    for entry in mods_to_apply:
+        mod_name, version = parse_mod_ref(entry)
+        refs.setdefault(mod_name, (entry, version))
+    plan["mods"] = list(refs)
+
+    present = {item.name for item in instance_gamedata.iterdir()}
+    plan["remove"] = [name for name in present if name not in STOCK_FOLDERS and name not in refs]
+
+    index = get_mod_index()
+    index.refresh(list(refs))
+    recorded_mods = deployment.get("mods", {})
+    for mod_name, (entry, version) in refs.items():
+        mod_path, manifest = resolve_mod_source(mod_name, version)
+        if mod_path is None:
+            files = None
+        elif manifest is None:
+            files = index.mod_files(mod_name, refresh=False)
+        else:
+            files = manifest_file_stats(manifest)
+        if files is None:
+            plan["missing"].append(entry)
+            continue
+
+        recorded = recorded_mods.get(mod_name, {})
+        if mode == "symlink":
+            action = "keep" if is_linked_to(instance_gamedata / mod_name, mod_path) else "copy"
+            plan[action].append(mod_name)
+            plan["details"][mod_name] = {"source": mod_path, "manifest": manifest, "copy_files": [],
+                                         "delete_files": [], "touch_files": [], "entries": {}}
+            continue
+
+        if recorded.get("mode", DEFAULT_DEPLOY_MODE) != mode or mod_name not in present:
+            plan["copy"].append(mod_name)
+            plan["details"][mod_name] = {"source": mod_path, "manifest": manifest, "copy_files": list(files),
+                                         "delete_files": [], "touch_files": [], "entries": files}
+            continue
+
+        known = recorded.get("files", {})
+        files_to_copy = [rel for rel, stat in files.items() if known.get(rel, [None])[:2] != stat[:2]]
+        files_to_delete = [rel for rel in known if rel not in files]
+        plan["update" if files_to_copy or files_to_delete else "keep"].append(mod_name)
+        plan["details"][mod_name] = {"source": mod_path, "manifest": manifest, "copy_files": files_to_copy,
+                                     "delete_files": files_to_delete, "touch_files": [], "entries": files}
+    return plan
+
+def plan_work(plan, deployment):
+    """Return ({mod: {"copy", "delete", "bytes"}}, bytes to copy, file operations) for a plan.
+
+    File operations count the files copied and deleted, including those of the
+    mods being removed as far as the deployment record knows them.
+    """
+    work = {}
+    for name in plan["copy"] + plan["update"]:
+        details = plan["details"][name]
+        work[name] = {"copy": len(details["copy_files"]), "delete": len(details["delete_files"]),
+                      "bytes": sum(details["entries"][rel][0] for rel in details["copy_files"])}
+    recorded_mods = deployment.get("mods", {})
+    file_operations = (sum(w["copy"] + w["delete"] for w in work.values())
+                       + sum(len(recorded_mods.get(name, {}).get("files", ())) for name in plan["remove"]))
+    return work, sum(w["bytes"] for w in work.values()), file_operations
+
+def apply_space_needed(instance_gamedata, mode, num_bytes):
+    """Return how much free space deploying num_bytes of mod files takes on the GameData volume.
+
+    Links, and clones on the mods folder's own volume, are counted as taking none.
+    """
+    if mode == "symlink":
+        return 0
+    if mode in ("hardlink", "reflink"):
+        try:
+            if os.stat(MODS_DIR).st_dev == os.stat(instance_gamedata).st_dev:
+                return 0
+        except OSError:
+            pass
+    return num_bytes
+
+def estimate_apply_seconds(instance, mode, num_bytes, file_operations):
+    """Estimate how long an apply takes from the throughput measured on the instance's earlier applies"""
+    throughput = {**DEFAULT_APPLY_THROUGHPUT,
+                  **load_instances().get(instance, {}).get("apply_throughput", {}).get(mode, {})}
+    return max(num_bytes / throughput["bytes_per_s"], file_operations / throughput["files_per_s"])
+
+def record_apply_throughput(instance, mode, num_bytes, file_operations, seconds):
+    """Fold the speed of a finished apply into the instance's measured throughput.
+
+    Applies too small to say much (fixed costs dominate) are ignored.
+    """
+    measured = {}
+    if num_bytes >= THROUGHPUT_MIN_BYTES:
+        measured["bytes_per_s"] = num_bytes / seconds
+    if file_operations >= THROUGHPUT_MIN_FILES:
+        measured["files_per_s"] = file_operations / seconds
+    if not measured or seconds <= 0:
+        return
+    rates = copy.deepcopy(load_instances().get(instance, {}).get("apply_throughput", {}))
+    previous = rates.setdefault(mode, {})
+    for key, value in measured.items():
+        previous[key] = round((previous[key] + value) / 2 if key in previous else value)
+    update_instance(instance, apply_throughput=rates)
+
+def plan_profile(instance, profile_name, exact=True):
+    """Work out what applying a profile would change and cost, without touching anything.
+
+    Returns the mods apply_profile would remove, copy, update and keep, the
+    profile entries missing from the mods folder and, per mod to copy or
+    update, how many files would be copied and deleted and how many bytes
+    copied. Totals come with an estimated duration and the free space needed
+    against what the GameData volume has.
+
+    With exact=False only cached stats are used (see estimate_plan), which is
+    fast enough to run whenever a profile is selected.
+    """
+    instances = load_instances()
+    if instance not in instances:
+        raise OperationError(f"Unknown instance: {instance}")
+    instance_gamedata = Path(instances[instance]['path']) / "GameData"
+    mods_to_apply = get_profile_store().load(instance, profile_name)
+    if mods_to_apply is None:
+        raise OperationError(f"Profile file not found: {PROFILES_DIR / instance / f'{profile_name}.json'}")
+    if not instance_gamedata.exists():
+        raise OperationError(f"GameData folder not found: {instance_gamedata}")
+
+    mode = instances[instance].get("deploy_mode", DEFAULT_DEPLOY_MODE)
+    if mode not in DEPLOY_MODES:
+        mode = DEFAULT_DEPLOY_MODE
+    deployment = load_deployment(instance)
+    plan = (plan_apply if exact else estimate_plan)(instance_gamedata, mods_to_apply, deployment, mode)
+    work, num_bytes, file_operations = plan_work(plan, deployment)
+    needed = apply_space_needed(instance_gamedata, mode, num_bytes)
+    free = shutil.disk_usage(instance_gamedata).free
+    return {
+        "instance": instance,
+        "profile": profile_name,
+        "mode": mode,
+        "exact": exact,
+        **{key: plan[key] for key in ("remove", "copy", "update", "keep", "missing")},
+        "files": work,
+        "bytes": num_bytes,
+        "file_operations": file_operations,
+        "seconds": round(estimate_apply_seconds(instance, mode, num_bytes, file_operations), 1),
+        "space": {"needed": needed, "free": free, "ok": needed <= free},
+    }
+
+def format_duration(seconds):
+    if seconds < 1:
+        return "under a second"
+    if seconds < 90:
+        return f"about {seconds:.0f} s"
+    return f"about {seconds / 60:.0f} min"
+
+def describe_plan(plan):
+    """Short multi-line summary of a plan_profile() result for the main window"""
+    lines = [f"Applying '{plan['profile']}' would:"]
+    for action in ("remove", "copy", "update", "keep"):
+        if plan[action]:
+            lines.append(f"  {action} {len(plan[action])} mod(s)")
+    if plan["bytes"] or plan["file_operations"]:
+        lines.append(f"{plan['file_operations']} file(s), {format_size(plan['bytes'])} to copy, "
+                     f"{format_duration(plan['seconds'])}")
+    else:
+        lines.append("Nothing to copy: GameData already matches.")
+    if plan["missing"]:
+        lines.append(f"{len(plan['missing'])} mod(s) missing from the mods folder: " + ", ".join(plan["missing"][:5])
+                     + (", ..." if len(plan["missing"]) > 5 else ""))
+    space = plan["space"]
+    if not space["ok"]:
+        lines.append(f"Not enough free space: needs {format_size(space['needed'])}, {format_size(space['free'])} free")
+    return "\n".join(lines)
+
+def apply_profile(instance, profile_name, status_callback, cancel_event=None, resume=None):
+    """Apply a profile to an instance's GameData.
+
+    With the staged_apply setting the new GameData is built in GameData.staging
+    (unchanged entries are hardlinked from the current one) and swapped in by
+    renaming, keeping the old tree as GameData.previous for rollback_gamedata().
+    A failed or cancelled staged apply leaves GameData untouched.
+
+    Progress is journaled; pass the OperationJournal of an interrupted apply
+    as resume to carry on from its last checkpoint instead of starting over.
+
+    Returns a summary dict; per-mod problems of an in-place apply are collected
+    in it rather than stopping the apply. Raises OperationError if the apply
+    can't go ahead.
+    """
+    reload_file_engine()
+    instances = load_instances()
+    instance_path = Path(instances[instance]['path'])
+    instance_gamedata = instance_path / "GameData"
+    repair_interrupted_swap(instance_path)
+    mods_to_apply = get_profile_store().load(instance, profile_name)
+
+    if mods_to_apply is None:
+        raise OperationError(f"Profile file not found: {PROFILES_DIR / instance / f'{profile_name}.json'}")
+
+    # Ensure GameData directory exists
+    if not instance_gamedata.exists():
+        raise OperationError(f"GameData folder not found: {instance_gamedata}")
+
+    mode = instances[instance].get("deploy_mode", DEFAULT_DEPLOY_MODE)
+    if mode not in DEPLOY_MODES:
+        mode = DEFAULT_DEPLOY_MODE
+
+    status_callback("Comparing GameData with profile...")
+    with trace_span("plan", mods=len(mods_to_apply)):
+        deployment = load_deployment(instance)
+        replaced_deployment = copy.deepcopy(deployment)
+        plan = plan_apply(instance_gamedata, mods_to_apply, deployment, mode)
+        mod_set = mod_set_hash(mods_to_apply)
+    deployed_mods = deployment.get("mods", {})
+    check_cancelled(cancel_event)
+
+    # Preflight: nothing has been touched yet, so running out of space can still leave GameData as it is
+    _, work_bytes, file_operations = plan_work(plan, deployment)
+    if resume is None:
+        needed = apply_space_needed(instance_gamedata, mode, work_bytes)
+        free = shutil.disk_usage(instance_gamedata).free
+        if needed > free:
+            raise OperationError(f"Not enough free space to apply '{profile_name}': it needs {format_size(needed)} "
+                                 f"and only {format_size(free)} is free on the drive of {instance_path}.\n\n"
+                                 "GameData was left unchanged.")
+
+    load_cache = load_settings()["load_cache"]
+    if load_cache:
+        try:
+            if save_load_cache(instance, instance_path, deployment):
+                status_callback(f"Saved the ModuleManager cache of profile '{deployment['profile']}'")
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to remove {item.name}: {e}")
+            status_callback(f"Warning: Could not save the ModuleManager cache: {e}")
+
+    staged = load_settings()["staged_apply"]
+    if resume is not None:
+        staged = resume.params["staged"] and not resume.is_done("swap")
+        if staged and not (instance_path / STAGED_GAMEDATA_NAME).exists():
+            # The staged tree is gone, so nothing the interrupted run did can be reused:
+            # start over with a new journal in place of the old one
+            resume = None
+    journal = OperationJournal.begin("apply", instance, {"profile": profile_name, "staged": staged},
+                                     [f"mod:{name}" for name in plan["details"]], resume)
+    try:
+        engine = get_file_engine()
+        target_root = instance_path / STAGED_GAMEDATA_NAME if staged else instance_gamedata
+        work_started = time.perf_counter()
+        if staged:
+            status_callback("Staging the new GameData...")
+            try:
+                with trace_span("stage"):
+                    stage_gamedata(instance_gamedata, target_root, plan, journal, cancel_event,
+                                   resuming=resume is not None)
+            except BaseException:
+                safe_remove_item(target_root)
+                raise
+
+        def remove_mod(name):
+            with trace_span(name, "mod", action="remove"):
+                safe_remove_item(instance_gamedata / name)
+
+        # Remove mods that are not part of this profile (stock folders are kept)
+        failed_removals = []
+        with trace_span("remove", mods=0 if staged else len(plan["remove"])):
+            for name, result, error in engine.run_per_mod(remove_mod, [] if staged else plan["remove"], cancel_event):
+                if isinstance(error, OperationCancelled):
+                    continue
+                if error:
+                    failed_removals.append((name, error))
+                else:
+                    deployed_mods.pop(name, None)
+                    status_callback(f"Removed {name}")
+        if failed_removals or (cancel_event is not None and cancel_event.is_set()):
+            if staged:
+                safe_remove_item(target_root)
+            save_deployment(instance, {"profile": deployment.get("profile"), "mods": deployed_mods})
+            check_cancelled(cancel_event)
+            name, e = failed_removals[0]
+            raise OperationError(f"Failed to remove {name}: {e}")
+
+        status_callback(f"Applying mods to GameData ({len(plan['copy'])} new, {len(plan['update'])} changed)...")
+        previous_modes = {name: deployed_mods.get(name, {}).get("used", mode) for name in plan["details"]}
+        # Pinned versions were planned from their manifests; build the checkouts they are deployed from
+        for mod_name in plan["copy"] + plan["update"]:
+            details = plan["details"][mod_name]
+            if details["manifest"] is not None:
+                materialize_version(details["manifest"], details["source"])
+
+        def deploy_mod(mod_name):
+            step = f"mod:{mod_name}"
+            details = plan["details"][mod_name]
+            target_path = target_root / mod_name
+            # Files the plan found with the right content only need the cached mtime
+            for rel in details["touch_files"]:
+                mtime = details["entries"][rel][1]
+                os.utime(mod_file_path(target_path, rel), ns=(mtime, mtime))
+            if mod_name in plan["keep"]:
+                return previous_modes[mod_name]
+            if journal.is_done(step):
+                return journal.result(step)
+            on_file = journal_file_callback(journal, step, target_path)
+            # Files an interrupted run checkpointed are only copied again if they didn't end up complete
+            done_files = set()
+            for rel in journal.files_done(step):
+                file_path = mod_file_path(target_path, rel)
+                if rel in details["entries"] and file_path.is_file() and file_path.stat().st_size == details["entries"][rel][0]:
+                    done_files.add(rel)
+            copy_files = [rel for rel in details["copy_files"] if rel not in done_files]
+            with trace_span(mod_name, "mod", action="copy" if mod_name in plan["copy"] else "update",
+                            files=len(copy_files), bytes=sum(details["entries"][rel][0] for rel in copy_files),
+                            deleted=len(details["delete_files"])) as span:
+                if mod_name in plan["copy"] and (not done_files or mode == "symlink"):
+                    used_mode = deploy_item(details["source"], target_path, mode, on_file)
+                else:
+                    used_mode = mode if mod_name in plan["copy"] else previous_modes[mod_name]
+                    sync_mod_files(details["source"], target_path, copy_files, details["delete_files"], used_mode, on_file)
+                span.set(mode=used_mode)
+            journal.mark_done(step, used_mode)
+            return used_mode
+
+        applied_count = 0
+        errors = {}
+        with trace_span("deploy", mods=len(plan["copy"]) + len(plan["update"])):
+            for mod_name, used_mode, error in engine.run_per_mod(deploy_mod, [m for m in plan["mods"] if m in plan["details"]],
+                                                                 cancel_event):
+                if isinstance(error, OperationCancelled):
+                    continue
+                if error:
+                    # Carry on with the other mods instead of stopping completely
+                    deployed_mods.pop(mod_name, None)
+                    errors[mod_name] = str(error)
+                    status_callback(f"Failed to apply {mod_name}: {error}")
+                    continue
+                deployed_mods[mod_name] = {"mode": mode, "used": used_mode, "files": plan["details"][mod_name]["entries"]}
+                applied_count += 1
+                if mod_name not in plan["keep"]:
+                    status_callback(f"Applied {mod_name}" + (f" (copied, {mode} failed)" if used_mode != mode else ""))
+
+        cancelled = cancel_event is not None and cancel_event.is_set()
+        if not (cancelled or errors or resume):
+            record_apply_throughput(instance, mode, work_bytes, file_operations, time.perf_counter() - work_started)
+        if staged:
+            if cancelled or errors:
+                safe_remove_item(target_root)
+                check_cancelled(cancel_event)
+                mod_name, error = next(iter(errors.items()))
+                raise OperationError(f"Failed to apply {mod_name}: {error}\n\n"
+                                     f"GameData was left unchanged ({len(errors)} mod(s) failed).")
+            status_callback("Swapping in the new GameData...")
+            try:
+                with trace_span("swap"):
+                    swap_gamedata(instance_path)
+            except OSError as e:
+                safe_remove_item(target_root)
+                raise OperationError(f"Could not swap in the new GameData (is KSP still running?): {e}")
+            save_deployment(instance, replaced_deployment, previous=True)
+            journal.mark_done("swap")
+        save_deployment(instance, {
+            "profile": deployment.get("profile") if cancelled else profile_name,
+            "mods": {name: entry for name, entry in deployed_mods.items() if name in plan["details"] or cancelled},
+            "mod_set": None if cancelled or errors else mod_set,
+        })
+        check_cancelled(cancel_event)
+        mark_gamedata_synced(instance, [name for name, version in map(parse_mod_ref, mods_to_apply)
+                                        if version is None and name in deployed_mods])
+
+        if load_cache and not errors:
+            try:
+                if restore_load_cache(instance, instance_path, profile_name, mod_set):
+                    status_callback("Restored the ModuleManager cache, so KSP can skip patching on its next start")
+            except Exception as e:
+                status_callback(f"Warning: Could not restore the ModuleManager cache: {e}")
+
+        # Update the active profile
+        update_instance(instance, active_profile=profile_name)
+
+        unchanged = len(plan["keep"])
+        if applied_count == len(mods_to_apply):
+            status_callback(f"Profile '{profile_name}' applied successfully with {applied_count} mod(s) ({unchanged} unchanged).")
+        else:
+            status_callback(f"Profile '{profile_name}' partially applied: {applied_count}/{len(mods_to_apply)} mod(s).")
+
+        return {
+            "profile": profile_name,
+            "applied": applied_count,
+            "total": len(mods_to_apply),
+            "unchanged": unchanged,
+            "missing": plan["missing"],
+            "errors": errors,
+        }
+    finally:
+        journal.finish()
+
+def stage_gamedata(instance_gamedata, staging, plan, journal, cancel_event=None, resuming=False):
+    """Start a staged GameData with links to everything an apply keeps (stock folders, unchanged mods).
+
+    When resuming, entries the journal already staged are left as they are.
+    """
+    if not resuming and (staging.exists() or is_link(staging)):
+        safe_remove_item(staging)
+    staging.mkdir(exist_ok=True)
+    carried = [item.name for item in instance_gamedata.iterdir()
+               if item.name not in plan["remove"] and item.name not in plan["copy"]]
+
+    def stage(name):
+        step = f"stage:{name}"
+        if journal.is_done(step):
             return
+        target = staging / name
+        if target.exists() or is_link(target):
+            # Left half-cloned by an interrupted run
+            safe_remove_item(target)
+        clone_item(instance_gamedata / name, target)
+        journal.mark_done(step, sync=False)
+
+    for name, _, error in get_file_engine().run_per_mod(stage, carried, cancel_event):
+        if error:
+            raise error
+
+def repair_interrupted_swap(instance_path):
+    """Finish a GameData swap that was cut off between its renames; returns True if one was"""
+    instance_gamedata = instance_path / "GameData"
+    staging = instance_path / STAGED_GAMEDATA_NAME
+    if not instance_gamedata.exists() and staging.exists() and (instance_path / PREVIOUS_GAMEDATA_NAME).exists():
+        os.rename(staging, instance_gamedata)
+        return True
+    return False
+
+def previous_gamedata_changes(instance):
+    """Return the files of GameData.previous that no longer match its deployment record.
 
-    status_callback("Applying mods to GameData...")
+    The staged apply that kept it hardlinked the files it didn't change into
+    the new GameData, so writing to one of those in place changes both. Files
+    are compared by size and mtime, and by hash where the record has one.
+    Returns relative paths such as 'Mod/Parts/part.cfg'.
+    """
+    previous = Path(load_instances()[instance]['path']) / PREVIOUS_GAMEDATA_NAME
+    changed = []
+    for mod_name, entry in load_deployment(instance, previous=True).get("mods", {}).items():
+        mod_path = previous / mod_name
+        if entry.get("used") == "symlink" or is_link(mod_path):
+            continue
+        for rel, (size, mtime, digest) in entry.get("files", {}).items():
+            file_path = mod_file_path(mod_path, rel)
+            try:
+                st = os.stat(file_path)
+                if [st.st_size, st.st_mtime_ns] == [size, mtime]:
+                    continue
+                if st.st_size == size and digest and file_hash(file_path) == digest:
+                    continue
+            except OSError:
+                pass
+            changed.append(f"{mod_name}/{rel}" if rel else mod_name)
+    return changed
+
+def rollback_gamedata(instance, status_callback=None, force=False):
+    """Swap GameData.previous back in after a staged apply; the replaced tree becomes GameData.previous.
+
+    Unless forced, raises OperationError if GameData.previous was changed
+    after the apply (see previous_gamedata_changes()).
+    Returns the profile that is active after the rollback (None if unknown).
+    """
+    instances = load_instances()
+    instance_path = Path(instances[instance]['path'])
+    instance_gamedata = instance_path / "GameData"
+    repair_interrupted_swap(instance_path)
+    previous = instance_path / PREVIOUS_GAMEDATA_NAME
+    if not previous.exists():
+        raise OperationError(f"There is no previous GameData to roll back to in {instance_path}.")
+    if not force:
+        changed = previous_gamedata_changes(instance)
+        if changed:
+            raise OperationError(f"{len(changed)} file(s) of the previous GameData were changed after the apply, "
+                                 f"through the current GameData they are shared with, e.g. {changed[0]}. "
+                                 "Rolling back would not bring back how they were.")
+
+    if status_callback:
+        status_callback("Rolling back to the previous GameData...")
+    parked = instance_path / STAGED_GAMEDATA_NAME
+    if parked.exists() or is_link(parked):
+        safe_remove_item(parked)
+    try:
+        os.rename(instance_gamedata, parked)
+        try:
+            os.rename(previous, instance_gamedata)
+        except OSError:
+            os.rename(parked, instance_gamedata)
+            raise
+        os.rename(parked, previous)
+    except OSError as e:
+        raise OperationError(f"Could not roll back GameData (is KSP still running?): {e}")
+
+    current, restored = load_deployment(instance), load_deployment(instance, previous=True)
+    save_deployment(instance, restored)
+    save_deployment(instance, current, previous=True)
+    update_instance(instance, active_profile=restored.get("profile"))
+    mark_gamedata_synced(instance)
+    if status_callback:
+        status_callback("Rolled back to the previous GameData"
+                        + (f" (profile '{restored['profile']}')." if restored.get("profile") else "."))
+    return restored.get("profile")
+
+def storage_device(path):
+    """Return an id for the disk holding path, so batch work on different disks can overlap.
+
+    On Linux partitions are traced back to their disk through /sys; elsewhere
+    (and for filesystems without a block device) the filesystem id is used.
+    """
+    dev = os.stat(path).st_dev
+    if sys.platform.startswith("linux"):
+        try:
+            block = Path(f"/sys/dev/block/{os.major(dev)}:{os.minor(dev)}").resolve(strict=True)
+            return block.parent.name if (block / "partition").exists() else block.name
+        except OSError:
+            pass
+    return str(dev)
+
+def apply_batch(targets, status_callback, cancel_event=None, per_device=None):
+    """Apply a profile to each of several instances; targets maps instance -> profile.
+
+    Instances are grouped by the disk they live on. Up to per_device (the
+    batch_per_device setting) are applied at a time on each disk, while
+    different disks are worked on side by side. A failed instance doesn't stop
+    the others. Returns {instance: {profile, device, ok, seconds, and the
+    apply_profile result or the error}}.
+    """
+    per_device = max(1, int(per_device or load_settings()["batch_per_device"]))
+    instances = load_instances()
+    results = {}
+    pending = collections.defaultdict(collections.deque)  # device -> (instance, profile) still to apply
+    for instance, profile_name in targets.items():
+        try:
+            if instance not in instances:
+                raise OperationError(f"Unknown instance: {instance}")
+            pending[storage_device(instances[instance]['path'])].append((instance, profile_name))
+        except (OSError, OperationError) as e:
+            results[instance] = {"profile": profile_name, "device": None, "ok": False, "seconds": 0, "error": str(e)}
+    lock = threading.Lock()
+
+    def work_through(device):
+        while True:
+            with lock:
+                if not pending[device]:
+                    return
+                instance, profile_name = pending[device].popleft()
+            entry = {"profile": profile_name, "device": device}
+            started = time.time()
+            try:
+                check_cancelled(cancel_event)
+                entry["result"] = apply_profile(instance, profile_name, lambda msg: status_callback(f"[{instance}] {msg}"),
+                                                cancel_event)
+                entry["ok"] = True
+            except OperationCancelled:
+                entry.update(ok=False, cancelled=True, error="Cancelled")
+            except Exception as e:
+                entry.update(ok=False, error=str(e))
+            entry["seconds"] = round(time.time() - started, 2)
+            with lock:
+                results[instance] = entry
+            status_callback(f"[{instance}] " + ("Done" if entry["ok"] else f"Failed: {entry['error']}"))
+
+    # Each batch thread runs whole applies, which wait on the file engine's pools, so they get their own threads
+    runners = [device for device in pending for _ in range(min(per_device, len(pending[device])))]
+    status_callback(f"Applying to {sum(len(queued) for queued in pending.values())} instance(s) "
+                    f"on {len(pending)} disk(s)...")
+    if runners:
+        with ThreadPoolExecutor(len(runners), thread_name_prefix="batch") as pool:
+            for future in [pool.submit(work_through, device) for device in runners]:
+                future.result()
+    applied = sum(1 for entry in results.values() if entry["ok"])
+    status_callback(f"Batch apply finished: {applied} of {len(targets)} instance(s) applied.")
+    return results
+
+def format_size(num_bytes):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if num_bytes < 1024 or unit == "GB":
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+def load_snapshot(name):
+    try:
+        with open(SNAPSHOTS_DIR / f"{name}.json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def list_snapshots(instance=None):
+    """Return the incremental backups (newest first), optionally only those of one instance"""
+    if not SNAPSHOTS_DIR.exists():
+        return []
+    snapshots = [load_snapshot(p.stem) for p in SNAPSHOTS_DIR.glob("*.json")]
+    snapshots = [s for s in snapshots if s and (instance is None or s["instance"] == instance)]
+    return sorted(snapshots, key=lambda s: s["created"], reverse=True)
+
+def create_snapshot(instance, instance_gamedata, name, profile_name=None, status_callback=None, cancel_event=None):
+    """Back up GameData as a snapshot manifest over a shared, deduplicated object store.
+
+    Files whose size and mtime match the instance's previous snapshot reuse its
+    hash without being read; everything else is hashed and only stored if the
+    content isn't in the store yet. Returns the snapshot manifest path.
+    """
+    previous = next(iter(list_snapshots(instance)), None)
+    known = previous["files"] if previous else {}
+
+    if status_callback:
+        status_callback("Scanning GameData for changes...")
+    with trace_span("scan"):
+        files = scan_mod_files(instance_gamedata)
+        dirs = []
+        for dirpath, dirnames, filenames in os.walk(instance_gamedata):
+            for dirname in dirnames:
+                dirs.append(os.path.relpath(os.path.join(dirpath, dirname), instance_gamedata).replace(os.sep, "/"))
+
+    entries = {}
+    changed = []
+    written = []
+
+    def add_file(rel, size, mtime):
+        check_cancelled(cancel_event)
+        prev = known.get(rel)
+        if prev and prev[1:] == [size, mtime] and object_path(prev[0], BACKUP_OBJECTS_DIR).exists():
+            digest = prev[0]
+        else:
+            file_path = instance_gamedata / rel
+            digest = file_hash(file_path)
+            changed.append(rel)
+            if store_put_file(file_path, digest, objects_dir=BACKUP_OBJECTS_DIR):
+                written.append(size)
+        entries[rel] = [digest, size, mtime]
+
+    if status_callback:
+        status_callback(f"Backing up {len(files)} file(s)...")
+    with trace_span("store", files=len(files)) as span:
+        get_file_engine().run_files(add_file, ((rel, size, mtime) for rel, (size, mtime) in files.items()))
+        span.set(hashed=len(changed), stored=len(written), bytes=sum(written))
+
+    snapshot = {
+        "name": name,
+        "instance": instance,
+        "profile": profile_name,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "files": entries,
+        "dirs": sorted(dirs),
+    }
+    SNAPSHOTS_DIR.mkdir(parents=True, exist_ok=True)
+    snapshot_path = SNAPSHOTS_DIR / f"{name}.json"
+    tmp_path = snapshot_path.with_suffix(".tmp")
+    with trace_span("manifest"), open(tmp_path, 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, snapshot_path)
+
+    if status_callback:
+        status_callback(f"Backup '{name}' complete: {len(entries)} file(s), {len(changed)} changed, "
+                        f"{format_size(sum(written))} written.")
+    return snapshot_path
+
+class ZipStreamWriter:
+    """Minimal ZIP64-capable zip writer for members whose data is prepared elsewhere.
+
+    zipfile can't take data that was compressed ahead of time, which is what
+    lets backups deflate members on several cores at once.
+    """
+    def __init__(self, fp):
+        self.fp = fp
+        self.central = []
+
+    @staticmethod
+    def _dos_datetime(mtime):
+        t = time.localtime(max(mtime, 315532800))  # zip dates start in 1980
+        return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+    def _write_header(self, name, mtime, method, crc, size, comp_size):
+        offset = self.fp.tell()
+        dos_time, dos_date = self._dos_datetime(mtime)
+        zip64 = size >= ZIP64_LIMIT or comp_size >= ZIP64_LIMIT
+        extra = struct.pack("<HHQQ", 1, 16, size, comp_size) if zip64 else b""
+        self.fp.write(struct.pack("<IHHHHHIIIHH", 0x04034b50, 45 if zip64 else 20, 0x800, method,
+                                  dos_time, dos_date, crc,
+                                  0xFFFFFFFF if zip64 else comp_size, 0xFFFFFFFF if zip64 else size,
+                                  len(name), len(extra)))
+        self.fp.write(name)
+        self.fp.write(extra)
+        return offset, zip64, (dos_time, dos_date)
+
+    def add_dir(self, arcname, mtime):
+        name = (arcname.rstrip("/") + "/").encode("utf-8")
+        offset, zip64, dos = self._write_header(name, mtime, 0, 0, 0, 0)
+        self.central.append((name, 0, dos, 0, 0, 0, offset, 0x10))
+
+    def add_compressed(self, arcname, mtime, crc, size, comp_size, data):
+        """Add a deflated member from a file object holding its raw deflate stream"""
+        name = arcname.encode("utf-8")
+        offset, zip64, dos = self._write_header(name, mtime, 8, crc, size, comp_size)
+        shutil.copyfileobj(data, self.fp, HASH_CHUNK_SIZE)
+        self.central.append((name, 8, dos, crc, size, comp_size, offset, 0))
+
+    def add_stored(self, arcname, mtime, path, size):
+        """Stream a file in uncompressed, patching its CRC into the header afterwards"""
+        name = arcname.encode("utf-8")
+        offset, zip64, dos = self._write_header(name, mtime, 0, 0, size, size)
+        crc = 0
+        written = 0
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                crc = zlib.crc32(chunk, crc)
+                written += len(chunk)
+                self.fp.write(chunk)
+        end = self.fp.tell()
+        self.fp.seek(offset + 14)
+        if zip64:
+            self.fp.write(struct.pack("<I", crc))
+            self.fp.seek(offset + 30 + len(name) + 4)
+            self.fp.write(struct.pack("<QQ", written, written))
+        else:
+            self.fp.write(struct.pack("<III", crc, written, written))
+        self.fp.seek(end)
+        self.central.append((name, 0, dos, crc, written, written, offset, 0))
+
+    def close(self):
+        cd_offset = self.fp.tell()
+        for name, method, (dos_time, dos_date), crc, size, comp_size, offset, external_attr in self.central:
+            zip64_fields = [value for value in (size, comp_size, offset) if value >= ZIP64_LIMIT]
+            extra = struct.pack(f"<HH{len(zip64_fields)}Q", 1, 8 * len(zip64_fields), *zip64_fields) if zip64_fields else b""
+            version = 45 if zip64_fields else 20
+            self.fp.write(struct.pack("<IHHHHHHIIIHHHHHII", 0x02014b50, version, version, 0x800, method,
+                                      dos_time, dos_date, crc,
+                                      *(0xFFFFFFFF if value >= ZIP64_LIMIT else value for value in (comp_size, size)),
+                                      len(name), len(extra), 0, 0, 0, external_attr,
+                                      0xFFFFFFFF if offset >= ZIP64_LIMIT else offset))
+            self.fp.write(name)
+            self.fp.write(extra)
+        cd_end = self.fp.tell()
+        cd_size = cd_end - cd_offset
+        count = len(self.central)
+        zip64 = count >= 0xFFFF or cd_size >= ZIP64_LIMIT or cd_offset >= ZIP64_LIMIT
+        if zip64:
+            self.fp.write(struct.pack("<IQHHIIQQQQ", 0x06064b50, 44, 45, 45, 0, 0, count, count, cd_size, cd_offset))
+            self.fp.write(struct.pack("<IIQI", 0x07064b50, 0, cd_end, 1))
+        self.fp.write(struct.pack("<IHHHHIIH", 0x06054b50, 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+                                  0xFFFFFFFF if zip64 else cd_size, 0xFFFFFFFF if zip64 else cd_offset, 0))
+
+def deflate_member(path, level, spool_dir):
+    """Deflate one file into a spooled temp file; returns (crc, size, compressed size, spool)"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    spool = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_SIZE, dir=spool_dir)
+    crc = 0
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            spool.write(compressor.compress(chunk))
+    spool.write(compressor.flush())
+    comp_size = spool.tell()
+    spool.seek(0)
+    return crc, size, comp_size, spool
+
+def write_zip_backup(source_dir, backup_path, compression="default", status_callback=None, cancel_event=None):
+    """Zip source_dir into backup_path, deflating members on every core.
+
+    Files with already-compressed formats (and anything that doesn't shrink)
+    are stored as-is. Members are streamed through temp files that stay in
+    memory only while small, and the archive only appears once complete.
+    """
+    level = ZIP_COMPRESSION_LEVELS[compression]
+    members = []
+    for dirpath, dirnames, filenames in os.walk(source_dir):
+        dirnames.sort()
+        rel_dir = os.path.relpath(dirpath, source_dir).replace(os.sep, "/")
+        if rel_dir != ".":
+            members.append((dirpath, rel_dir, True))
+        for name in sorted(filenames):
+            members.append((os.path.join(dirpath, name), name if rel_dir == "." else f"{rel_dir}/{name}", False))
+
+    workers = os.cpu_count() or 4
+    tmp_path = backup_path.with_name(backup_path.name + ".tmp")
+    pending = collections.deque()
+    written = 0
+    try:
+        with open(tmp_path, 'wb') as fp, ThreadPoolExecutor(workers, thread_name_prefix="zip") as pool:
+            writer = ZipStreamWriter(fp)
+
+            def write_next():
+                path, arcname, st, future = pending.popleft()
+                if future is None:
+                    writer.add_stored(arcname, st.st_mtime, path, st.st_size)
+                    return
+                crc, size, comp_size, spool = future.result()
+                with spool:
+                    if comp_size < size:
+                        writer.add_compressed(arcname, st.st_mtime, crc, size, comp_size, spool)
+                    else:
+                        writer.add_stored(arcname, st.st_mtime, path, size)
+
+            for path, arcname, is_dir in members:
+                check_cancelled(cancel_event)
+                st = os.stat(path)
+                if is_dir:
+                    # Directories wait their turn so the archive keeps walk order
+                    while pending:
+                        write_next()
+                    writer.add_dir(arcname, st.st_mtime)
+                    continue
+                stored = level is None or os.path.splitext(path)[1].lower() in STORED_EXTENSIONS
+                future = None if stored else pool.submit(deflate_member, path, level, backup_path.parent)
+                pending.append((path, arcname, st, future))
+                # Bound the read-ahead so only a few members are ever in flight
+                while len(pending) > workers * 2:
+                    write_next()
+                written += 1
+                if status_callback and written % 500 == 0:
+                    status_callback(f"Compressing GameData: {written}/{len(members)} entries...")
+            while pending:
+                write_next()
+            writer.close()
+        os.replace(tmp_path, backup_path)
+    except BaseException:
+        for _, _, _, future in pending:
+            if future is not None:
+                future.cancel()
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+    return backup_path
+
+def backup_gamedata(instance, profile_name=None, status_callback=None, cancel_event=None):
+    """Back up an instance's GameData into BACKUPS_DIR and return the backup's path.
+
+    Uses an incremental snapshot unless the backup_format setting asks for a zip.
+    """
+    reload_file_engine()
+    instances = load_instances()
+    instance_path = Path(instances[instance]['path'])
+    instance_gamedata = instance_path / "GameData"
     
-    # Copy mods from mods directory to GameData
-    applied_count = 0
-    for mod_name in mods_to_apply:
-        mod_path = MODS_DIR / mod_name
-        target_path = instance_gamedata / mod_name
+    if not instance_gamedata.exists():
+        raise OperationError(f"GameData folder not found: {instance_gamedata}")
+        
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    profile_part = f"-{profile_name}" if profile_name else ""
+    if load_settings()["backup_format"] != "zip":
+        return create_snapshot(instance, instance_gamedata, f"{instance}{profile_part}-{timestamp}",
+                               profile_name, status_callback, cancel_event)
+
+    backup_path = BACKUPS_DIR / f"{instance}{profile_part}-{timestamp}.zip"
+    
+    compression = load_settings()["backup_compression"]
+    if compression not in ZIP_COMPRESSION_LEVELS:
+        compression = DEFAULT_SETTINGS["backup_compression"]
+    if status_callback:
+        status_callback(f"Backing up GameData ({compression} compression)...")
+    try:
+        with trace_span("zip", compression=compression):
+            write_zip_backup(instance_gamedata, backup_path, compression, status_callback, cancel_event)
+    except OperationCancelled:
+        raise
+    except Exception as e:
+        raise OperationError(f"Failed to create backup: {e}")
+    if status_callback:
+        status_callback(f"GameData backed up to: {backup_path.name}")
+    return backup_path
+
+def list_backups(instance=None):
+    """Return the zip and snapshot backups (newest first), optionally only those of one instance"""
+    backups = []
+    for snapshot in list_snapshots(instance):
+        backups.append({"name": snapshot["name"], "kind": "snapshot", "created": snapshot["created"],
+                        "path": SNAPSHOTS_DIR / f"{snapshot['name']}.json"})
+    if BACKUPS_DIR.exists():
+        for path in BACKUPS_DIR.glob("*.zip"):
+            if instance is None or path.stem.startswith(f"{instance}-"):
+                created = datetime.fromtimestamp(path.stat().st_mtime).isoformat(timespec="seconds")
+                backups.append({"name": path.stem, "kind": "zip", "created": created, "path": path})
+    return sorted(backups, key=lambda b: b["created"], reverse=True)
+
+def read_backup_contents(backup):
+    """Return ({relative path: (size, member)}, [relative folders]) for a backup.
+
+    member is the ZipInfo for zip backups and the [hash, size, mtime] entry for snapshots.
+    """
+    if backup["kind"] == "snapshot":
+        snapshot = load_snapshot(backup["name"])
+        if snapshot is None:
+            raise OperationError(f"Backup not found: {backup['name']}")
+        return {rel: (entry[1], entry) for rel, entry in snapshot["files"].items()}, snapshot["dirs"]
+
+    files = {}
+    dirs = []
+    with zipfile.ZipFile(backup["path"]) as zf:
+        for info in zf.infolist():
+            name = info.filename.replace("\\", "/")
+            parts = name.rstrip("/").split("/")
+            # Never write outside GameData, whatever the archive says
+            if name.startswith("/") or ".." in parts or ":" in parts[0]:
+                continue
+            if info.is_dir():
+                dirs.append(name.rstrip("/"))
+            else:
+                files[name] = (info.file_size, info)
+    return files, dirs
+
+def backup_top_level_entries(backup):
+    files, dirs = read_backup_contents(backup)
+    return sorted({rel.split("/", 1)[0] for rel in list(files) + dirs}, key=natural_sort_key)
+
+def restore_backup(instance, backup, selected=None, status_callback=None, cancel_event=None):
+    """Restore a backup into an instance's GameData, either fully or only the selected top-level folders.
+
+    Everything is rebuilt in a staging folder next to GameData first: files that
+    already match the backup are hardlinked from GameData instead of extracted,
+    the rest are extracted in parallel. The staged folders are then swapped in
+    with renames, so GameData never holds a half-restored mod.
+    """
+    reload_file_engine()
+    instances = load_instances()
+    instance_path = Path(instances[instance]['path'])
+    instance_gamedata = instance_path / "GameData"
+    if not instance_gamedata.exists():
+        raise OperationError(f"GameData folder not found: {instance_gamedata}")
+
+    if status_callback:
+        status_callback(f"Reading backup '{backup['name']}'...")
+    files, dirs = read_backup_contents(backup)
+    top_level = {rel.split("/", 1)[0] for rel in list(files) + dirs}
+    targets = top_level if selected is None else top_level & set(selected)
+    if not targets:
+        raise OperationError("Nothing to restore: the selected folders are not in this backup.")
+
+    staging = instance_path / RESTORE_STAGING_NAME
+    if staging.exists() or is_link(staging):
+        safe_remove_item(staging)
+    stage_root = staging / "GameData"
+    stage_root.mkdir(parents=True)
+    for rel in dirs:
+        if rel.split("/", 1)[0] in targets:
+            (stage_root / rel).mkdir(parents=True, exist_ok=True)
+
+    zip_handles = []
+    local = threading.local()
+    reused = []
+    extracted = []
+
+    def open_zip():
+        # One handle per worker so members are really read in parallel
+        if not hasattr(local, "zf"):
+            local.zf = zipfile.ZipFile(backup["path"])
+            zip_handles.append(local.zf)
+        return local.zf
+
+    def matches(current, size, member):
+        try:
+            st = os.stat(current)
+        except OSError:
+            return False
+        if not stat.S_ISREG(st.st_mode) or st.st_size != size:
+            return False
+        if backup["kind"] == "snapshot":
+            return st.st_mtime_ns == member[2] or file_hash(current) == member[0]
+        crc = 0
+        with open(current, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                crc = zlib.crc32(chunk, crc)
+        return crc == member.CRC
+
+    def restore_file(rel, size, member):
+        check_cancelled(cancel_event)
+        current = instance_gamedata / rel
+        staged = stage_root / rel
+        staged.parent.mkdir(parents=True, exist_ok=True)
+        if matches(current, size, member):
+            try:
+                os.link(current, staged)
+                reused.append(rel)
+                return
+            except OSError:
+                pass
+        if backup["kind"] == "snapshot":
+            fast_copy_file(object_path(member[0], BACKUP_OBJECTS_DIR), staged)
+            os.utime(staged, ns=(member[2], member[2]))
+        else:
+            with open_zip().open(member) as src, open(staged, 'wb') as dst:
+                shutil.copyfileobj(src, dst, HASH_CHUNK_SIZE)
+            mtime = time.mktime(member.date_time + (0, 0, -1))
+            os.utime(staged, (mtime, mtime))
+        extracted.append(size)
 
-        if not mod_path.exists():
-            messagebox.showwarning("Missing Mod", f"Mod not found in 'mods' folder: {mod_name}")
-            continue
+    to_restore = [(rel, size, member) for rel, (size, member) in files.items() if rel.split("/", 1)[0] in targets]
+    if status_callback:
+        status_callback(f"Restoring {len(to_restore)} file(s) from '{backup['name']}'...")
+    try:
+        get_file_engine().run_files(restore_file, to_restore)
+    except BaseException:
+        safe_remove_item(staging)
+        raise
+    finally:
+        for zf in zip_handles:
+            zf.close()
 
+    if status_callback:
+        status_callback("Swapping restored folders into GameData...")
+    if selected is None:
+        # Full restore: keep stock folders the backup doesn't have, then swap the whole folder
+        moved_stock = [item.name for item in instance_gamedata.iterdir()
+                       if item.name in STOCK_FOLDERS and item.name not in targets]
+        for name in moved_stock:
+            os.rename(instance_gamedata / name, stage_root / name)
+        old_gamedata = staging / "GameData.old"
         try:
-            status_callback(f"Applying {mod_name}...")
-            safe_copy_item(mod_path, target_path)
-            applied_count += 1
-            status_callback(f"Applied {mod_name}")
-        except Exception as e:
-            messagebox.showerror("Copy Error", f"Failed to apply {mod_name}: {e}")
-            # Continue with other mods instead of stopping completely
-            continue
-
-    # Update the active profile
-    instances[instance]['active_profile'] = profile_name
-    save_instances(instances)
-    
-    if applied_count == len(mods_to_apply):
-        status_callback(f"Profile '{profile_name}' applied successfully with {applied_count} mod(s).")
+            os.rename(instance_gamedata, old_gamedata)
+            os.rename(stage_root, instance_gamedata)
+        except OSError:
+            if old_gamedata.exists() and not instance_gamedata.exists():
+                os.rename(old_gamedata, instance_gamedata)
+            for name in moved_stock:
+                os.rename(stage_root / name, instance_gamedata / name)
+            raise
     else:
-        status_callback(f"Profile '{profile_name}' partially applied: {applied_count}/{len(mods_to_apply)} mod(s).")
-    
-    messagebox.showinfo("Apply Complete", f"Applied {applied_count} out of {len(mods_to_apply)} mods from profile '{profile_name}'.")
+        old_root = staging / "old"
+        old_root.mkdir()
+        for name in sorted(targets):
+            current = instance_gamedata / name
+            if current.exists() or is_link(current):
+                os.rename(current, old_root / name)
+            try:
+                os.rename(stage_root / name, current)
+            except OSError:
+                if (old_root / name).exists():
+                    os.rename(old_root / name, current)
+                raise
+    safe_remove_item(staging)
 
-def backup_gamedata(instance, profile_name=None):
-    instances = load_instances()
-    instance_path = Path(instances[instance]['path'])
-    instance_gamedata = instance_path / "GameData"
-    
-    if not instance_gamedata.exists():
-        messagebox.showerror("Error", f"GameData folder not found: {instance_gamedata}")
-        return
-        
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    profile_part = f"-{profile_name}" if profile_name else ""
-    backup_path = BACKUPS_DIR / f"{instance}{profile_part}-{timestamp}.zip"
-    
-    try:
-        shutil.make_archive(str(backup_path).replace(".zip", ""), 'zip', instance_gamedata)
-        messagebox.showinfo("Backup Complete", f"GameData backed up to: {backup_path}")
-    except Exception as e:
-        messagebox.showerror("Backup Error", f"Failed to create backup: {e}")
+    if status_callback:
+        status_callback(f"Restored {len(targets)} folder(s) from '{backup['name']}': {len(extracted)} file(s) "
+                        f"extracted ({format_size(sum(extracted))}), {len(reused)} already up to date.")
+    return {"backup": backup["name"], "restored": sorted(targets, key=natural_sort_key),
+            "extracted": len(extracted), "reused": len(reused)}
+
+def prune_backup_objects():
+    """Delete backup objects that no snapshot refers to any more; returns how many were removed"""
+    referenced = set()
+    for snapshot in list_snapshots():
+        referenced.update(entry[0] for entry in snapshot["files"].values())
+    unreferenced = []
+    if BACKUP_OBJECTS_DIR.exists():
+        for bucket in BACKUP_OBJECTS_DIR.iterdir():
+            unreferenced.extend((obj,) for obj in bucket.iterdir() if obj.name not in referenced)
+    get_file_engine().run_files(safe_remove_item, unreferenced)
+    return len(unreferenced)
+
+def delete_backup(backup):
+    backup["path"].unlink()
+    if backup["kind"] == "snapshot":
+        prune_backup_objects()
 
 def save_profile(instance, profile_name, mods):
-    profile_path = PROFILES_DIR / instance
-    profile_path.mkdir(exist_ok=True)
-    mods_sorted = sorted(mods, key=natural_sort_key)
-    with open(profile_path / f"{profile_name}.json", 'w') as f:
-        json.dump(mods_sorted, f, indent=2)
+    get_profile_store().save(instance, profile_name, mods)
 
-def cleanup_unused_mods(status_callback=None):
-    """Remove mods from the mods folder that aren't referenced in any profile"""
+def find_unused_mods(status_callback=None):
+    """Return (unused mod names, pinned (mod, version) pairs) across the profiles of every instance"""
     if status_callback:
         status_callback("Scanning profiles for used mods...")
     
     # Get all mods referenced in all profiles
-    used_mods = set()
-    instances = load_instances()
-    
-    for instance_name in instances.keys():
-        profile_path = PROFILES_DIR / instance_name
-        if profile_path.exists():
-            for profile_file in profile_path.glob("*.json"):
-                try:
-                    with open(profile_file) as f:
-                        mods = json.load(f)
-                        used_mods.update(mods)
-                except Exception as e:
-                    if status_callback:
-                        status_callback(f"Warning: Could not read {profile_file}: {e}")
-    
-    # Get all mods in the mods folder
-    if not MODS_DIR.exists():
-        return
-    
-    existing_mods = set(item.name for item in MODS_DIR.iterdir() if item.is_dir() or item.is_file())
-    
-    # Find unused mods
-    unused_mods = existing_mods - used_mods
-    
-    if not unused_mods:
-        if status_callback:
-            status_callback("No unused mods found.")
-        return
-    
-    # Ask user for confirmation
-    unused_list = sorted(list(unused_mods), key=natural_sort_key)
-    message = f"Found {len(unused_mods)} unused mod(s) in the mods folder:\n\n"
-    message += "\n".join(unused_list[:10])  # Show first 10
-    if len(unused_list) > 10:
-        message += f"\n... and {len(unused_list) - 10} more"
-    message += "\n\nDelete these unused mods?"
-    
-    result = messagebox.askyesno("Clean Up Unused Mods", message, icon='question')
+    store = get_profile_store()
+    used_mods, pinned_refs = store.used_mods()
+    if status_callback:
+        for (instance_name, profile), error in sorted(store.errors.items()):
+            status_callback(f"Warning: Could not read {PROFILES_DIR / instance_name / f'{profile}.json'}: {error}")
     
-    if result:
+    # Find unused mods in the mods folder
+    get_mod_index().refresh(status_callback=status_callback)
+    unused_mods = set(list_cached_mods()) - used_mods
+    return sorted(unused_mods, key=natural_sort_key), pinned_refs
+
+def cleanup_unused_mods(unused_mods, pinned_refs, status_callback=None, cancel_event=None, resume=None):
+    """Remove the given unused mods from the mods folder, then compact the mod store.
+
+    Pass the OperationJournal of an interrupted cleanup as resume to finish it.
+    """
+    reload_file_engine()
+    if resume is not None:
+        unused_mods = [name for name in resume.params["unused"] if not resume.is_done(f"remove:{name}")]
+        pinned_refs = {tuple(ref) for ref in resume.params["pinned"]}
+    journal = OperationJournal.begin("cleanup", None, {"unused": list(unused_mods), "pinned": sorted(pinned_refs)},
+                                     [f"remove:{name}" for name in unused_mods], resume)
+    try:
         deleted_count = 0
-        for mod_name in unused_mods:
-            mod_path = MODS_DIR / mod_name
-            try:
-                if status_callback:
-                    status_callback(f"Removing unused mod: {mod_name}")
-                safe_remove_item(mod_path)
-                deleted_count += 1
-            except Exception as e:
-                if status_callback:
-                    status_callback(f"Failed to remove {mod_name}: {e}")
-                messagebox.showwarning("Removal Failed", f"Failed to remove {mod_name}: {e}")
-        
+        errors = {}
+
+        def remove_mod(name):
+            with trace_span(name, "mod", action="remove"):
+                safe_remove_item(MODS_DIR / name)
+            journal.mark_done(f"remove:{name}")
+
+        if unused_mods and status_callback:
+            status_callback(f"Removing {len(unused_mods)} unused mod(s)...")
+        with trace_span("remove", mods=len(unused_mods)):
+            for mod_name, _, e in get_file_engine().run_per_mod(remove_mod, unused_mods, cancel_event):
+                if isinstance(e, OperationCancelled):
+                    continue
+                if e:
+                    errors[mod_name] = str(e)
+                    if status_callback:
+                        status_callback(f"Failed to remove {mod_name}: {e}")
+                else:
+                    if status_callback:
+                        status_callback(f"Removed unused mod: {mod_name}")
+                    deleted_count += 1
+        check_cancelled(cancel_event)
+
+        with trace_span("compact"):
+            versions_removed, objects_removed = compact_mod_store(pinned_refs, status_callback)
         if status_callback:
             status_callback(f"Cleanup complete. Removed {deleted_count} unused mod(s).")
-        messagebox.showinfo("Cleanup Complete", f"Successfully removed {deleted_count} unused mod(s).")
-    else:
-        if status_callback:
-            status_callback("Cleanup cancelled.")
+        return {
+            "removed": deleted_count,
+            "errors": errors,
+            "versions_removed": versions_removed,
+            "objects_removed": objects_removed,
+        }
+    finally:
+        journal.finish()
+
+def compare_with_cache(item, mod_name):
+    """Return the files of a GameData mod that differ from its copy in the mods folder.
+
+    Sizes and mtimes are compared first (the cached side comes from the mod
+    index); contents are only hashed when the sizes match but the mtimes don't.
+    A file hardlinked with its copy in the mods folder is checked against the
+    stored version instead, as both change together when it is edited in place.
+    Returns None if the mod isn't cached yet, otherwise a list of changed,
+    added and removed relative paths (empty when the mod is unchanged).
+    """
+    mod_path = MODS_DIR / mod_name
+    if not mod_path.exists():
+        return None
+    if is_linked_to(item, mod_path):
+        return []
+    if item.is_dir() != mod_path.is_dir():
+        return list(scan_mod_files(item))
+
+    game_files = scan_mod_files(item)
+    cached = get_mod_index().mod_files(mod_name)
+    head = current_mod_version(mod_name)
+    stored = (load_mod_version(mod_name, head) or {}).get("files", {}) if head else {}
+    changed = []
+    for rel, (size, mtime) in game_files.items():
+        game_file = mod_file_path(item, rel)
+        if rel in stored and shares_inode(game_file, mod_file_path(mod_path, rel)):
+            digest, *stats = stored[rel]
+            if stats != [size, mtime] and file_hash(game_file) != digest:
+                changed.append(rel)
+            continue
+        known = cached.get(rel)
+        if known and known[:2] == [size, mtime]:
+            continue
+        if known is None or known[0] != size:
+            changed.append(rel)
+            continue
+        if file_hash(game_file) != (known[2] or file_hash(mod_file_path(mod_path, rel))):
+            changed.append(rel)
+    changed.extend(rel for rel in cached if rel not in game_files)
+    return changed
+
+def update_profile(instance, profile_name, status_callback, cancel_event=None, resume=None):
+    """Save the mods currently in an instance's GameData as a profile, syncing them back to the mods folder.
 
-def update_profile(instance, profile_name, status_callback):
+    New mods are added to the mod store and mods changed in GameData get a new
+    version there holding only the changed files. Stock folders are never cached.
+
+    Pass the OperationJournal of an interrupted update as resume to finish it;
+    mods it was part way through adding to the mods folder are added again.
+    """
+    reload_file_engine()
     status_callback("Updating profile from GameData...")
     instances = load_instances()
     instance_path = Path(instances[instance]['path'])
     instance_gamedata = instance_path / "GameData"
 
     if not instance_gamedata.exists():
-        messagebox.showerror("Error", f"GameData folder not found: {instance_gamedata}")
-        return
+        raise OperationError(f"GameData folder not found: {instance_gamedata}")
 
     updated_mods = []
-    
-    # Process each item in GameData (except Squad)
-    for item in instance_gamedata.iterdir():
-        if item.name == "Squad":
-            continue
-            
-        mod_dest = MODS_DIR / item.name
-        
-        # If mod doesn't exist in mods folder, copy it there
-        if not mod_dest.exists():
-            try:
-                status_callback(f"Adding {item.name} to mods folder...")
-                safe_copy_item(item, mod_dest)
-            except Exception as e:
-                messagebox.showwarning("Copy Warning", f"Failed to copy {item.name} to mods folder: {e}")
+    new_mods = []
+    changed_mods = {}
+    unchanged_mods = []
+    errors = {}
+    unfinished = {step.split(":", 1)[1] for step in resume.header["steps"] if not resume.is_done(step)} if resume else set()
+
+    candidates = [item.name for item in instance_gamedata.iterdir()
+                  if item.name not in STOCK_FOLDERS and item.name not in MM_CACHE_FILES]
+    # Mods the folder watcher saw left alone since the last apply or update need no comparing
+    untouched = untouched_mods(instance, instance_gamedata) - unfinished
+    for mod_name in candidates:
+        if mod_name in untouched:
+            unchanged_mods.append(mod_name)
+            updated_mods.append(mod_name)
+    candidates = [name for name in candidates if name not in untouched]
+    status_callback(f"Comparing {len(candidates)} mod(s) with the mods folder"
+                    + (f" ({len(unchanged_mods)} untouched since the last apply)..." if unchanged_mods else "..."))
+    with trace_span("compare", mods=len(candidates), untouched=len(unchanged_mods)):
+        for mod_name, changes, e in get_file_engine().run_per_mod(lambda name: compare_with_cache(instance_gamedata / name, name),
+                                                                  candidates, cancel_event):
+            if isinstance(e, OperationCancelled):
                 continue
-        
-        updated_mods.append(item.name)
+            if e:
+                errors[mod_name] = f"Failed to compare {mod_name} with the mods folder: {e}"
+                status_callback(errors[mod_name])
+                if (MODS_DIR / mod_name).exists():
+                    updated_mods.append(mod_name)
+            elif changes is None or mod_name in unfinished:
+                new_mods.append(mod_name)
+            elif changes:
+                changed_mods[mod_name] = len(changes)
+            else:
+                unchanged_mods.append(mod_name)
+                updated_mods.append(mod_name)
+    check_cancelled(cancel_event)
 
-    updated_mods = sorted(updated_mods, key=natural_sort_key)
+    to_ingest = new_mods + list(changed_mods)
+    journal = OperationJournal.begin("update", instance, {"profile": profile_name},
+                                     [f"ingest:{name}" for name in to_ingest], resume)
 
-    # Check if profile exists and ask for confirmation
-    profile_file = PROFILES_DIR / instance / f"{profile_name}.json"
-    if profile_file.exists():
-        result = messagebox.askquestion(
-            "Overwrite Profile?",
-            f"Profile '{profile_name}' already exists. Do you want to overwrite it?",
-            icon='warning'
-        )
-        if result != 'yes':
-            status_callback("Update cancelled.")
-            return
+    def ingest(name):
+        with trace_span(name, "mod", action="changed" if name in changed_mods else "new"):
+            store_ingest_mod(instance_gamedata / name, name)
+        journal.mark_done(f"ingest:{name}")
 
-    # Save the updated profile
-    save_profile(instance, profile_name, updated_mods)
-    instances = load_instances()
-    instances[instance]['active_profile'] = profile_name
-    save_instances(instances)
-    
-    status_callback(f"Profile '{profile_name}' updated with {len(updated_mods)} mod(s).")
+    try:
+        if to_ingest:
+            status_callback(f"Syncing {len(new_mods)} new and {len(changed_mods)} changed mod(s) to the mods folder...")
+        with trace_span("sync", mods=len(to_ingest)):
+            for mod_name, _, e in get_file_engine().run_per_mod(ingest, to_ingest, cancel_event):
+                if isinstance(e, OperationCancelled):
+                    continue
+                if e:
+                    errors[mod_name] = f"Failed to copy {mod_name} to mods folder: {e}"
+                    status_callback(errors[mod_name])
+                    if mod_name in changed_mods:
+                        # The previous cached version is still there to use
+                        updated_mods.append(mod_name)
+                    continue
+                if mod_name in changed_mods:
+                    status_callback(f"Updated {mod_name} in mods folder ({changed_mods[mod_name]} file(s) changed)")
+                else:
+                    status_callback(f"Added {mod_name} to mods folder")
+                updated_mods.append(mod_name)
+        check_cancelled(cancel_event)
+
+        updated_mods = sorted(updated_mods, key=natural_sort_key)
+
+        # Save the updated profile
+        save_profile(instance, profile_name, updated_mods)
+        update_instance(instance, active_profile=profile_name)
+        mark_gamedata_synced(instance, [name for name in updated_mods if name not in errors])
+    finally:
+        journal.finish()
+
+    status_callback(f"Profile '{profile_name}' updated with {len(updated_mods)} mod(s): {len(new_mods)} new, "
+                    f"{len(changed_mods)} changed, {len(unchanged_mods)} unchanged.")
+    return {"profile": profile_name, "mods": updated_mods,
+            "added": sorted((m for m in new_mods if m not in errors), key=natural_sort_key),
+            "changed": {m: n for m, n in changed_mods.items() if m not in errors},
+            "unchanged": sorted(unchanged_mods, key=natural_sort_key), "errors": errors}
+
+def resume_operation(journal, status_callback, cancel_event=None):
+    """Carry on with the operation an unfinished journal belongs to"""
+    try:
+        if journal.operation == "apply":
+            return apply_profile(journal.instance, journal.params["profile"], status_callback, cancel_event, resume=journal)
+        if journal.operation == "update":
+            return update_profile(journal.instance, journal.params["profile"], status_callback, cancel_event, resume=journal)
+        if journal.operation == "cleanup":
+            return cleanup_unused_mods(None, None, status_callback, cancel_event, resume=journal)
+        raise OperationError(f"Unknown operation in journal {journal.path.name}: {journal.operation}")
+    finally:
+        journal.finish()
 
 def validate_ksp_installation(exe_path):
     """Validate that the selected executable is a valid KSP installation"""
@@ -681,7 +4300,130 @@ class Tooltip:
             self.tipwindow.destroy()
             self.tipwindow = None
 
+class Job:
+    """A long operation run off the Tk thread by JobRunner"""
+    def __init__(self, name, func, on_done=None):
+        self.name = name
+        self.func = func
+        self.on_done = on_done
+        self.cancel_event = threading.Event()
+        self.state = "queued"
+        self.status = ""
+        self.result = None
+        self.error = None
+        self.started = None
+        self.finished = None
+
+    @property
+    def duration(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+class JobRunner:
+    """Runs long operations on a worker thread and feeds their progress back to Tk.
+
+    Workers only ever put messages on a queue; the Tk thread drains it every
+    POLL_MS through root.after(), so widgets are never touched off the main thread.
+    Only one job runs at a time since they all work on the same folders.
+    """
+    POLL_MS = 100
+
+    def __init__(self, root, status_callback, on_change=None):
+        self.root = root
+        self.status_callback = status_callback
+        self.on_change = on_change
+        self.queue = queue.Queue()
+        self.current = None
+        self.history = []
+        self.root.after(self.POLL_MS, self.poll)
+
+    @property
+    def busy(self):
+        return self.current is not None
+
+    def start(self, name, func, on_done=None):
+        """Run func(status_callback, cancel_event) in the background; on_done(job) runs on Tk when it succeeds"""
+        if self.busy:
+            messagebox.showinfo("Busy", f"Please wait for '{self.current.name}' to finish or cancel it first.")
+            return None
+        job = Job(name, func, on_done)
+        job.state = "running"
+        job.started = time.time()
+        self.current = job
+        self.history.append(job)
+        threading.Thread(target=self._run, args=(job,), name=f"job-{name}", daemon=True).start()
+        self.status_callback(f"{name}...")
+        if self.on_change:
+            self.on_change()
+        return job
+
+    def post_status(self, message):
+        """Show a message from any thread that isn't running a job (the trash reaper)"""
+        self.queue.put(("status", None, message))
+
+    def cancel(self):
+        if self.current:
+            self.current.cancel_event.set()
+            self.status_callback(f"Cancelling '{self.current.name}'...")
+
+    def _run(self, job):
+        try:
+            result = run_traced(job.name, job.func, lambda msg: self.queue.put(("status", job, msg)), job.cancel_event)
+            self.queue.put(("done", job, result))
+        except OperationCancelled:
+            self.queue.put(("cancelled", job, None))
+        except Exception as e:
+            if DEBUG_MODE:
+                import traceback
+                traceback.print_exception(type(e), e, e.__traceback__)
+            self.queue.put(("failed", job, e))
+
+    def poll(self):
+        latest_status = None
+        try:
+            while True:
+                kind, job, payload = self.queue.get_nowait()
+                if kind == "status":
+                    if job is not None:
+                        job.status = payload
+                    latest_status = payload
+                else:
+                    if latest_status is not None:
+                        self.status_callback(latest_status)
+                        latest_status = None
+                    self._finish(job, kind, payload)
+        except queue.Empty:
+            pass
+        # Only the newest message is drawn; a busy job can report far faster than Tk repaints
+        if latest_status is not None:
+            self.status_callback(latest_status)
+        self.root.after(self.POLL_MS, self.poll)
+
+    def _finish(self, job, kind, payload):
+        job.finished = time.time()
+        job.state = kind
+        if self.current is job:
+            self.current = None
+        if kind == "done":
+            job.result = payload
+            if job.on_done:
+                job.on_done(job)
+        elif kind == "cancelled":
+            job.status = "Cancelled"
+            self.status_callback(f"'{job.name}' cancelled.")
+        else:
+            job.error = payload
+            job.status = str(payload)
+            self.status_callback(f"'{job.name}' failed: {payload}")
+            messagebox.showerror("Operation Failed", f"{job.name} failed:\n\n{payload}")
+        if self.on_change:
+            self.on_change()
+
 class App:
+    PLAN_POLL_MS = 50  # How often the main window checks whether the plan of the selected profile is ready
+    WATCH_UI_MS = 1000  # How often the main window looks at what the folder watcher has seen
+
     def __init__(self, root):
         self.root = root
         header_frame = tk.Frame(root)
@@ -725,7 +4467,8 @@ class App:
 
         btn_backup = tk.Button(actions_frame, text="Backup GameData", command=self.backup, width=UI_WIDTH, font=UI_FONT)
         btn_backup.grid(row=0, column=1, sticky="ew")
-        Tooltip(btn_backup, "Create a zip backup of the current GameData folder")
+        Tooltip(btn_backup, "Back up the current GameData folder. Unchanged files are shared\n"
+                            "with earlier backups, so repeat backups are small and fast")
 
         btn_update_profile = tk.Button(actions_frame, text="Update Profile from GameData", fg="white", bg="violet", command=self.update_profile, width=UI_WIDTH, font=UI_FONT)
         btn_update_profile.grid(row=1, column=0, sticky="ew")
@@ -733,26 +4476,82 @@ class App:
 
         btn_cleanup_mods = tk.Button(actions_frame, text="Clean Up Unused Mods", command=self.cleanup_unused_mods, width=UI_WIDTH, font=UI_FONT)
         btn_cleanup_mods.grid(row=1, column=1, sticky="ew")
-        Tooltip(btn_cleanup_mods, "Remove mods from the mods folder that aren't used in any profile")
+        Tooltip(btn_cleanup_mods, "Remove mods from the mods folder that aren't used in any profile\n"
+                                  "and deduplicate the mod cache into the versioned mod store")
 
         btn_manage_mods = tk.Button(actions_frame, text="Manage Profile Mods", fg="white", bg="lightsalmon", command=self.manage_profile_mods, width=UI_WIDTH, font=UI_FONT)
         btn_manage_mods.grid(row=2, column=0, sticky="ew")
         Tooltip(btn_manage_mods, "Add or remove mods from the selected profile")
 
-        self.status_label = tk.Label(root, text="Ready", fg="blue", font=UI_FONT)
-        self.status_label.grid(row=2, column=0, columnspan=2, sticky="ew")
+        self.deploy_mode_var = tk.StringVar()
+        self.deploy_mode_var.set(DEFAULT_DEPLOY_MODE)
+        deploy_mode_menu = tk.OptionMenu(actions_frame, self.deploy_mode_var, *DEPLOY_MODES, command=self.set_deploy_mode)
+        deploy_mode_menu.config(width=UI_WIDTH, font=UI_FONT)
+        deploy_mode_menu.grid(row=2, column=1, sticky="ew")
+        Tooltip(deploy_mode_menu, "How mods are placed into this instance's GameData:\n"
+                                  "copy - full copies (safest)\n"
+                                  "hardlink - share files with the mods folder, no extra disk space\n"
+                                  "symlink - link whole mod folders (junctions on Windows)\n"
+                                  "reflink - copy-on-write clones on Btrfs/XFS/APFS\n"
+                                  "Mods that can't be linked are copied instead.")
+
+        btn_restore = tk.Button(actions_frame, text="Restore Backup", command=self.restore_backup, width=UI_WIDTH, font=UI_FONT)
+        btn_restore.grid(row=3, column=0, sticky="ew")
+        Tooltip(btn_restore, "Restore GameData, or only some of its folders, from a backup.\n"
+                             "Files that already match the backup are left alone")
+
+        btn_rollback = tk.Button(actions_frame, text="Roll Back Last Apply", command=self.rollback, width=UI_WIDTH, font=UI_FONT)
+        btn_rollback.grid(row=3, column=1, sticky="ew")
+        Tooltip(btn_rollback, "Swap GameData back to how it was before the last apply.\n"
+                              "Press again to undo the rollback")
+
+        btn_batch = tk.Button(actions_frame, text="Apply to Several Instances", command=self.batch_apply, width=UI_WIDTH, font=UI_FONT)
+        btn_batch.grid(row=4, column=0, columnspan=2, sticky="ew")
+        Tooltip(btn_batch, "Apply a profile to several instances at once.\n"
+                           "Instances on different disks are worked on in parallel")
+
+        status_frame = tk.Frame(root)
+        status_frame.grid(row=2, column=0, columnspan=2, sticky="ew")
+        status_frame.columnconfigure(0, weight=1)
+
+        self.status_label = tk.Label(status_frame, text="Ready", fg="blue", font=UI_FONT)
+        self.status_label.grid(row=0, column=0, sticky="ew")
+
+        self.btn_cancel_job = tk.Button(status_frame, text="Cancel", command=self.cancel_job, state="disabled", font=UI_FONT)
+        self.btn_cancel_job.grid(row=0, column=1, padx=2)
+        Tooltip(self.btn_cancel_job, "Stop the running operation after the mods in progress finish")
+
+        btn_jobs = tk.Button(status_frame, text="Jobs", command=self.show_jobs, font=UI_FONT)
+        btn_jobs.grid(row=0, column=2, padx=2)
+        Tooltip(btn_jobs, "Show running and finished operations")
+
+        self.jobs = JobRunner(root, self.set_status, on_change=self.refresh_job_controls)
+        get_trash_reaper().status_callback = self.jobs.post_status
+        self.jobs_window = None
+        root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.mods_listbox = tk.Listbox(root, width=UI_WIDTH*3, height=10, font=UI_FONT)
         scrollbar = tk.Scrollbar(root, orient="vertical", command=self.mods_listbox.yview)
         self.mods_listbox.configure(yscrollcommand=scrollbar.set)
         self.mods_listbox.grid(row=3, column=0, sticky="nsew")
+        self.mods_listbox.bind("<Double-Button-1>", self.choose_mod_version)
         scrollbar.grid(row=3, column=1, sticky="ns")
 
         self.tip_label = tk.Label(root, text="", justify="left", wraplength=200, font=UI_FONT, fg="gray")
         self.tip_label.grid(row=3, column=2, sticky="nw", padx=10)
+        self.plan_results = None
+
+        self.drift_label = tk.Label(header_frame, text="", justify="left", font=UI_FONT, fg="darkorange")
+        self.drift_key = None
+        self.drift_results = None  # Queue of the drift check running in the background
+        if load_settings()["watch"]:
+            # Walking the GameData folders can take a moment, so the window doesn't wait for it
+            threading.Thread(target=start_folder_watcher, name="start-folder-watcher", daemon=True).start()
+            self.root.after(self.WATCH_UI_MS, self.check_drift)
 
         # Clean up any invalid active_profile references in instances.json
         instances = load_instances()
+        changed = False
         for instance_name, instance_data in instances.items():
             active_prof = instance_data.get("active_profile")
             if active_prof:
@@ -760,12 +4559,131 @@ class App:
                 if not profile_file.exists():
                     # Clear invalid active_profile reference
                     instances[instance_name]["active_profile"] = None
-        save_instances(instances)
+                    changed = True
+        if changed:
+            save_instances(instances)
 
         self.update_instances()
+        self.root.after(200, self.offer_resume)
 
     def cleanup_unused_mods(self):
-        cleanup_unused_mods(self.set_status)
+        self.jobs.start("Scan for unused mods", lambda status, cancel: find_unused_mods(status),
+                        on_done=self.confirm_cleanup)
+
+    def confirm_cleanup(self, job):
+        unused_list, pinned_refs = job.result
+        if unused_list:
+            message = f"Found {len(unused_list)} unused mod(s) in the mods folder:\n\n"
+            message += "\n".join(unused_list[:10])  # Show first 10
+            if len(unused_list) > 10:
+                message += f"\n... and {len(unused_list) - 10} more"
+            freed = sum(get_mod_index().mod_sizes(unused_list, refresh=False).values())
+            message += f"\n\nDelete these unused mods ({format_size(freed)})?"
+            if not messagebox.askyesno("Clean Up Unused Mods", message, icon='question'):
+                self.set_status("Cleanup cancelled.")
+                return
+        else:
+            self.set_status("No unused mods found.")
+
+        def cleanup_done(job):
+            result = job.result
+            for mod_name, error in result["errors"].items():
+                messagebox.showwarning("Removal Failed", f"Failed to remove {mod_name}: {error}")
+            if unused_list:
+                messagebox.showinfo("Cleanup Complete", f"Successfully removed {result['removed']} unused mod(s).\n"
+                                                        f"Dropped {result['versions_removed']} old mod version(s) and "
+                                                        f"{result['objects_removed']} unreferenced file(s) from the mod store.")
+
+        self.jobs.start("Clean up unused mods",
+                        lambda status, cancel: cleanup_unused_mods(unused_list, pinned_refs, status, cancel),
+                        on_done=cleanup_done)
+
+    def cancel_job(self):
+        self.jobs.cancel()
+
+    def refresh_job_controls(self):
+        self.btn_cancel_job.config(state="normal" if self.jobs.busy else "disabled")
+        if self.jobs_window is not None:
+            self.refresh_jobs_window()
+
+    def show_jobs(self):
+        """Open (or raise) the job history panel"""
+        if self.jobs_window is not None:
+            self.jobs_window.lift()
+            return
+        self.jobs_window = tk.Toplevel(self.root)
+        self.jobs_window.title("Jobs")
+        self.jobs_window.geometry("600x250")
+
+        def close():
+            self.jobs_window.destroy()
+            self.jobs_window = None
+        self.jobs_window.protocol("WM_DELETE_WINDOW", close)
+
+        self.jobs_listbox = tk.Listbox(self.jobs_window, font=UI_FONT)
+        self.jobs_listbox.pack(fill="both", expand=True, padx=10, pady=10)
+        tk.Button(self.jobs_window, text="Close", command=close).pack(side="right", padx=10, pady=(0, 10))
+        self.refresh_jobs_window()
+
+    def refresh_jobs_window(self):
+        if self.jobs_window is None:
+            return
+        lines = []
+        for job in reversed(self.jobs.history):
+            started = datetime.fromtimestamp(job.started).strftime("%H:%M:%S")
+            lines.append(f"{started}  {job.name}  [{job.state}, {job.duration:.1f}s]  {job.status}")
+        self.jobs_listbox.delete(0, tk.END)
+        self.jobs_listbox.insert(tk.END, *lines)
+        # Keep the running job's progress and duration current while the panel is open
+        if self.jobs.busy:
+            self.jobs_window.after(500, self.refresh_jobs_window)
+
+    def on_close(self):
+        if self.jobs.busy:
+            if not messagebox.askyesno("Operation Running",
+                                       f"'{self.jobs.current.name}' is still running.\n\n"
+                                       "Cancel it and exit once it has stopped?"):
+                return
+            self.jobs.cancel()
+            self.wait_for_jobs_then_close()
+            return
+        self.root.destroy()
+
+    def offer_resume(self):
+        """Offer to finish an operation that was interrupted by a crash, kill or power loss"""
+        for instance_name, instance_data in load_instances().items():
+            try:
+                if repair_interrupted_swap(Path(instance_data["path"])):
+                    self.set_status(f"Finished swapping in the new GameData of {instance_name}.")
+            except OSError as e:
+                messagebox.showerror("Error", f"GameData of {instance_name} is missing and could not be restored: {e}")
+        journals = list_unfinished_journals()
+        if not journals:
+            return
+        # One at a time; any others are offered on the next start
+        journal = journals[0]
+        if not messagebox.askyesno("Resume Interrupted Operation",
+                                   f"{journal.describe()} did not finish.\n\n"
+                                   "Resume it from where it stopped? Choose No to discard it."):
+            journal.finish()
+            return
+
+        def resume_done(job):
+            if journal.operation == "apply":
+                self.apply_done(job)
+            elif journal.operation == "cleanup":
+                messagebox.showinfo("Cleanup Complete", f"Removed {job.result['removed']} unused mod(s).")
+            if self.instance_var.get():
+                self.update_profiles(self.instance_var.get())
+
+        self.jobs.start(f"Resume {journal.operation}", lambda status, cancel: resume_operation(journal, status, cancel),
+                        on_done=resume_done)
+
+    def wait_for_jobs_then_close(self):
+        if self.jobs.busy:
+            self.root.after(200, self.wait_for_jobs_then_close)
+        else:
+            self.root.destroy()
 
     def remove_instance(self):
         instance = self.instance_var.get()
@@ -776,6 +4694,7 @@ class App:
             data.pop(instance, None)
             save_instances(data)
             shutil.rmtree(PROFILES_DIR / instance, ignore_errors=True)
+            shutil.rmtree(LOAD_CACHE_DIR / instance, ignore_errors=True)
             self.update_instances()
             # Reset to first available instance or empty
             instances = list_instances()
@@ -795,7 +4714,8 @@ class App:
         if not path.exists():
             return
         if messagebox.askyesno("Confirm Deletion", f"Are you sure you want to delete profile '{profile}'?"):
-            path.unlink()
+            get_profile_store().delete(instance, profile)
+            shutil.rmtree(load_cache_path(instance, profile), ignore_errors=True)
             self.update_profiles(instance)
             # Clear the mods listbox if no profiles remain
             profiles = list_profiles(instance)
@@ -804,10 +4724,12 @@ class App:
                 self.mods_listbox.delete(0, tk.END)
 
     def set_status(self, msg):
-        self.status_label.config(text=msg)
-        self.root.update_idletasks()
+        with trace_span("set_status", "ui"):
+            self.status_label.config(text=msg)
+            self.root.update_idletasks()
 
     def update_instances(self):
+        watch_instances()
         menu = self.instance_menu["menu"]
         menu.delete(0, "end")
         instances = list_instances()
@@ -818,8 +4740,18 @@ class App:
 
     def set_instance(self, value):
         self.instance_var.set(value)
+        self.deploy_mode_var.set(load_instances().get(value, {}).get("deploy_mode", DEFAULT_DEPLOY_MODE))
         self.update_profiles(value)
 
+    def set_deploy_mode(self, mode):
+        instance = self.instance_var.get()
+        if not instance:
+            return
+        instances = load_instances()
+        instances[instance]["deploy_mode"] = mode
+        save_instances(instances)
+        self.set_status(f"Deployment mode for '{instance}' set to {mode}. It takes effect on the next apply.")
+
     def update_profiles(self, instance):
         profiles = list_profiles(instance)
         menu = self.profile_menu["menu"]
@@ -841,31 +4773,363 @@ class App:
             self.mods_listbox.delete(0, tk.END)
             return
             
-        profile_file = PROFILES_DIR / instance / f"{profile}.json"
+        mods = get_profile_store().load(instance, profile)
         self.mods_listbox.delete(0, tk.END)
-        if profile_file.exists():
-            with open(profile_file) as f:
-                mods = json.load(f)
-                for mod in mods:
-                    self.mods_listbox.insert(tk.END, mod)
+        if mods:
+            self.mods_listbox.insert(tk.END, *mods)
+        self.show_apply_plan(instance, profile)
+
+    def show_apply_plan(self, instance, profile):
+        """Work out what applying the selected profile would do in the background and show it beside the mod list"""
+        self.tip_label.config(text="")
+        results = queue.Queue()
+        self.plan_results = results
+
+        def plan():
+            try:
+                results.put(describe_plan(plan_profile(instance, profile, exact=False)))
+            except Exception as e:
+                results.put(f"Could not plan applying '{profile}': {e}")
+
+        def show():
+            if self.plan_results is not results:
+                return  # Another profile has been selected since
+            try:
+                self.tip_label.config(text=results.get_nowait())
+            except queue.Empty:
+                self.root.after(self.PLAN_POLL_MS, show)
+
+        threading.Thread(target=plan, name="plan-profile", daemon=True).start()
+        self.root.after(self.PLAN_POLL_MS, show)
+
+    def check_drift(self):
+        """Point out when the selected instance's GameData was changed outside the manager"""
+        watcher = get_folder_watcher()
+        instance = self.instance_var.get()
+        if watcher is None or self.jobs.busy:
+            self.drift_key = None  # Look again once the operation is done
+        elif self.drift_results is None:
+            key = (instance, watcher.seq, watcher.synced.get(instance))
+            if key != self.drift_key:
+                self.drift_key = key
+                # Loading the profile and the deployment record can take a moment; keep it off the Tk thread
+                results = queue.Queue()
+                self.drift_results = results
+
+                def drift():
+                    try:
+                        results.put(describe_drift(gamedata_drift(instance)) if instance else "")
+                    except Exception as e:
+                        results.put(f"Could not check GameData for changes: {e}")
+
+                threading.Thread(target=drift, name="gamedata-drift", daemon=True).start()
+                self.root.after(self.PLAN_POLL_MS, lambda: self.show_drift(instance, results))
+        self.root.after(self.WATCH_UI_MS, self.check_drift)
+
+    def show_drift(self, instance, results):
+        """Show the result of a drift check once it is ready"""
+        try:
+            text = results.get_nowait()
+        except queue.Empty:
+            self.root.after(self.PLAN_POLL_MS, lambda: self.show_drift(instance, results))
+            return
+        self.drift_results = None
+        if instance != self.instance_var.get():
+            self.drift_key = None  # Another instance was selected meanwhile; look again
+            return
+        if text != self.drift_label.cget("text"):
+            self.drift_label.config(text=text)
+            if text:
+                self.drift_label.grid(row=1, column=0, columnspan=6, sticky="w")
+            else:
+                self.drift_label.grid_remove()
+            if self.profile_var.get():
+                self.show_apply_plan(instance, self.profile_var.get())
+
+    def choose_mod_version(self, event=None):
+        """Pin the double-clicked mod of the selected profile to one of its stored versions"""
+        instance = self.instance_var.get()
+        profile = self.profile_var.get()
+        selection = self.mods_listbox.curselection()
+        if not instance or not profile or not selection:
+            return
+        entry = self.mods_listbox.get(selection[0])
+        mod_name, pinned = parse_mod_ref(entry)
+        versions = list_mod_versions(mod_name)
+        if not versions:
+            messagebox.showinfo("No Versions", f"'{mod_name}' has no stored versions yet.\n"
+                                               "Run 'Clean Up Unused Mods' to add it to the mod store.")
+            return
+
+        head = current_mod_version(mod_name)
+        dialog = tk.Toplevel(self.root)
+        dialog.title(f"Versions of '{mod_name}'")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        tk.Label(dialog, text="Select the version this profile should use:", font=("Helvetica", 10, "bold")).pack(pady=10)
+
+        versions_listbox = tk.Listbox(dialog, width=60, height=min(len(versions) + 1, 15), font=UI_FONT)
+        versions_listbox.pack(fill="both", expand=True, padx=10)
+        choices = [None]
+        versions_listbox.insert(tk.END, "Latest (follow the mods folder)")
+        for version in reversed(versions):
+            label = f"{version['version']}  {version['created']}  {len(version['files'])} file(s)"
+            if version["version"] == head:
+                label += "  [current]"
+            versions_listbox.insert(tk.END, label)
+            choices.append(version["version"])
+        versions_listbox.selection_set(choices.index(pinned) if pinned in choices else 0)
+
+        def use_version():
+            chosen = versions_listbox.curselection()
+            if chosen:
+                version = choices[chosen[0]]
+                new_entry = f"{mod_name}{VERSION_SEPARATOR}{version}" if version else mod_name
+                mods = get_profile_store().load(instance, profile) or []
+                save_profile(instance, profile, [new_entry if m == entry else m for m in mods])
+                self.show_profile_mods(instance, profile)
+            dialog.destroy()
+
+        button_frame = tk.Frame(dialog)
+        button_frame.pack(fill="x", padx=10, pady=10)
+        tk.Button(button_frame, text="Cancel", command=dialog.destroy).pack(side="right", padx=5)
+        tk.Button(button_frame, text="Use Version", command=use_version, bg="lightgreen").pack(side="right", padx=5)
+        dialog.wait_window()
 
     def apply(self):
         instance = self.instance_var.get()
         profile = self.profile_var.get()
         if not instance or not profile:
             return messagebox.showerror("Error", "Select instance and profile")
-        apply_profile(instance, profile, self.set_status)
+
+        def plan_done(job):
+            plan = job.result
+            if not plan["space"]["ok"]:
+                return messagebox.showerror("Not Enough Space", describe_plan(plan))
+            if plan["missing"] and not messagebox.askyesno(
+                    "Missing Mods", f"{len(plan['missing'])} mod(s) of '{profile}' are not in the mods folder and "
+                                    f"won't be applied:\n\n" + "\n".join(plan["missing"][:10])
+                                    + (f"\n... and {len(plan['missing']) - 10} more" if len(plan["missing"]) > 10 else "")
+                                    + "\n\nApply the rest anyway?", icon="warning"):
+                return
+            self.jobs.start(f"Apply '{profile}' to {instance}",
+                            lambda status, cancel: apply_profile(instance, profile, status, cancel),
+                            on_done=self.apply_done)
+
+        self.jobs.start(f"Plan '{profile}' for {instance}",
+                        lambda status, cancel: plan_profile(instance, profile, exact=False), on_done=plan_done)
+
+    def apply_done(self, job):
+        result = job.result
+        self.show_apply_plan(self.instance_var.get(), self.profile_var.get())
+        for mod_name, error in result["errors"].items():
+            messagebox.showerror("Copy Error", f"Failed to apply {mod_name}: {error}")
+        messagebox.showinfo("Apply Complete", f"Applied {result['applied']} out of {result['total']} mods from profile '{result['profile']}'.\n"
+                                              f"{result['unchanged']} mod(s) were already up to date.")
+
+    def rollback(self):
+        instance = self.instance_var.get()
+        if not instance:
+            return messagebox.showerror("Error", "Select instance")
+        if not messagebox.askyesno("Roll Back", f"Swap the GameData of {instance} back to how it was before the last apply?"):
+            return
+
+        def check_and_roll_back(status, cancel):
+            status("Checking the previous GameData...")
+            changed = previous_gamedata_changes(instance)
+            if changed:
+                return {"changed": changed}
+            return {"profile": rollback_gamedata(instance, status, force=True)}
+
+        def rollback_done(job):
+            changed = job.result.get("changed")
+            if changed:
+                if messagebox.askyesno(
+                        "Previous GameData Changed",
+                        f"{len(changed)} file(s) of the previous GameData were changed after the apply, through the "
+                        "current GameData they share their data with, so rolling back keeps the changed versions:\n\n"
+                        + "\n".join(changed[:10]) + (f"\n... and {len(changed) - 10} more" if len(changed) > 10 else "")
+                        + "\n\nRoll back anyway?", icon="warning"):
+                    self.jobs.start(f"Roll back {instance}", lambda status, cancel: {
+                        "profile": rollback_gamedata(instance, status, force=True)}, on_done=rollback_done)
+                return
+            self.update_profiles(instance)
+            profile = job.result["profile"]
+            messagebox.showinfo("Rollback Complete", "GameData was rolled back"
+                                + (f" to profile '{profile}'." if profile else "."))
+
+        self.jobs.start(f"Roll back {instance}", check_and_roll_back, on_done=rollback_done)
+
+    def batch_apply(self):
+        """Pick a profile for each of several instances and apply them all in one job"""
+        instances = load_instances()
+        if not instances:
+            return messagebox.showinfo("No Instances", "Add a KSP instance first.")
+        selected_profile = self.profile_var.get()
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Apply to Several Instances")
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        tk.Label(dialog, text="Instances to apply to, and the profile for each:", font=("Helvetica", 10, "bold")).pack(padx=10, pady=10)
+        rows_frame = tk.Frame(dialog)
+        rows_frame.pack(fill="both", expand=True, padx=10)
+        rows = {}
+        for row, name in enumerate(sorted(instances, key=natural_sort_key)):
+            profiles = list_profiles(name)
+            include_var = tk.BooleanVar(value=False)
+            profile_var = tk.StringVar(value=selected_profile if selected_profile in profiles else (profiles[0] if profiles else ""))
+            tk.Checkbutton(rows_frame, text=name, variable=include_var, font=UI_FONT,
+                           state="normal" if profiles else "disabled").grid(row=row, column=0, sticky="w")
+            profile_menu = tk.OptionMenu(rows_frame, profile_var, *(profiles or [""]))
+            profile_menu.config(width=UI_WIDTH, font=UI_FONT, state="normal" if profiles else "disabled")
+            profile_menu.grid(row=row, column=1, sticky="ew", padx=(10, 0))
+            rows[name] = (include_var, profile_var)
+
+        def start_batch():
+            targets = {name: profile_var.get() for name, (include_var, profile_var) in rows.items() if include_var.get()}
+            if not targets:
+                return messagebox.showinfo("Apply", "Select at least one instance.", parent=dialog)
+            dialog.destroy()
+            self.jobs.start(f"Apply to {len(targets)} instance(s)",
+                            lambda status, cancel: apply_batch(targets, status, cancel),
+                            on_done=self.batch_apply_done)
+
+        button_frame = tk.Frame(dialog)
+        button_frame.pack(fill="x", padx=10, pady=10)
+        tk.Button(button_frame, text="Cancel", command=dialog.destroy).pack(side="right", padx=5)
+        tk.Button(button_frame, text="Apply", command=start_batch, fg="white", bg="royalblue").pack(side="right", padx=5)
+        dialog.wait_window()
+
+    def batch_apply_done(self, job):
+        lines = []
+        for name, entry in sorted(job.result.items(), key=lambda item: natural_sort_key(item[0])):
+            if entry["ok"]:
+                result = entry["result"]
+                problems = len(result["errors"]) + len(result["missing"])
+                lines.append(f"{name}: '{entry['profile']}' applied, {result['applied']}/{result['total']} mod(s) "
+                             f"in {entry['seconds']:.1f}s" + (f" ({problems} problem(s))" if problems else ""))
+            else:
+                lines.append(f"{name}: '{entry['profile']}' failed - {entry['error']}")
+        if self.instance_var.get() in job.result:
+            self.update_profiles(self.instance_var.get())
+        messagebox.showinfo("Batch Apply Complete", "\n".join(lines))
 
     def backup(self):
         instance = self.instance_var.get()
         profile = self.profile_var.get()
         if not instance:
             return messagebox.showerror("Error", "Select instance")
-        backup_gamedata(instance, profile)
+        self.jobs.start(f"Backup {instance}",
+                        lambda status, cancel: backup_gamedata(instance, profile, status, cancel),
+                        on_done=lambda job: messagebox.showinfo("Backup Complete", f"GameData backed up to: {job.result}"))
+
+    def restore_backup(self):
+        """Pick a backup of the selected instance and restore all of it or selected folders"""
+        instance = self.instance_var.get()
+        if not instance:
+            return messagebox.showerror("Error", "Select instance")
+        backups = list_backups(instance)
+        if not backups:
+            return messagebox.showinfo("No Backups", f"No backups found for {instance}.")
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title(f"Restore Backup - {instance}")
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        lists_frame = tk.Frame(dialog)
+        lists_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        tk.Label(lists_frame, text="Backups:", font=("Helvetica", 10, "bold")).grid(row=0, column=0, sticky="w")
+        tk.Label(lists_frame, text="Folders (select to restore only some):", font=("Helvetica", 10, "bold")).grid(row=0, column=1, sticky="w", padx=(10, 0))
+        backups_listbox = tk.Listbox(lists_frame, width=45, height=15, exportselection=False, font=UI_FONT)
+        backups_listbox.grid(row=1, column=0, sticky="nsew")
+        entries_listbox = tk.Listbox(lists_frame, width=35, height=15, selectmode=tk.MULTIPLE, exportselection=False, font=UI_FONT)
+        entries_listbox.grid(row=1, column=1, sticky="nsew", padx=(10, 0))
+        lists_frame.columnconfigure(0, weight=1)
+        lists_frame.columnconfigure(1, weight=1)
+        lists_frame.rowconfigure(1, weight=1)
+
+        def fill_backups():
+            backups_listbox.delete(0, tk.END)
+            for backup in backups:
+                backups_listbox.insert(tk.END, f"{backup['created']}  [{backup['kind']}]  {backup['name']}")
+            entries_listbox.delete(0, tk.END)
+
+        def selected_backup():
+            chosen = backups_listbox.curselection()
+            return backups[chosen[0]] if chosen else None
+
+        def show_entries(event=None):
+            backup = selected_backup()
+            entries_listbox.delete(0, tk.END)
+            if backup:
+                try:
+                    for name in backup_top_level_entries(backup):
+                        entries_listbox.insert(tk.END, name)
+                except (OSError, zipfile.BadZipFile, OperationError) as e:
+                    messagebox.showerror("Error", f"Failed to read backup: {e}", parent=dialog)
+
+        def start_restore(selected_only):
+            backup = selected_backup()
+            if not backup:
+                return
+            selected = [entries_listbox.get(i) for i in entries_listbox.curselection()] if selected_only else None
+            if selected_only and not selected:
+                return messagebox.showinfo("Restore", "Select the folders to restore.", parent=dialog)
+            what = ", ".join(selected) if selected else "the whole GameData folder"
+            if not messagebox.askyesno("Confirm Restore", f"Replace {what} in {instance} with the contents of backup "
+                                                          f"'{backup['name']}'?", parent=dialog):
+                return
+            dialog.destroy()
+            self.jobs.start(f"Restore {backup['name']}",
+                            lambda status, cancel: restore_backup(instance, backup, selected, status, cancel),
+                            on_done=lambda job: messagebox.showinfo(
+                                "Restore Complete",
+                                f"Restored {len(job.result['restored'])} folder(s) from '{job.result['backup']}'.\n"
+                                f"{job.result['extracted']} file(s) extracted, {job.result['reused']} were already up to date."))
+
+        def remove_backup():
+            backup = selected_backup()
+            if not backup or not messagebox.askyesno("Delete Backup", f"Delete backup '{backup['name']}'?", parent=dialog):
+                return
+            try:
+                delete_backup(backup)
+            except OSError as e:
+                return messagebox.showerror("Error", f"Failed to delete backup: {e}", parent=dialog)
+            backups.remove(backup)
+            fill_backups()
+
+        backups_listbox.bind("<<ListboxSelect>>", show_entries)
+        fill_backups()
+
+        button_frame = tk.Frame(dialog)
+        button_frame.pack(fill="x", padx=10, pady=10)
+        tk.Button(button_frame, text="Delete Backup", command=remove_backup, fg="white", bg="red").pack(side="left", padx=5)
+        tk.Button(button_frame, text="Close", command=dialog.destroy).pack(side="right", padx=5)
+        tk.Button(button_frame, text="Restore Selected", command=lambda: start_restore(True)).pack(side="right", padx=5)
+        tk.Button(button_frame, text="Restore All", command=lambda: start_restore(False), bg="lightgreen").pack(side="right", padx=5)
+        dialog.wait_window()
 
     def new_profile(self):
         return new_profile_enhanced(self)
 
+    def refresh_mod_sizes(self, dialog):
+        """Bring the mod index up to date in the background and show the new sizes in a selection dialog.
+
+        The dialog opens with the sizes the index already has; if another job
+        is running, those have to do.
+        """
+        if self.jobs.busy:
+            return
+
+        def index(status, cancel):
+            get_mod_index().refresh(status_callback=status)
+            return get_mod_index().mod_sizes(refresh=False)
+
+        self.jobs.start("Index mods folder", index, on_done=lambda job: dialog.set_sizes(job.result))
+
     def manage_profile_mods(self):
         instance = self.instance_var.get()
         profile = self.profile_var.get()
@@ -873,37 +5137,30 @@ class App:
             return messagebox.showerror("Error", "Select instance and profile")
         
         # Get available mods from mods folder
-        available_mods = []
-        if MODS_DIR.exists():
-            available_mods = [item.name for item in MODS_DIR.iterdir() 
-                            if item.is_dir() or item.is_file()]
+        available_mods = list_cached_mods()
         
         if not available_mods:
             messagebox.showinfo("No Mods", "No mods found in the mods folder. Add some mods first.")
             return
         
-        # Load current profile mods
-        profile_file = PROFILES_DIR / instance / f"{profile}.json"
-        current_mods = []
-        if profile_file.exists():
-            with open(profile_file) as f:
-                current_mods = json.load(f)
+        # Load current profile mods, remembering any pinned versions
+        current_mods = get_profile_store().load(instance, profile) or []
+        current_refs = {parse_mod_ref(entry)[0]: entry for entry in current_mods}
+        current_mods = list(current_refs)
         
         # Show mod selection dialog with current mods pre-selected
-        dialog = ModSelectionDialog(self.root, available_mods, f"Manage Mods for '{profile}'")
+        dialog = ModSelectionDialog(self.root, available_mods, f"Manage Mods for '{profile}'",
+                                    get_mod_index().mod_sizes(refresh=False, wait=False))
+        self.refresh_mod_sizes(dialog)
         
         # Pre-select current mods
-        dialog.persistent_selections = set(current_mods)
-        for i, mod in enumerate(dialog.all_mods):
-            if mod in current_mods:
-                dialog.mods_listbox.selection_set(i)
-        dialog.update_selection_count()
+        dialog.set_selection(current_mods)
         
         result_action, selected_mods = dialog.show()
         
         if result_action == "ok":
             # Save the updated profile
-            save_profile(instance, profile, selected_mods)
+            save_profile(instance, profile, [current_refs.get(mod, mod) for mod in selected_mods])
             
             # Refresh the mods display
             self.show_profile_mods(instance, profile)
@@ -951,7 +5208,8 @@ class App:
                 return
             
             # Save the new instance
-            instances[name] = {"path": str(installation_path), "active_profile": None}
+            instances[name] = {"path": str(installation_path), "active_profile": None,
+                               "deploy_mode": DEFAULT_DEPLOY_MODE}
             save_instances(instances)
             self.update_instances()
             self.set_instance(name)
@@ -967,12 +5225,205 @@ class App:
         profile = self.profile_var.get()
         if not instance or not profile:
             return messagebox.showerror("Error", "Select instance and profile")
-        update_profile(instance, profile, self.set_status)
-        # Refresh the mods display
-        self.show_profile_mods(instance, profile)
+
+        # Check if profile exists and ask for confirmation
+        profile_file = PROFILES_DIR / instance / f"{profile}.json"
+        if profile_file.exists():
+            result = messagebox.askquestion(
+                "Overwrite Profile?",
+                f"Profile '{profile}' already exists. Do you want to overwrite it?",
+                icon='warning'
+            )
+            if result != 'yes':
+                self.set_status("Update cancelled.")
+                return
+
+        def update_done(job):
+            for error in job.result["errors"].values():
+                messagebox.showwarning("Copy Warning", error)
+            result = job.result
+            summary = (f"Profile '{profile}' now has {len(result['mods'])} mod(s).\n\n"
+                       f"New: {len(result['added'])}\nChanged: {len(result['changed'])}\nUnchanged: {len(result['unchanged'])}")
+            if result["changed"]:
+                summary += "\n\nChanged mods:\n" + "\n".join(f"{name} ({count} file(s))" for name, count in
+                                                           sorted(result["changed"].items())[:10])
+            messagebox.showinfo("Profile Updated", summary)
+            # Refresh the mods display
+            if self.instance_var.get() == instance and self.profile_var.get() == profile:
+                self.show_profile_mods(instance, profile)
+
+        self.jobs.start(f"Update '{profile}' from {instance}",
+                        lambda status, cancel: update_profile(instance, profile, status, cancel),
+                        on_done=update_done)
+
+# Exit codes of the command line; argparse itself exits with 2 on bad usage
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_PARTIAL = 3  # Finished, but some mods failed or were missing
+EXIT_CANCELLED = 130
+
+def build_cli_parser():
+    parser = argparse.ArgumentParser(
+        prog="main.py", description="KSP Mod Manager. Run without arguments for the GUI. "
+                                    "Every command prints its result as JSON on stdout and progress on stderr.")
+    parser.add_argument("-q", "--quiet", action="store_true", help="don't print progress")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="list instances, profiles, cached mods or backups")
+    list_parser.add_argument("what", choices=["instances", "profiles", "mods", "backups"])
+    list_parser.add_argument("instance", nargs="?", help="instance whose profiles or backups to list")
+
+    for name, help_text in (("apply", "apply a profile to an instance's GameData"),
+                            ("plan", "show what applying a profile would change, without changing anything"),
+                            ("update", "update a profile from an instance's current GameData")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("instance")
+        command.add_argument("profile")
+        if name == "plan":
+            command.add_argument("--fast", action="store_true",
+                                 help="plan from cached stats instead of scanning GameData")
+
+    backup_parser = commands.add_parser("backup", help="back up an instance's GameData")
+    backup_parser.add_argument("instance")
+    backup_parser.add_argument("--profile", help="profile name to put in the backup's name")
+
+    batch_parser = commands.add_parser("batch", help="apply profiles to several instances at once, "
+                                                     "in parallel across disks")
+    batch_parser.add_argument("targets", nargs="+", metavar="INSTANCE[=PROFILE]",
+                              help="instance to apply to, with its own profile or the one given by --profile")
+    batch_parser.add_argument("--profile", help="profile for instances given without one")
+    batch_parser.add_argument("--per-device", type=int, help="instances applied at once per disk "
+                                                             "(default: the batch_per_device setting)")
+
+    cleanup_parser = commands.add_parser("cleanup", help="find unused mods; with --yes remove them and compact the mod store")
+    cleanup_parser.add_argument("--yes", action="store_true", help="remove the unused mods instead of only listing them")
+    return parser
+
+def run_cli_operation(name, operation, status_callback):
+    """Run operation(status_callback, cancel_event) on a worker thread; Ctrl+C cancels it cleanly"""
+    cancel_event = threading.Event()
+    finished = threading.Event()
+    outcome = {}
+
+    def work():
+        try:
+            outcome["result"] = run_traced(name, operation, status_callback, cancel_event)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            finished.set()
+
+    # Waiting on an event rather than join(), which can lose track of the thread when interrupted
+    threading.Thread(target=work, name="cli-operation", daemon=True).start()
+    while not finished.is_set():
+        try:
+            finished.wait(0.2)
+        except KeyboardInterrupt:
+            cancel_event.set()
+            status_callback("Cancelling...")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+def cli_list(what, instance):
+    if what == "instances":
+        return [{"name": name, "path": data.get("path"), "deploy_mode": data.get("deploy_mode", DEFAULT_DEPLOY_MODE),
+                 "active_profile": data.get("active_profile"), "profiles": list_profiles(name)}
+                for name, data in sorted(load_instances().items())]
+    if what == "mods":
+        return get_mod_index().list_mods()
+    if what == "backups":
+        return list_backups(instance)
+    active = load_instances()[instance].get("active_profile")
+    store = get_profile_store()
+    return [{"name": name, "active": name == active, "mods": store.load(instance, name)}
+            for name in list_profiles(instance)]
+
+def run_cli(argv):
+    """Run one command line command and return its exit code"""
+    parser = build_cli_parser()
+    args = parser.parse_args(argv)
+    if args.command == "list" and args.what == "profiles" and args.instance is None:
+        parser.error("list profiles needs an instance")
+    ensure_data_dirs()
+
+    def status(message):
+        if not args.quiet:
+            # One write per line, so lines from instances applied side by side don't run together
+            sys.stderr.write(message + "\n")
+            sys.stderr.flush()
+
+    if args.command not in ("list", "plan"):
+        get_trash_reaper().resume(status)
+
+    code = EXIT_OK
+    output = {"command": args.command, "ok": True}
+    try:
+        instance = getattr(args, "instance", None)
+        if instance is not None and instance not in load_instances():
+            raise OperationError(f"Unknown instance: {instance}")
+
+        if args.command == "list":
+            result = cli_list(args.what, instance)
+        elif args.command == "plan":
+            result = plan_profile(args.instance, args.profile, exact=not args.fast)
+        elif args.command == "apply":
+            result = run_cli_operation(f"apply {args.profile} to {args.instance}",
+                                       lambda s, c: apply_profile(args.instance, args.profile, s, c), status)
+        elif args.command == "backup":
+            result = {"backup": run_cli_operation(
+                f"backup {args.instance}", lambda s, c: backup_gamedata(args.instance, args.profile, s, c), status)}
+        elif args.command == "batch":
+            targets = {}
+            for target in args.targets:
+                name, _, profile_name = target.partition("=")
+                if not (profile_name or args.profile):
+                    raise OperationError(f"No profile given for {name}; use {name}=PROFILE or --profile")
+                targets[name] = profile_name or args.profile
+            result = run_cli_operation(f"batch apply to {len(targets)} instances",
+                                       lambda s, c: apply_batch(targets, s, c, args.per_device), status)
+            if any(entry.get("cancelled") for entry in result.values()):
+                code = EXIT_CANCELLED
+            elif not all(entry["ok"] and not (entry["result"]["errors"] or entry["result"]["missing"])
+                         for entry in result.values()):
+                code = EXIT_PARTIAL
+        elif args.command == "update":
+            result = run_cli_operation(f"update {args.profile} from {args.instance}",
+                                       lambda s, c: update_profile(args.instance, args.profile, s, c), status)
+        else:
+            unused, pinned_refs = find_unused_mods(status)
+            result = {"unused": unused, "size": sum(get_mod_index().mod_sizes(unused, refresh=False).values())}
+            if args.yes:
+                result.update(run_cli_operation("cleanup", lambda s, c: cleanup_unused_mods(unused, pinned_refs, s, c),
+                                                status))
+        output["result"] = result
+        if args.command in ("apply", "update", "cleanup") and (result.get("errors") or result.get("missing")):
+            code = EXIT_PARTIAL
+    except OperationCancelled as e:
+        output.update(ok=False, cancelled=True, error=str(e))
+        code = EXIT_CANCELLED
+    except Exception as e:
+        if DEBUG_MODE:
+            import traceback
+            traceback.print_exception(type(e), e, e.__traceback__)
+        output.update(ok=False, error=str(e) if isinstance(e, (OperationError, OSError)) else repr(e))
+        code = EXIT_FAILED
+    print(json.dumps(output, indent=2, default=str), flush=True)
+    # The result is out; finish deleting what the command discarded (Ctrl+C leaves it for the next start)
+    try:
+        get_trash_reaper().drain()
+    except KeyboardInterrupt:
+        pass
+    return code
 
 if __name__ == "__main__":
+    cli_args = [arg for arg in sys.argv[1:] if arg != "-d"]
+    if cli_args:
+        sys.exit(run_cli(cli_args))
+    load_tk()
+    ensure_data_dirs()
     elevate_privileges()
+    get_trash_reaper().resume()
     try:
         root = tk.Tk()
         app = App(root)
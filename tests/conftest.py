@@ -0,0 +1,57 @@
+import os
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+
+import pytest
+
+# main reads KSPMM_HOME when it is imported, so every test runs against a scratch data folder
+os.environ["KSPMM_HOME"] = tempfile.mkdtemp(prefix="kspmm-test-")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import main  # noqa: E402
+
+main.ensure_data_dirs()
+
+
+def write_mod(root, files):
+    """Create a mod folder from {relative path: text}"""
+    for rel, text in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    return root
+
+
+def unique(name):
+    """Mod names are unique per test, as the mods folder is shared"""
+    return f"{name}{uuid.uuid4().hex[:6]}"
+
+
+@pytest.fixture
+def settings():
+    """Write settings.json for one test and put the defaults back afterwards"""
+    def apply(**values):
+        main.save_settings({**main.DEFAULT_SETTINGS, "file_workers": 2, **values})
+    apply()
+    yield apply
+    main.save_settings(dict(main.DEFAULT_SETTINGS))
+
+
+@pytest.fixture
+def instance(tmp_path, settings):
+    """A registered KSP instance with stock GameData; yields (name, GameData path) and waits for its trash to empty"""
+    name = f"test-{uuid.uuid4().hex[:8]}"
+    gamedata = tmp_path / "ksp" / "GameData"
+    (gamedata / "Squad").mkdir(parents=True)
+    (gamedata / "Squad" / "squad.cfg").write_text("PART {}\n")
+    instances = main.load_instances()
+    instances[name] = {"path": str(gamedata.parent), "active_profile": None}
+    main.save_instances(instances)
+    yield name, gamedata
+    main.get_trash_reaper().drain(10)
+
+
+def quiet(message):
+    pass
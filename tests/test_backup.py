@@ -0,0 +1,84 @@
+import pytest
+
+import main
+from conftest import write_mod
+
+
+def count_hashes(monkeypatch):
+    hashed = []
+    file_hash = main.file_hash
+
+    def counting(path):
+        hashed.append(path)
+        return file_hash(path)
+    monkeypatch.setattr(main, "file_hash", counting)
+    return hashed
+
+
+def test_snapshot_reuses_unchanged_files(instance, monkeypatch):
+    name, gamedata = instance
+    write_mod(gamedata / "Mod", {"Parts/a.cfg": "a", "Parts/b.cfg": "b", "Textures/t.dds": "texture"})
+    first = main.load_snapshot(main.create_snapshot(name, gamedata, f"{name}-1").stem)
+
+    (gamedata / "Mod" / "Parts" / "b.cfg").write_text("changed")
+    hashed = count_hashes(monkeypatch)
+    second = main.load_snapshot(main.create_snapshot(name, gamedata, f"{name}-2").stem)
+
+    assert hashed == [gamedata / "Mod/Parts/b.cfg"]
+    assert second["files"]["Mod/Parts/a.cfg"] == first["files"]["Mod/Parts/a.cfg"]
+    assert second["files"]["Mod/Parts/b.cfg"][0] == main.file_hash(gamedata / "Mod" / "Parts" / "b.cfg")
+    for digest, size, mtime in second["files"].values():
+        assert main.object_path(digest, main.BACKUP_OBJECTS_DIR).exists()
+
+
+def test_identical_files_are_stored_once(instance):
+    name, gamedata = instance
+    write_mod(gamedata / "A", {"same.dds": "shared texture"})
+    write_mod(gamedata / "B", {"copy.dds": "shared texture"})
+    snapshot = main.load_snapshot(main.create_snapshot(name, gamedata, f"{name}-1").stem)
+    assert snapshot["files"]["A/same.dds"][0] == snapshot["files"]["B/copy.dds"][0]
+
+
+def test_backup_setting_chooses_zip(instance, settings):
+    name, gamedata = instance
+    settings(backup_format="zip")
+    backup = main.backup_gamedata(name)
+    assert backup.suffix == ".zip" and backup.exists()
+
+
+def tree(root):
+    return {rel: (root / rel).read_text() for rel in main.scan_mod_files(root)}
+
+
+def backup(instance, settings, backup_format):
+    name, gamedata = instance
+    settings(backup_format=backup_format)
+    write_mod(gamedata / "Mod", {"Parts/a.cfg": "a", "Plugins/mod.dll": "dll"})
+    write_mod(gamedata / "Other", {"readme.txt": "other"})
+    main.backup_gamedata(name)
+    return tree(gamedata), main.list_backups(name)[0]
+
+
+@pytest.mark.parametrize("backup_format", ["incremental", "zip"])
+def test_full_restore_round_trip(instance, settings, backup_format):
+    name, gamedata = instance
+    before, saved = backup(instance, settings, backup_format)
+    (gamedata / "Mod" / "Parts" / "a.cfg").write_text("changed")
+    main.safe_remove_item(gamedata / "Other")
+    write_mod(gamedata / "Added", {"new.cfg": "new"})
+
+    result = main.restore_backup(name, saved)
+    assert tree(gamedata) == before
+    assert result["reused"] == 2  # Plugins/mod.dll and the stock squad.cfg were already right
+
+
+@pytest.mark.parametrize("backup_format", ["incremental", "zip"])
+def test_restore_selected_folders(instance, settings, backup_format):
+    name, gamedata = instance
+    before, saved = backup(instance, settings, backup_format)
+    (gamedata / "Mod" / "Parts" / "a.cfg").write_text("changed")
+    (gamedata / "Other" / "readme.txt").write_text("changed")
+
+    assert main.restore_backup(name, saved, selected=["Mod"])["restored"] == ["Mod"]
+    assert (gamedata / "Mod" / "Parts" / "a.cfg").read_text() == "a"
+    assert (gamedata / "Other" / "readme.txt").read_text() == "changed"
@@ -0,0 +1,71 @@
+import collections
+import threading
+import time
+
+import main
+
+
+def register(tmp_path, names):
+    instances = main.load_instances()
+    for name in names:
+        (tmp_path / name).mkdir()
+        instances[name] = {"path": str(tmp_path / name), "active_profile": None}
+    main.save_instances(instances)
+
+
+def test_batch_runs_per_device_and_disks_side_by_side(tmp_path, settings, monkeypatch):
+    names = [f"batch-{disk}{i}-{tmp_path.name}" for disk in "ab" for i in range(3)]
+    register(tmp_path, names)
+    disks = {str(tmp_path / name): f"disk-{name[len('batch-')]}" for name in names}
+    monkeypatch.setattr(main, "storage_device", lambda path: disks[path])
+
+    lock = threading.Lock()
+    running = collections.Counter()
+    peak = collections.Counter()
+    overlapped = threading.Event()
+
+    def fake_apply(instance, profile_name, status_callback, cancel_event=None):
+        device = main.storage_device(str(tmp_path / instance))
+        with lock:
+            running[device] += 1
+            peak[device] = max(peak[device], running[device])
+            if len(+running) > 1:
+                overlapped.set()
+        time.sleep(0.05)
+        with lock:
+            running[device] -= 1
+        if instance.startswith("batch-b2"):
+            raise main.OperationError("broken")
+        return {"profile": profile_name}
+    monkeypatch.setattr(main, "apply_profile", fake_apply)
+
+    targets = dict.fromkeys(names, "p")
+    targets["no-such-instance"] = "p"
+    results = main.apply_batch(targets, lambda message: None, per_device=2)
+
+    assert peak == {"disk-a": 2, "disk-b": 2}
+    assert overlapped.is_set()
+    assert {name for name, entry in results.items() if entry["ok"]} == set(names) - {names[5]}
+    assert results[names[5]]["error"] == "broken"
+    assert results["no-such-instance"]["device"] is None
+
+
+def test_batch_per_device_setting(tmp_path, settings, monkeypatch):
+    names = [f"batch-{i}-{tmp_path.name}" for i in range(3)]
+    register(tmp_path, names)
+    settings(batch_per_device=1)
+    monkeypatch.setattr(main, "storage_device", lambda path: "disk")
+    lock = threading.Lock()
+    order = []
+
+    def fake_apply(instance, profile_name, status_callback, cancel_event=None):
+        with lock:
+            order.append(("start", instance))
+        time.sleep(0.01)
+        with lock:
+            order.append(("end", instance))
+        return {}
+    monkeypatch.setattr(main, "apply_profile", fake_apply)
+
+    main.apply_batch(dict.fromkeys(names, "p"), lambda message: None)
+    assert [step for step, _ in order] == ["start", "end"] * 3
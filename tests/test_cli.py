@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import main
+from conftest import quiet, unique, write_mod
+
+MAIN = Path(main.__file__)
+
+
+def run(*args, home):
+    env = dict(os.environ, KSPMM_HOME=str(home))
+    return subprocess.run([sys.executable, str(MAIN), *args], env=env, capture_output=True, text=True)
+
+
+def test_import_leaves_data_folder_alone(tmp_path):
+    env = dict(os.environ, KSPMM_HOME=str(tmp_path))
+    subprocess.run([sys.executable, "-c", "import main"], cwd=MAIN.parent, env=env, check=True)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_usage_errors_exit_with_2(tmp_path):
+    assert run("list", "profiles", home=tmp_path).returncode == 2
+    assert run("apply", home=tmp_path).returncode == 2
+
+
+def test_list_and_apply(instance, capsys):
+    name, gamedata = instance
+    mod = unique("Cli")
+    write_mod(gamedata / mod, {"mod.cfg": "x"})
+    main.update_profile(name, "p", quiet)
+    main.get_instance_registry().flush()
+
+    assert main.run_cli(["-q", "list", "profiles", name]) == main.EXIT_OK
+    output = json.loads(capsys.readouterr().out)
+    assert output["result"] == [{"name": "p", "active": True, "mods": [mod]}]
+
+    assert main.run_cli(["-q", "apply", name, "p"]) == main.EXIT_OK
+    assert json.loads(capsys.readouterr().out)["result"]["applied"] == 1
+    assert main.run_cli(["-q", "apply", "no-such-instance", "p"]) == main.EXIT_FAILED
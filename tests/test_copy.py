@@ -0,0 +1,36 @@
+import errno
+import os
+
+import pytest
+
+import main
+
+
+def refuse(error):
+    def call(*args):
+        raise OSError(error, os.strerror(error))
+    return call
+
+
+@pytest.mark.skipif(not main.KERNEL_COPY, reason="kernel copies are Linux only")
+@pytest.mark.parametrize("error", [errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP])
+def test_copy_without_kernel_support(tmp_path, monkeypatch, error):
+    src = tmp_path / "src.bin"
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    src.write_bytes(data)
+    os.utime(src, ns=(1_000_000_000, 2_000_000_000))
+    monkeypatch.setattr(os, "copy_file_range", refuse(error), raising=False)
+    monkeypatch.setattr(os, "sendfile", refuse(error))
+    dst = main.fast_copy_file(src, tmp_path / "dst.bin")
+    assert dst.read_bytes() == data
+    assert dst.stat().st_mtime_ns == 2_000_000_000
+
+
+@pytest.mark.skipif(not main.KERNEL_COPY, reason="kernel copies are Linux only")
+def test_copy_errors_still_raise(tmp_path, monkeypatch):
+    src = tmp_path / "src.bin"
+    src.write_bytes(b"data")
+    monkeypatch.setattr(os, "copy_file_range", refuse(errno.EXDEV), raising=False)
+    monkeypatch.setattr(os, "sendfile", refuse(errno.ENOSPC))
+    with pytest.raises(OSError):
+        main.fast_copy_file(src, tmp_path / "dst.bin")
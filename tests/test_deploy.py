@@ -0,0 +1,59 @@
+import errno
+import os
+
+import pytest
+
+import main
+from conftest import write_mod
+
+
+def refuse(*args, **kwargs):
+    raise OSError(errno.EOPNOTSUPP, "Not supported")
+
+
+@pytest.fixture
+def mod(tmp_path):
+    return write_mod(tmp_path / "mods" / "Mod", {"Parts/part.cfg": "PART {}\n", "Plugins/mod.dll": "dll"})
+
+
+def assert_copied(mod, target):
+    assert not main.is_link(target)
+    for rel in ("Parts/part.cfg", "Plugins/mod.dll"):
+        assert (target / rel).read_text() == (mod / rel).read_text()
+        assert not os.path.samefile(target / rel, mod / rel)
+
+
+def test_symlink_links_the_mod_folder(mod, tmp_path):
+    target = tmp_path / "GameData" / "Mod"
+    assert main.deploy_item(mod, target, "symlink") == "symlink"
+    assert main.is_linked_to(target, mod)
+
+
+def test_symlink_falls_back_to_copy(mod, tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "symlink", refuse)
+    target = tmp_path / "GameData" / "Mod"
+    assert main.deploy_item(mod, target, "symlink") == "copy"
+    assert_copied(mod, target)
+
+
+def test_hardlinks_share_the_files(mod, tmp_path):
+    target = tmp_path / "GameData" / "Mod"
+    assert main.deploy_item(mod, target, "hardlink") == "hardlink"
+    assert os.path.samefile(target / "Plugins" / "mod.dll", mod / "Plugins" / "mod.dll")
+    # Settings KSP may rewrite are copies, so writes to them stay in GameData
+    assert not os.path.samefile(target / "Parts" / "part.cfg", mod / "Parts" / "part.cfg")
+
+
+def test_reflink_falls_back_to_copy(mod, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "reflink_file", refuse)
+    target = tmp_path / "GameData" / "Mod"
+    assert main.deploy_item(mod, target, "reflink") == "copy"
+    assert_copied(mod, target)
+
+
+def test_reflinked_file_falls_back_to_copy(mod, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "reflink_file", refuse)
+    target = tmp_path / "GameData" / "Mod" / "Parts" / "part.cfg"
+    main.deploy_file(mod / "Parts" / "part.cfg", target, "reflink")
+    assert target.read_text() == "PART {}\n"
+    assert not os.path.samefile(target, mod / "Parts" / "part.cfg")
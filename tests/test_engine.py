@@ -0,0 +1,40 @@
+import threading
+
+import main
+from conftest import write_mod
+
+
+def test_copy_and_remove_tree(tmp_path, settings):
+    src = write_mod(tmp_path / "src", {f"dir{i}/file{j}.txt": f"{i}-{j}" for i in range(3) for j in range(5)})
+    (src / "empty").mkdir()
+    main.reload_file_engine()
+    main.get_file_engine().copy_tree(src, tmp_path / "dst")
+    assert main.scan_mod_files(tmp_path / "dst").keys() == main.scan_mod_files(src).keys()
+    assert (tmp_path / "dst" / "empty").is_dir()
+    main.get_file_engine().remove_tree(tmp_path / "dst")
+    assert not (tmp_path / "dst").exists()
+
+
+def test_resizing_leaves_running_operations_alone(settings):
+    main.reload_file_engine()
+    engine = main.get_file_engine()
+    assert engine.workers == 2
+    started, release = threading.Event(), threading.Event()
+    results = []
+
+    def slow(i):
+        started.set()
+        release.wait(5)
+        results.append(i)
+
+    worker = threading.Thread(target=engine.run_files, args=(slow, [(i,) for i in range(4)]))
+    worker.start()
+    started.wait(5)
+    settings(file_workers=3)
+    main.reload_file_engine()
+    assert main.get_file_engine().workers == 3
+    release.set()
+    worker.join(5)
+    # An operation that got the old engine can go on submitting work to it
+    engine.run_files(results.append, [("more",), ("work",)])
+    assert sorted(map(str, results)) == ["0", "1", "2", "3", "more", "work"]
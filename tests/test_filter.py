@@ -0,0 +1,33 @@
+import main
+
+
+def names(mod_filter):
+    return [mod_filter.all_mods[i] for i in mod_filter.filtered]
+
+
+def test_filter_matches_every_word_ignoring_case_and_separators():
+    mod_filter = main.ModFilter(["MechJeb2", "Kerbal_Engineer_Redux", "KerbalAlarmClock", "B9PartSwitch"])
+    assert mod_filter.all_mods == ["B9PartSwitch", "Kerbal_Engineer_Redux", "KerbalAlarmClock", "MechJeb2"]
+    assert names(mod_filter) == mod_filter.all_mods
+    assert mod_filter.filter("kerbalengineer") and names(mod_filter) == ["Kerbal_Engineer_Redux"]
+    mod_filter.filter("KERBAL clock")
+    assert names(mod_filter) == ["KerbalAlarmClock"]
+    mod_filter.filter("")
+    assert names(mod_filter) == mod_filter.all_mods
+
+
+def test_longer_query_narrows_the_last_result():
+    mod_filter = main.ModFilter([f"Mod{i}" for i in range(100)] + ["Other"])
+    mod_filter.filter("mod1")
+    assert len(mod_filter.filtered) == 11
+
+    # Only the previous matches are looked at again, so a mod outside them can't come back
+    other = mod_filter.all_mods.index("Other")
+    mod_filter.search_keys[other] = ("mod12", "mod12")
+    mod_filter.filter("mod12")
+    assert names(mod_filter) == ["Mod12"]
+
+    # A query that doesn't extend the last one starts from the full list again
+    mod_filter.filter("mod")
+    assert "Other" in names(mod_filter)
+    assert len(mod_filter.filtered) == 101
@@ -0,0 +1,52 @@
+import os
+import threading
+
+import main
+from conftest import unique, write_mod
+
+
+def test_refresh_rescans_only_changed_mods():
+    index = main.ModIndex(main.BASE_DIR / f"{unique('index')}.db")
+    alpha, beta = unique("Alpha"), unique("Beta")
+    write_mod(main.MODS_DIR / alpha, {"Parts/a.cfg": "a", "Plugins/a.dll": "aa"})
+    write_mod(main.MODS_DIR / beta, {"b.cfg": "bbb"})
+
+    assert set(index.refresh([alpha, beta])) == {alpha, beta}
+    assert index.mod_sizes([alpha, beta], refresh=False) == {alpha: 3, beta: 3}
+    assert index.refresh([alpha, beta]) == []
+
+    # A file added to a subfolder bumps that folder's mtime only
+    (main.MODS_DIR / alpha / "Parts" / "b.cfg").write_text("bbbb")
+    parts = main.MODS_DIR / alpha / "Parts"
+    stamp = parts.stat().st_mtime_ns + 1_000_000
+    os.utime(parts, ns=(stamp, stamp))
+    assert index.refresh([alpha, beta]) == [alpha]
+    assert index.mod_sizes([alpha], refresh=False) == {alpha: 7}
+
+    main.safe_remove_item(main.MODS_DIR / beta)
+    index.refresh([alpha, beta])
+    assert index.get_mod(beta, refresh=False) is None
+
+
+def test_mod_sizes_without_wait_skips_a_busy_index():
+    index = main.ModIndex(main.BASE_DIR / f"{unique('index')}.db")
+    name = unique("Mod")
+    write_mod(main.MODS_DIR / name, {"mod.cfg": "x"})
+    index.refresh([name])
+
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with index.lock:
+            held.set()
+            release.wait()
+
+    worker = threading.Thread(target=hold)
+    worker.start()
+    held.wait()
+    try:
+        assert index.mod_sizes([name], refresh=False, wait=False) == {}
+    finally:
+        release.set()
+        worker.join()
+    assert index.mod_sizes([name], refresh=False, wait=False) == {name: 1}
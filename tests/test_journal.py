@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+import main
+from conftest import quiet, unique, write_mod
+
+
+@pytest.fixture
+def crashed_apply(instance, settings, monkeypatch):
+    """A staged apply killed just before its swap, leaving its journal behind; returns (instance, GameData, mod)"""
+    settings(staged_apply=True)
+    name, gamedata = instance
+    mod = unique("Mod")
+    write_mod(main.MODS_DIR / mod, {"Parts/part.cfg": "PART {}\n", "plugin.dll": "dll"})
+    main.save_profile(name, "p1", [mod])
+
+    def killed(instance_path):
+        raise KeyboardInterrupt
+    with monkeypatch.context() as m:
+        m.setattr(main, "swap_gamedata", killed)
+        m.setattr(main.OperationJournal, "finish", lambda self: self.file.close())
+        with pytest.raises(KeyboardInterrupt):
+            main.apply_profile(name, "p1", quiet)
+    assert not (gamedata / mod).exists()
+    return name, gamedata, mod
+
+
+def unfinished_apply(name):
+    return next(j for j in main.list_unfinished_journals() if j.operation == "apply" and j.instance == name)
+
+
+def count_deploys(monkeypatch):
+    deployed = []
+    deploy_item = main.deploy_item
+
+    def counting(src, dst, *args, **kwargs):
+        deployed.append(dst.name)
+        return deploy_item(src, dst, *args, **kwargs)
+    monkeypatch.setattr(main, "deploy_item", counting)
+    return deployed
+
+
+def test_resume_reuses_the_staged_tree(crashed_apply, monkeypatch):
+    name, gamedata, mod = crashed_apply
+    journal = unfinished_apply(name)
+    assert journal.is_done(f"mod:{mod}")
+
+    deployed = count_deploys(monkeypatch)
+    assert main.apply_profile(name, "p1", quiet, resume=journal)["applied"] == 1
+    assert deployed == []
+    assert (gamedata / mod / "Parts" / "part.cfg").read_text() == "PART {}\n"
+    assert not journal.path.exists()
+
+
+def test_resume_without_the_staged_tree_starts_a_new_journal(crashed_apply, monkeypatch):
+    name, gamedata, mod = crashed_apply
+    journal = unfinished_apply(name)
+    main.safe_remove_item(gamedata.parent / main.STAGED_GAMEDATA_NAME)
+
+    deployed = count_deploys(monkeypatch)
+    monkeypatch.setattr(main.OperationJournal, "finish", lambda self: self.file.close())
+    main.apply_profile(name, "p1", quiet, resume=journal)
+    assert deployed == [mod]
+    assert (gamedata / mod / "plugin.dll").read_text() == "dll"
+
+    events = [json.loads(line) for line in journal.path.read_text().splitlines()]
+    assert "operation" in events[0] and not any("operation" in event for event in events[1:])
+    assert [event.get("done") for event in events].count(f"mod:{mod}") == 1
@@ -0,0 +1,72 @@
+import main
+from conftest import quiet, unique, write_mod
+
+
+def game_load(gamedata, text):
+    """Write the files ModuleManager and KSP leave behind after loading the game"""
+    for name in main.MM_CACHE_FILES:
+        (gamedata / name).write_text(f"{name} {text}")
+    (gamedata.parent / main.PART_DATABASE_FILE).write_text(f"PartDatabase {text}")
+
+
+def test_cache_is_kept_per_profile_and_restored(instance, settings):
+    name, gamedata = instance
+    first, second = unique("First"), unique("Second")
+    write_mod(main.MODS_DIR / first, {"first.cfg": "PART {}\n"})
+    write_mod(main.MODS_DIR / second, {"second.cfg": "PART {}\n"})
+    main.save_profile(name, "p1", [first])
+    main.save_profile(name, "p2", [second])
+    main.apply_profile(name, "p1", quiet)
+    game_load(gamedata, "p1")
+
+    main.apply_profile(name, "p2", quiet)
+    assert not (gamedata / main.MM_CACHE_FILES[0]).exists()
+    record = main.load_cache_record(name, "p1")
+    assert record["mod_set"] == main.mod_set_hash([first])
+    assert set(record["files"]) == set(main.MM_CACHE_FILES) | {main.PART_DATABASE_FILE}
+
+    main.apply_profile(name, "p1", quiet)
+    for cache_file in main.MM_CACHE_FILES:
+        assert (gamedata / cache_file).read_text() == f"{cache_file} p1"
+    assert (gamedata.parent / main.PART_DATABASE_FILE).read_text() == "PartDatabase p1"
+
+
+def test_cache_of_other_mod_versions_is_not_restored(instance, settings):
+    name, gamedata = instance
+    mod = unique("Changing")
+    write_mod(main.MODS_DIR / mod, {"part.cfg": "PART { a = 1 }\n"})
+    main.save_profile(name, "p1", [mod])
+    main.save_profile(name, "empty", [])
+    main.apply_profile(name, "p1", quiet)
+    game_load(gamedata, "old")
+    main.apply_profile(name, "empty", quiet)
+
+    write_mod(main.MODS_DIR / mod, {"part.cfg": "PART { a = 22 }\n"})
+    main.get_mod_index().refresh([mod], full=True)
+    main.apply_profile(name, "p1", quiet)
+    assert not (gamedata / main.MM_CACHE_FILES[0]).exists()
+
+
+def test_unfinished_cache_is_not_saved(instance, settings):
+    name, gamedata = instance
+    mod = unique("Mod")
+    write_mod(main.MODS_DIR / mod, {"part.cfg": "PART {}\n"})
+    main.save_profile(name, "p1", [mod])
+    main.save_profile(name, "empty", [])
+    main.apply_profile(name, "p1", quiet)
+    (gamedata / main.MM_CACHE_FILES[0]).write_text("half written")
+    main.apply_profile(name, "empty", quiet)
+    assert main.load_cache_record(name, "p1") is None
+
+
+def test_load_cache_setting_turns_it_off(instance, settings):
+    settings(load_cache=False)
+    name, gamedata = instance
+    mod = unique("Mod")
+    write_mod(main.MODS_DIR / mod, {"part.cfg": "PART {}\n"})
+    main.save_profile(name, "p1", [mod])
+    main.save_profile(name, "empty", [])
+    main.apply_profile(name, "p1", quiet)
+    game_load(gamedata, "p1")
+    main.apply_profile(name, "empty", quiet)
+    assert main.load_cache_record(name, "p1") is None
@@ -0,0 +1,82 @@
+import os
+
+import main
+from conftest import quiet, unique, write_mod
+
+
+def snapshot(root):
+    """{path: (size, mtime_ns, inode)} of everything under root"""
+    state = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in dirnames + filenames:
+            path = os.path.join(dirpath, name)
+            st = os.lstat(path)
+            state[path] = (st.st_size, st.st_mtime_ns, st.st_ino)
+    return state
+
+
+def comparable(plan):
+    return {key: sorted(plan[key]) if isinstance(plan[key], list) else plan[key]
+            for key in ("remove", "copy", "update", "keep", "missing", "bytes", "file_operations")}
+
+
+def test_exact_plan_and_estimate_agree(instance, settings):
+    name, gamedata = instance
+    changed, added = unique("Changed"), unique("Added")
+    write_mod(main.MODS_DIR / changed, {"Parts/a.cfg": "PART { a = 1 }\n", "Parts/b.cfg": "PART {}\n"})
+    write_mod(main.MODS_DIR / added, {"plugin.dll": "dll"})
+    main.save_profile(name, "before", [changed])
+    main.save_profile(name, "after", [changed, added, unique("Missing")])
+    main.apply_profile(name, "before", quiet)
+    write_mod(gamedata / unique("Stray"), {"stray.cfg": "x"})
+    write_mod(main.MODS_DIR / changed, {"Parts/a.cfg": "PART { a = 100 }\n", "Parts/c.cfg": "PART {}\n"})
+    os.remove(main.MODS_DIR / changed / "Parts" / "b.cfg")
+
+    exact = main.plan_profile(name, "after")
+    estimate = main.plan_profile(name, "after", exact=False)
+    assert comparable(exact) == comparable(estimate)
+    assert exact["update"] == [changed] and exact["copy"] == [added] and len(exact["missing"]) == 1
+
+    main.apply_profile(name, "after", quiet)
+    for plan in (main.plan_profile(name, "after"), main.plan_profile(name, "after", exact=False)):
+        assert plan["bytes"] == plan["file_operations"] == 0
+        assert sorted(plan["keep"]) == sorted([changed, added])
+
+
+def test_plan_leaves_gamedata_and_store_unchanged(instance, settings, tmp_path):
+    name, gamedata = instance
+    main.update_instance(name, deploy_mode="hardlink")
+    mod = unique("Pinned")
+    old_version, _ = main.store_ingest_mod(write_mod(tmp_path / "v1" / mod, {"part.cfg": "PART { v = 1 }\n",
+                                                                             "tex.dds": "v1"}), mod)
+    main.store_ingest_mod(write_mod(tmp_path / "v2" / mod, {"part.cfg": "PART { v = 2 }\n"}), mod)
+    main.save_profile(name, "pinned", [f"{mod}{main.VERSION_SEPARATOR}{old_version}"])
+    main.apply_profile(name, "pinned", quiet)
+    # Same content, different mtime: the plan has to hash it, and only the apply may set the mtime back
+    deployed = gamedata / mod / "part.cfg"
+    expected_mtime = deployed.stat().st_mtime_ns
+    os.utime(deployed, ns=(expected_mtime - 10**9, expected_mtime - 10**9))
+    main.safe_remove_item(main.STORE_CHECKOUTS_DIR / old_version)
+
+    before = snapshot(gamedata), snapshot(main.STORE_DIR)
+    for exact in (True, False):
+        plan = main.plan_profile(name, "pinned", exact=exact)
+        assert plan["keep"] == [mod] and plan["bytes"] == 0
+    assert (snapshot(gamedata), snapshot(main.STORE_DIR)) == before
+    assert not (main.STORE_CHECKOUTS_DIR / old_version).exists()
+
+    main.apply_profile(name, "pinned", quiet)
+    assert deployed.stat().st_mtime_ns == expected_mtime
+    assert deployed.read_text() == "PART { v = 1 }\n"
+
+
+def test_pinned_version_is_checked_out_when_applied(instance, settings, tmp_path):
+    name, gamedata = instance
+    mod = unique("Pinned")
+    old_version, _ = main.store_ingest_mod(write_mod(tmp_path / "v1" / mod, {"part.cfg": "PART { v = 1 }\n"}), mod)
+    main.store_ingest_mod(write_mod(tmp_path / "v2" / mod, {"part.cfg": "PART { v = 2 }\n"}), mod)
+    main.save_profile(name, "pinned", [f"{mod}{main.VERSION_SEPARATOR}{old_version}"])
+    assert main.plan_profile(name, "pinned")["copy"] == [mod]
+    assert not (main.STORE_CHECKOUTS_DIR / old_version).exists()
+    main.apply_profile(name, "pinned", quiet)
+    assert (gamedata / mod / "part.cfg").read_text() == "PART { v = 1 }\n"
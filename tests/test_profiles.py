@@ -0,0 +1,50 @@
+import os
+
+import main
+
+
+def write_profile_file(instance, profile, mods):
+    """Rewrite a profile behind the store's back and make sure its stamp changes"""
+    path = main.PROFILES_DIR / instance / f"{profile}.json"
+    old = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(main.json.dumps(mods))
+    os.utime(path, ns=(old + 1_000_000, old + 1_000_000))
+
+
+def test_reverse_index_follows_profile_files(instance):
+    name, _ = instance
+    store = main.get_profile_store()
+    store.save(name, "Main", ["Alpha", "Beta@0123456789ab"])
+    assert (name, "Main") in store.profiles_using("Alpha")
+    assert ("Beta", "0123456789ab") in store.used_mods()[1]
+
+    write_profile_file(name, "Main", ["Beta", "Gamma"])
+    assert (name, "Main") not in store.profiles_using("Alpha")
+    assert (name, "Main") in store.profiles_using("Gamma")
+    used, pins = store.used_mods()
+    assert ("Beta", "0123456789ab") not in pins
+
+    (main.PROFILES_DIR / name / "Main.json").unlink()
+    assert (name, "Main") not in store.profiles_using("Gamma")
+
+
+def test_saved_index_is_checked_against_profile_files(instance):
+    name, _ = instance
+    main.get_profile_store().save(name, "Main", ["Alpha"])
+    write_profile_file(name, "Main", ["Beta"])
+
+    reloaded = main.ProfileStore()
+    assert reloaded.profiles[name]["Main"]["mods"] == ["Alpha"]
+    assert reloaded.profiles_using("Alpha") == []
+    assert reloaded.load(name, "Main") == ["Beta"]
+
+
+def test_unreadable_profile_is_reported_not_indexed(instance):
+    name, _ = instance
+    store = main.get_profile_store()
+    store.save(name, "Main", ["Alpha"])
+    (main.PROFILES_DIR / name / "Main.json").write_text("{not json")
+
+    assert store.list_profiles(name) == []
+    assert (name, "Main") in store.errors
+    assert store.profiles_using("Alpha") == []
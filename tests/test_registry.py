@@ -0,0 +1,68 @@
+import json
+import os
+import time
+
+import pytest
+
+import main
+
+
+def test_saves_are_written_together_after_the_delay(tmp_path):
+    path = tmp_path / "instances.json"
+    registry = main.InstanceRegistry(path, write_delay=0.05)
+    registry.save({"A": {"path": "a"}})
+    registry.save({"A": {"path": "a"}, "B": {"path": "b"}})
+    assert not path.exists()
+    assert registry.load() == {"A": {"path": "a"}, "B": {"path": "b"}}
+
+    deadline = time.monotonic() + 5
+    while registry.dirty and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert json.loads(path.read_text()) == {"A": {"path": "a"}, "B": {"path": "b"}}
+    assert main.InstanceRegistry(path).load() == registry.load()
+
+
+def test_external_edits_are_reloaded(tmp_path):
+    path = tmp_path / "instances.json"
+    registry = main.InstanceRegistry(path, write_delay=60)
+    registry.save({"A": {"path": "a"}})
+    registry.flush()
+
+    path.write_text(json.dumps({"C": {"path": "c"}}))
+    stamp = path.stat().st_mtime_ns + 1_000_000
+    os.utime(path, ns=(stamp, stamp))
+    assert registry.load() == {"C": {"path": "c"}}
+
+
+def test_failed_delayed_write_is_kept_and_reported(tmp_path, monkeypatch):
+    path = tmp_path / "instances.json"
+    registry = main.InstanceRegistry(path, write_delay=60)
+    registry.save({"A": {"path": "a"}})
+
+    replace = os.replace
+
+    def full_disk(src, dst):
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(main.os, "replace", full_disk)
+    registry.delayed_flush()
+    assert registry.dirty
+
+    with pytest.raises(main.OperationError, match="No space left"):
+        registry.load()
+    registry.timer.cancel()
+
+    registry.delayed_flush()
+    monkeypatch.setattr(main.os, "replace", replace)
+    assert registry.load() == {"A": {"path": "a"}}
+    assert not registry.dirty
+    assert json.loads(path.read_text()) == {"A": {"path": "a"}}
+
+
+def test_update_skips_removed_instances(tmp_path):
+    registry = main.InstanceRegistry(tmp_path / "instances.json", write_delay=60)
+    registry.save({"A": {"path": "a", "active_profile": None}})
+    registry.update("A", active_profile="p")
+    registry.save({})
+    registry.update("A", active_profile="q")
+    assert registry.load() == {}
+    registry.timer.cancel()
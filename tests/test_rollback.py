@@ -0,0 +1,49 @@
+import pytest
+
+import main
+from conftest import quiet, unique, write_mod
+
+
+@pytest.fixture
+def two_applies(instance, settings):
+    """Apply p1 (one mod), then p2 (p1 and a second mod) with staged applies; returns (instance, GameData, mods)"""
+    settings(staged_apply=True)
+    name, gamedata = instance
+    first, second = unique("First"), unique("Second")
+    write_mod(gamedata / first, {"Parts/part.cfg": "PART { name = original }\n", "Textures/tex.dds": "original"})
+    main.update_profile(name, "p1", quiet)
+    main.apply_profile(name, "p1", quiet)
+    write_mod(main.MODS_DIR / second, {"plugin.dll": "dll"})
+    main.save_profile(name, "p2", [first, second])
+    main.apply_profile(name, "p2", quiet)
+    assert (gamedata / second).exists()
+    assert main.deployed_mod_names(name) == {first, second}
+    return name, gamedata, first, second
+
+
+def test_rollback_brings_back_previous_gamedata(two_applies):
+    name, gamedata, first, second = two_applies
+    assert main.previous_gamedata_changes(name) == []
+    assert main.rollback_gamedata(name) == "p1"
+    assert not (gamedata / second).exists()
+    assert (gamedata / first / "Parts" / "part.cfg").read_text() == "PART { name = original }\n"
+    assert main.deployed_mod_names(name) == {first}
+
+
+def test_writes_to_staged_settings_files_leave_previous_alone(two_applies):
+    name, gamedata, first, _ = two_applies
+    (gamedata / first / "Parts" / "part.cfg").write_text("PART { name = edited }\n")
+    main.rollback_gamedata(name)
+    assert (gamedata / first / "Parts" / "part.cfg").read_text() == "PART { name = original }\n"
+
+
+def test_rollback_refuses_when_previous_was_changed_through_a_link(two_applies):
+    name, gamedata, first, _ = two_applies
+    texture = gamedata / first / "Textures" / "tex.dds"
+    assert texture.stat().st_nlink > 1  # Shared with GameData.previous
+    with open(texture, "r+") as f:
+        f.write("EDITED!!")
+    assert main.previous_gamedata_changes(name) == [f"{first}/Textures/tex.dds"]
+    with pytest.raises(main.OperationError):
+        main.rollback_gamedata(name)
+    assert main.rollback_gamedata(name, force=True) == "p1"
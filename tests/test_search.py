@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+import main
+from conftest import unique, write_mod
+
+
+@pytest.fixture
+def index():
+    return main.ModIndex(main.BASE_DIR / f"{unique('index')}.db")
+
+
+@pytest.fixture
+def mods():
+    engines, tanks = unique("Engines"), unique("Tanks")
+    write_mod(main.MODS_DIR / engines, {
+        "Parts/engine.cfg": "PART\n{\n    name = superNovaEngine\n    title = Nova\n}\n",
+        "Engines.version": '{"NAME": "Nova Engines", "VERSION": {"MAJOR": 1, "MINOR": 2, "PATCH": 3}}',
+    })
+    write_mod(main.MODS_DIR / tanks, {
+        "Patches/tanks.cfg": "@PART[superNovaEngine]\n{\n    %mass = 2\n}\n",
+        "Parts/tank.cfg": "PART\n{\n    name = bigFuelTank\n}\n",
+    })
+    return engines, tanks
+
+
+def test_read_search_terms(mods):
+    engines, tanks = mods
+    assert main.read_search_terms(main.MODS_DIR / engines / "Parts" / "engine.cfg") == [("part", "superNovaEngine")]
+    assert main.read_search_terms(main.MODS_DIR / engines / "Engines.version") == [("version", "Nova Engines 1.2.3")]
+    assert main.read_search_terms(main.MODS_DIR / tanks / "Patches" / "tanks.cfg") == [("patch", "superNovaEngine")]
+
+
+@pytest.mark.parametrize("fts", [True, False], ids=["fts5", "like"])
+def test_search_finds_parts_versions_and_typos(index, mods, fts):
+    engines, tanks = mods
+    if fts and not index.fts:
+        pytest.skip("SQLite was built without FTS5")
+    index.fts = fts
+    index.refresh([engines, tanks])
+
+    best = index.search("supernovaengine")[0]
+    assert (best["mod"], best["kind"], best["text"]) == (engines, "part", "superNovaEngine")
+    assert {m["mod"] for m in index.search("supernovaengine", fuzzy=False)} == {engines, tanks}
+    assert index.search_mods("nova engines 1.2")[engines]["kind"] == "version"
+    assert index.search_mods("bigFuel")[tanks]["rel"] == "Parts/tank.cfg"
+    assert tanks in index.search_mods("bigfueltnk")  # A typo still finds it
+    assert tanks not in index.search_mods("bigfueltnk", fuzzy=False)
+
+
+def test_search_follows_reindexed_mods(index, mods):
+    engines, _ = mods
+    index.refresh([engines])
+    assert engines in index.search_mods("supernovaengine", fuzzy=False)
+
+    (main.MODS_DIR / engines / "Parts" / "engine.cfg").unlink()
+    parts = main.MODS_DIR / engines / "Parts"
+    stamp = parts.stat().st_mtime_ns + 1_000_000
+    os.utime(parts, ns=(stamp, stamp))
+    index.refresh([engines])
+    assert engines not in index.search_mods("supernovaengine", fuzzy=False)
+
+
+def test_mod_filter_adds_content_matches_with_hints(mods):
+    engines, tanks = mods
+    index = main.get_mod_index()
+    index.refresh([engines, tanks])
+    mod_filter = main.ModFilter([engines, tanks])
+    mod_filter.filter("bigfueltank", contents=True)
+    assert [mod_filter.all_mods[i] for i in mod_filter.filtered] == [tanks]
+    assert mod_filter.hints[mod_filter.filtered[0]] == "  - part: bigFuelTank"
+    assert mod_filter.last_query is None  # Content matches are never narrowed
@@ -0,0 +1,90 @@
+import errno
+import os
+import stat
+
+import pytest
+
+import main
+from conftest import unique, write_mod
+
+MOD_FILES = {"Parts/part.cfg": "PART { name = a }\n", "Textures/tex.dds": "texture",
+             "PluginData/settings.xml": "<settings/>"}
+
+
+def store_is_intact():
+    """Every object in the mod store still holds the content its name is the hash of"""
+    for bucket in main.STORE_OBJECTS_DIR.iterdir():
+        for obj in bucket.iterdir():
+            assert main.file_hash(obj) == obj.name, f"{obj} was changed"
+
+
+def objects_are_read_only():
+    for bucket in main.STORE_OBJECTS_DIR.iterdir():
+        for obj in bucket.iterdir():
+            assert not stat.S_IMODE(obj.stat().st_mode) & 0o222, f"{obj} is writable"
+
+
+def ingest_and_deploy(tmp_path, mode):
+    mod = unique("Mod")
+    main.store_ingest_mod(write_mod(tmp_path / "download" / mod, MOD_FILES), mod)
+    deployed = tmp_path / "GameData" / mod
+    assert main.deploy_item(main.MODS_DIR / mod, deployed, mode) == mode
+    return mod, deployed
+
+
+@pytest.mark.parametrize("mode", ["hardlink", "symlink"])
+def test_objects_are_read_only(tmp_path, mode):
+    mod, deployed = ingest_and_deploy(tmp_path, mode)
+    objects_are_read_only()
+    # What KSP writes to stays writable and isn't an object
+    for rel in ("Parts/part.cfg", "PluginData/settings.xml"):
+        assert stat.S_IMODE(os.stat(deployed / rel).st_mode) & stat.S_IWUSR
+        assert os.stat(main.MODS_DIR / mod / rel).st_nlink == 1
+
+
+@pytest.mark.parametrize("mode", ["hardlink", "symlink"])
+def test_runtime_writes_leave_store_intact(tmp_path, mode):
+    mod, deployed = ingest_and_deploy(tmp_path, mode)
+    (deployed / "PluginData" / "settings.xml").write_text("<settings changed='1'/>")
+    (deployed / "Parts" / "part.cfg").write_text("PART { name = b }\n")
+    store_is_intact()
+
+
+def test_in_place_edit_of_hardlinked_object_drops_it(tmp_path):
+    mod, deployed = ingest_and_deploy(tmp_path, "hardlink")
+    texture = deployed / "Textures" / "tex.dds"
+    old_object = main.object_path(main.file_hash(texture))
+    # Root (or a clear read-only flag) can still write through the link
+    os.chmod(texture, 0o644)
+    with open(texture, "r+") as f:
+        f.write("TEXTURE")
+    main.store_ingest_mod(main.MODS_DIR / mod, mod)
+    assert not old_object.exists()
+    store_is_intact()
+    assert (main.MODS_DIR / mod / "Textures" / "tex.dds").read_text() == "TEXTURE"
+
+
+def test_copy_of_object_is_writable(tmp_path):
+    src = tmp_path / "object"
+    src.write_text("data")
+    main.protect_object(src)
+    main.fast_copy_file(src, tmp_path / "copy")
+    assert stat.S_IMODE((tmp_path / "copy").stat().st_mode) & stat.S_IWUSR
+
+
+def test_removing_read_only_links_keeps_objects_read_only(tmp_path, monkeypatch):
+    unlink = os.unlink
+
+    def unlink_like_windows(path, *, dir_fd=None):
+        # Windows refuses to delete read-only files
+        if not stat.S_IMODE(os.stat(path, dir_fd=dir_fd, follow_symlinks=False).st_mode) & stat.S_IWUSR:
+            raise PermissionError(errno.EACCES, "Access is denied", path)
+        unlink(path, dir_fd=dir_fd)
+
+    mod, deployed = ingest_and_deploy(tmp_path, "hardlink")
+    monkeypatch.setattr(os, "unlink", unlink_like_windows)
+    main.safe_remove_item(deployed / "Textures" / "tex.dds")
+    main.safe_remove_item(deployed)
+    main.safe_remove_item(main.MODS_DIR / mod)
+    assert not deployed.exists() and not (main.MODS_DIR / mod).exists()
+    objects_are_read_only()
@@ -0,0 +1,52 @@
+import json
+import re
+
+import main
+from conftest import unique, write_mod
+
+
+def traced_apply(instance, settings):
+    """Apply a one-mod profile under run_traced; returns (mod, status messages, exported trace)"""
+    settings(trace=True)
+    name, _ = instance
+    mod = unique("Traced")
+    write_mod(main.MODS_DIR / mod, {"Parts/part.cfg": "PART {}\n", "plugin.dll": "dll"})
+    main.save_profile(name, "traced", [mod])
+    messages = []
+    main.run_traced("Apply traced", lambda status, cancel: main.apply_profile(name, "traced", status, cancel),
+                    messages.append)
+    match = re.search(r"\(trace: (.+)\)$", messages[-1])
+    assert match, messages[-1]
+    with open(match.group(1)) as f:
+        return mod, messages, json.load(f)
+
+
+def test_trace_export_holds_operation_phase_and_mod_spans(instance, settings):
+    mod, _, trace = traced_apply(instance, settings)
+    spans = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+    assert [event["name"] for event in spans if event["cat"] == "operation"] == ["Apply traced"]
+    assert {"plan", "deploy"} <= {event["name"] for event in spans if event["cat"] == "phase"}
+    assert mod in {event["name"] for event in spans if event["cat"] == "mod"}
+    threads = {event["tid"] for event in trace["traceEvents"] if event["ph"] == "M" and event["name"] == "thread_name"}
+    assert {event["tid"] for event in spans} <= threads
+    assert trace["otherData"]["operation"] == "Apply traced"
+
+
+def test_trace_summary_is_reported_with_the_counters(instance, settings):
+    _, messages, trace = traced_apply(instance, settings)
+    assert "1 mod(s)" in messages[-1]
+    for counter, count in trace["otherData"]["counters"].items():
+        assert f"{count} {counter.replace('_', ' ')}" in messages[-1]
+
+
+def test_untraced_operation_runs_without_a_trace(settings):
+    settings(trace=False)
+    before = set(main.TRACES_DIR.glob("*.json")) if main.TRACES_DIR.exists() else set()
+    messages = []
+    assert main.run_traced("Quiet", lambda status, cancel: "done", messages.append) == "done"
+    assert messages == []
+    after = set(main.TRACES_DIR.glob("*.json")) if main.TRACES_DIR.exists() else set()
+    assert after == before
+    with main.trace_span("ignored") as span:
+        span.set(files=1)
+    main.trace_count("ignored")
@@ -0,0 +1,63 @@
+import main
+from conftest import write_mod
+
+
+def test_removed_folder_goes_through_the_trash(instance):
+    name, gamedata = instance
+    mod = write_mod(gamedata / "Removed", {"Parts/part.cfg": "PART {}\n", "plugin.dll": "dll"})
+    main.safe_remove_item(mod)
+    assert not mod.exists()
+    trash = gamedata.parent / main.TRASH_NAME
+    assert main.get_trash_reaper().drain(10)
+    assert not trash.exists()
+
+
+def test_folder_outside_known_roots_is_deleted_right_away(tmp_path):
+    reaper = main.get_trash_reaper()
+    folder = write_mod(tmp_path / "elsewhere", {"file.txt": "x"})
+    assert reaper.trash_root(folder) is None
+    main.safe_remove_item(folder)
+    assert not folder.exists()
+    assert not (tmp_path / main.TRASH_NAME).exists()
+
+
+def test_trash_roots_are_cached_until_instances_change(instance, tmp_path):
+    reaper = main.get_trash_reaper()
+    roots = reaper.trash_roots()
+    assert reaper.trash_roots() is roots
+    assert instance[1].parent.resolve() in roots
+
+    instances = main.load_instances()
+    instances["trash-root-test"] = {"path": str(tmp_path / "other"), "active_profile": None}
+    main.save_instances(instances)
+    try:
+        assert (tmp_path / "other").resolve() in reaper.trash_roots()
+        assert reaper.trash_root(tmp_path / "other" / "GameData" / "Mod") == (tmp_path / "other").resolve()
+    finally:
+        del instances["trash-root-test"]
+        main.save_instances(instances)
+    assert (tmp_path / "other").resolve() not in reaper.trash_roots()
+
+
+def test_failed_deletes_are_reported_and_kept(instance, monkeypatch):
+    name, gamedata = instance
+    reaper = main.get_trash_reaper()
+    messages = []
+    monkeypatch.setattr(reaper, "status_callback", messages.append)
+
+    def refuse(path):
+        raise PermissionError(13, "Permission denied", path)
+
+    monkeypatch.setattr(main, "remove_file", refuse)
+    stuck = gamedata / "stuck.txt"
+    stuck.write_text("in use")
+    assert reaper.discard(stuck)
+    assert reaper.drain(10)
+    trash = gamedata.parent / main.TRASH_NAME
+    assert [entry.name.endswith("stuck.txt") for entry in trash.iterdir()] == [True]
+    assert len(messages) == 1 and "1 item(s) left for the next start" in messages[0]
+
+    monkeypatch.undo()
+    reaper.resume()
+    assert reaper.drain(10)
+    assert not trash.exists()
@@ -0,0 +1,53 @@
+import os
+import stat
+
+import main
+from conftest import quiet, unique, write_mod
+
+
+def set_deploy_mode(name, mode):
+    instances = main.load_instances()
+    instances[name]["deploy_mode"] = mode
+    main.save_instances(instances)
+
+
+def test_update_syncs_changed_mods_back(instance):
+    name, gamedata = instance
+    changed, kept = unique("Changed"), unique("Kept")
+    write_mod(gamedata / changed, {"Parts/part.cfg": "PART { name = a }\n", "Plugins/mod.dll": "dll"})
+    write_mod(gamedata / kept, {"kept.cfg": "kept"})
+    result = main.update_profile(name, "p1", quiet)
+    assert result["added"] == sorted([changed, kept], key=main.natural_sort_key)
+    first_version = main.current_mod_version(changed)
+
+    (gamedata / changed / "Parts" / "part.cfg").write_text("PART { name = edited }\n")
+    result = main.update_profile(name, "p1", quiet)
+    assert result["changed"] == {changed: 1}
+    assert result["unchanged"] == [kept]
+    assert (main.MODS_DIR / changed / "Parts" / "part.cfg").read_text() == "PART { name = edited }\n"
+    assert main.current_mod_version(changed) != first_version
+    assert len(main.list_mod_versions(changed)) == 2
+
+    result = main.update_profile(name, "p1", quiet)
+    assert result["changed"] == {}
+
+
+def test_update_checks_hardlinked_files_against_the_stored_version(instance):
+    name, gamedata = instance
+    set_deploy_mode(name, "hardlink")
+    mod = unique("Mod")
+    write_mod(main.MODS_DIR / mod, {"Plugins/mod.dll": "dll"})
+    main.store_ingest_mod(main.MODS_DIR / mod, mod)
+    main.save_profile(name, "p1", [mod])
+    main.apply_profile(name, "p1", quiet)
+    dll = gamedata / mod / "Plugins" / "mod.dll"
+    assert os.path.samefile(dll, main.MODS_DIR / mod / "Plugins" / "mod.dll")
+    assert main.update_profile(name, "p1", quiet)["unchanged"] == [mod]
+
+    # Edited in place through the link anyway: the mods folder (and its index) change with it
+    os.chmod(dll, stat.S_IMODE(os.stat(dll).st_mode) | stat.S_IWUSR)
+    dll.write_text("patched dll")
+    main.get_mod_index().refresh([mod], full=True)
+    assert main.update_profile(name, "p1", quiet)["changed"] == {mod: 1}
+    digest = main.load_mod_version(mod, main.current_mod_version(mod))["files"]["Plugins/mod.dll"][0]
+    assert digest == main.file_hash(dll)
@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+import main
+from conftest import quiet, unique, write_mod
+
+
+@pytest.fixture
+def watcher(monkeypatch):
+    monkeypatch.setattr(main, "WATCH_POLL_SECONDS", 0.05)
+    watcher = main.FolderWatcher()
+    yield watcher
+    for root in watcher.watched():
+        watcher.unwatch(root)
+
+
+def wait_for(check, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not check():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def test_new_and_edited_mods_are_seen(tmp_path, watcher):
+    root = tmp_path / "GameData"
+    write_mod(root / "Old", {"Parts/part.cfg": "PART {}\n"})
+    watcher.watch(root)
+    mark = watcher.checkpoint()
+    write_mod(root / "New", {"Parts/Sub/part.cfg": "PART {}\n"})
+    assert watcher.entries(root) == {"Old", "New"}
+    assert watcher.changes_since(root, mark, content=False) == {"New"}
+
+    # Folders created after the walk are watched by the watcher thread
+    assert wait_for(lambda: not watcher.pending and watcher.changes_since(root, watcher.checkpoint()) == set())
+    mark = watcher.checkpoint()
+    (root / "New" / "Parts" / "Sub" / "part.cfg").write_text("PART { edited = true }\n")
+    (root / "Old" / "Parts" / "part.cfg").write_text("PART { edited = true }\n")
+    assert watcher.changes_since(root, mark) == {"New", "Old"}
+
+
+def test_runtime_writes_are_kept_apart(tmp_path, watcher):
+    root = tmp_path / "GameData"
+    write_mod(root / "Mod", {"PluginData/settings.xml": "<a/>", "part.cfg": "PART {}\n"})
+    watcher.watch(root)
+    mark = watcher.checkpoint()
+    (root / "Mod" / "PluginData" / "settings.xml").write_text("<b/>")
+    assert watcher.changes_since(root, mark, runtime=False) == set()
+    assert watcher.changes_since(root, mark) == {"Mod"}
+
+
+def test_polling_notices_added_and_removed_folders(tmp_path, watcher, monkeypatch):
+    monkeypatch.setattr(watcher, "fd", None)
+    root = tmp_path / "GameData"
+    write_mod(root / "Old", {"part.cfg": "PART {}\n"})
+    watcher.watch(root)
+    mark = watcher.checkpoint()
+    assert watcher.changes_since(root, mark) is None  # Polling can miss edits in place
+    main.safe_remove_item(root / "Old")
+    write_mod(root / "New", {"part.cfg": "PART {}\n"})
+    assert wait_for(lambda: watcher.changes_since(root, mark, content=False) == {"Old", "New"})
+    assert watcher.entries(root) == {"New"}
+
+
+def test_queries_do_not_wait_for_a_walk(tmp_path, watcher, monkeypatch):
+    root = tmp_path / "GameData"
+    write_mod(root / "Mod", {"part.cfg": "PART {}\n"})
+    walking, release = threading.Event(), threading.Event()
+    poll_stamps = watcher._poll_stamps
+
+    def slow_walk(walk_root, rel=""):
+        walking.set()
+        release.wait(5)
+        return poll_stamps(walk_root, rel)
+
+    monkeypatch.setattr(watcher, "_poll_stamps", slow_walk)
+    watching = threading.Thread(target=watcher.watch, args=(root,))
+    watching.start()
+    assert walking.wait(5)
+    answered = threading.Event()
+    threading.Thread(target=lambda: (watcher.checkpoint(), watcher.entries(root), answered.set())).start()
+    assert answered.wait(1)
+    release.set()
+    watching.join(5)
+    assert watcher.entries(root) == {"Mod"}
+
+
+def test_gamedata_drift(instance, watcher, monkeypatch):
+    name, gamedata = instance
+    kept, removed = unique("Kept"), unique("Removed")
+    write_mod(main.MODS_DIR / kept, {"part.cfg": "PART {}\n"})
+    write_mod(main.MODS_DIR / removed, {"part.cfg": "PART {}\n"})
+    main.save_profile(name, "p", [kept, removed])
+    main.apply_profile(name, "p", quiet)
+    monkeypatch.setattr(main, "_folder_watcher", watcher)
+    watcher.watch(gamedata)
+    watcher.started = watcher.checkpoint()
+    assert main.gamedata_drift(name) == {"profile": "p", "added": [], "removed": [], "changed": []}
+    assert main.describe_drift(main.gamedata_drift(name)) == ""
+
+    write_mod(gamedata / "ByHand", {"part.cfg": "PART {}\n"})
+    (gamedata / kept / "part.cfg").write_text("PART { edited = true }\n")
+    main.safe_remove_item(gamedata / removed)
+    drift = main.gamedata_drift(name)
+    assert (drift["added"], drift["removed"], drift["changed"]) == (["ByHand"], [removed], [kept])
+    assert "1 added, 1 changed, 1 removed" in main.describe_drift(drift)
+
+    main.mark_gamedata_synced(name)
+    assert main.gamedata_drift(name)["changed"] == []
@@ -0,0 +1,72 @@
+import io
+import os
+import struct
+import zipfile
+
+import pytest
+
+import main
+from conftest import write_mod
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "GameData"
+    write_mod(root, {
+        "Mod/Parts/part.cfg": "PART { name = a }\n" * 200,  # Deflated
+        "Mod/Textures/tex.dds": "dds" * 500,  # Stored: already-compressed format
+        "Mod/random.bin": os.urandom(4096).hex(),  # Deflated
+        "Mod/empty.txt": "",
+        "Other/readme.txt": "hello",
+    })
+    (root / "Mod" / "EmptyFolder").mkdir()
+    return root
+
+
+def expected_contents(root):
+    return {os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, "/"):
+            open(os.path.join(dirpath, name), "rb").read()
+            for dirpath, _, filenames in os.walk(root) for name in filenames}
+
+
+def read_back(path):
+    with zipfile.ZipFile(path) as zf:
+        assert zf.testzip() is None
+        return ({info.filename: zf.read(info) for info in zf.infolist() if not info.is_dir()},
+                {info.filename for info in zf.infolist() if info.is_dir()}, zf.infolist())
+
+
+@pytest.mark.parametrize("compression", list(main.ZIP_COMPRESSION_LEVELS))
+def test_backup_round_trips_through_zipfile(tree, tmp_path, compression):
+    backup = main.write_zip_backup(tree, tmp_path / "backup.zip", compression)
+    files, dirs, infos = read_back(backup)
+    assert files == expected_contents(tree)
+    assert "Mod/EmptyFolder/" in dirs
+    methods = {info.filename: info.compress_type for info in infos}
+    assert methods["Mod/Textures/tex.dds"] == zipfile.ZIP_STORED
+    if compression != "store":
+        assert methods["Mod/Parts/part.cfg"] == zipfile.ZIP_DEFLATED
+
+
+def test_zip64_records_round_trip(tree, tmp_path, monkeypatch):
+    # Members, offsets and the central directory all count as past the 4 GiB limit
+    monkeypatch.setattr(main, "ZIP64_LIMIT", 64)
+    backup = main.write_zip_backup(tree, tmp_path / "backup.zip")
+    files, _, infos = read_back(backup)
+    assert files == expected_contents(tree)
+    data = backup.read_bytes()
+    assert struct.pack("<I", 0x06064b50) in data  # ZIP64 end of central directory
+    assert struct.pack("<I", 0x07064b50) in data  # and its locator
+    big = next(info for info in infos if info.filename == "Mod/Parts/part.cfg")
+    assert big.extra[:2] == struct.pack("<H", 1)  # ZIP64 extra field
+
+
+def test_zip64_entry_count(tmp_path):
+    fp = io.BytesIO()
+    writer = main.ZipStreamWriter(fp)
+    count = 0xFFFF + 10
+    for i in range(count):
+        writer.add_dir(f"d{i}", 0)
+    writer.close()
+    with zipfile.ZipFile(io.BytesIO(fp.getvalue())) as zf:
+        assert len(zf.infolist()) == count